@@ -0,0 +1,113 @@
+"""Benchmark: swapping in a new workbook version under load.
+
+For each scale (see ``synthetic.py``) two workbook versions are written to
+xlsx, the second with every required score one point higher.  A reader
+thread loops ``load_dataset`` + ``engine.predict`` as a request would while
+the workbook is replaced (``os.replace``, as a deploy should do it) with the
+second version, and reports:
+
+``before``  request latency with nothing going on (p50/p99/max, ms)
+``during``  request latency between the replace and the new version being
+            served, with the reload either in the background (the default)
+            or in the requesting thread (``background=False``, the old way)
+``swap``    seconds from the replace until requests see the new version
+``live``    versions still alive once the reader has let go (should be 1)
+
+    python benchmarks/bench_hotswap.py [--scales 1 10] [--settle 1.0]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+from college_predictor.data import PROFILE_SHEET, UNI_SHEET, WorkbookCache  # noqa: E402
+from college_predictor.engine import build_user_profile, predict  # noqa: E402
+from synthetic import base_sheets, synthetic_inputs, synthetic_sheets  # noqa: E402
+
+
+def write_workbook(path, sheets):
+    with pd.ExcelWriter(path) as writer:
+        for name, df in zip((PROFILE_SHEET, UNI_SHEET), sheets):
+            df.to_excel(writer, sheet_name=name, index=False)
+
+
+def run(cache, path, new_version, profiles, settle):
+    """Latencies before/during the swap, and seconds until the swap was seen."""
+    old = cache.get(path).version
+    timings, stop = [], threading.Event()
+
+    def reader():
+        i = 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            dataset = cache.get(path)
+            predict(profiles[i % len(profiles)], dataset=dataset)
+            timings.append((t0, time.perf_counter() - t0, dataset.version))
+            i += 1
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(settle)
+    replaced = time.perf_counter()
+    os.replace(new_version, path)
+    deadline = replaced + 600
+    while not timings or timings[-1][2] == old:
+        if time.perf_counter() > deadline:
+            stop.set()
+            raise SystemExit("the new version was never served")
+        time.sleep(0.001)
+    time.sleep(settle / 4)
+    stop.set()
+    thread.join()
+    seen = min(t + d for t, d, v in timings if v != old)
+    before = [d for t, d, _ in timings if t + d < replaced]
+    during = [d for t, d, _ in timings if t + d >= replaced and t <= seen]
+    return np.array(before) * 1000, np.array(during) * 1000, seen - replaced
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    ap.add_argument("--settle", type=float, default=1.0, help="seconds of load before the swap")
+    args = ap.parse_args()
+
+    rng  = np.random.default_rng(0)
+    base = base_sheets()
+    profiles = [build_user_profile(**synthetic_inputs(rng)) for _ in range(200)]
+    stat = lambda a: f"{np.median(a):7.2f} {np.percentile(a, 99):7.2f} {a.max():8.1f}"
+    print(f"{'scale':>6} {'reload':>11} {'before p50/p99/max ms':>24} "
+          f"{'during p50/p99/max ms':>24} {'swap s':>7} {'live':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            profile, uni = synthetic_sheets(scale, base=base)
+            versions = [os.path.join(tmp, "v1.xlsx"), os.path.join(tmp, "v2.xlsx")]
+            write_workbook(versions[0], (profile, uni))
+            uni = uni.assign(**{"Required Profile Score": uni["Required Profile Score"] + 1})
+            write_workbook(versions[1], (profile, uni))
+            for background in (True, False):
+                path = os.path.join(tmp, "workbook.xlsx")
+                with open(versions[0], "rb") as src, open(path, "wb") as dst:
+                    dst.write(src.read())
+                staged = os.path.join(tmp, "staged.xlsx")
+                with open(versions[1], "rb") as src, open(staged, "wb") as dst:
+                    dst.write(src.read())
+                cache = WorkbookCache(background=background)
+                before, during, swap = run(cache, path, staged, profiles, args.settle)
+                cache.wait()
+                gc.collect()
+                live = len(cache.stats()["live_versions"])
+                print(f"{scale:>5}x {'background' if background else 'in request':>11} "
+                      f"{stat(before):>24} {stat(during):>24} {swap:>7.2f} {live:>5}",
+                      flush=True)
+
+
+if __name__ == "__main__":
+    main()
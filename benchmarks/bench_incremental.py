@@ -0,0 +1,93 @@
+"""Self-check and benchmark: ``IncrementalPredictor`` vs a full ``predict``.
+
+Simulates sessions that edit one form field (or toggle one country) per
+rerun, checks every incremental result against a full recompute (exits 1 on
+any mismatch) and compares the per-rerun latency.
+
+    python benchmarks/bench_incremental.py [--scales 1 100] [--steps 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+from college_predictor.engine import ALL, build_user_profile, predict  # noqa: E402
+from college_predictor.incremental import IncrementalPredictor  # noqa: E402
+from synthetic import base_sheets, synthetic_dataset, synthetic_inputs  # noqa: E402
+
+FIELDS = {
+    "class9": (40, 100), "class10": (40, 100), "class11": (40, 100),
+    "class12": (40, 100), "sat": (400, 1600), "cc": (0, 3), "ec": (0, 3),
+    "internships": (0, 2), "n_lor": (0, 3),
+}
+
+
+def edit(inputs, sel, countries, rng):
+    """One widget change: a number field, an AP score, a checkbox or a country."""
+    inputs = dict(inputs, ap_scores=list(inputs["ap_scores"]))
+    kind = rng.integers(5)
+    if kind == 0 or (kind == 1 and not inputs["ap_scores"]):
+        name = list(FIELDS)[rng.integers(len(FIELDS))]
+        inputs[name] = int(rng.integers(FIELDS[name][0], FIELDS[name][1] + 1))
+    elif kind == 1:
+        inputs["ap_scores"][rng.integers(len(inputs["ap_scores"]))] = int(rng.integers(51)) / 10
+    elif kind == 2:
+        name = "community" if rng.integers(2) else "research"
+        inputs[name] = not inputs[name]
+    else:
+        chosen = [] if ALL in sel else list(sel)
+        country = countries[rng.integers(len(countries))]
+        chosen = [c for c in chosen if c != country] if country in chosen else chosen + [country]
+        sel = tuple(chosen) or (ALL,)
+    return inputs, sel
+
+
+def same(a, b):
+    return all(x.equals(y) for x, y in zip(
+        (a.country_scores, a.ambitious, a.target, a.safe),
+        (b.country_scores, b.ambitious, b.target, b.safe)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 100])
+    ap.add_argument("--steps", type=int, default=300)
+    ap.add_argument("--check-gap-view", action="store_true",
+                    help="also compare the full gap view (slow at large scales)")
+    args = ap.parse_args()
+
+    base, bad = base_sheets(), 0
+    for scale in args.scales:
+        dataset = synthetic_dataset(scale, base=base)
+        countries = list(dataset.weights.countries)
+        rng = np.random.default_rng(scale)
+        inputs, sel = synthetic_inputs(rng), (ALL,)
+        inc = IncrementalPredictor(dataset)
+        t_full = t_inc = 0.0
+        for _ in range(args.steps):
+            inputs, sel = edit(inputs, sel, countries, rng)
+            up = build_user_profile(**inputs)
+            t0 = time.perf_counter()
+            full = predict(up, sel, dataset)
+            t1 = time.perf_counter()
+            result = inc.predict(up, sel)
+            t2 = time.perf_counter()
+            t_full += t1 - t0
+            t_inc  += t2 - t1
+            ok = same(full, result)
+            if args.check_gap_view:
+                ok = ok and full.gap_view.equals(result.gap_view)
+            bad += not ok
+        n = args.steps
+        print(f"{scale:>5}x  full {t_full / n * 1000:8.3f} ms  incremental "
+              f"{t_inc / n * 1000:8.3f} ms  ({t_full / t_inc:5.1f}x)  {dict(inc.stats)}")
+    print(f"mismatches: {bad}")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: streaming ingestion of large workbooks and CSV exports.
+
+Writes the synthetic ``University`` sheet (see ``synthetic.py``) at each scale
+as one xlsx and one CSV, with a few bad rows mixed in, ingests both into a
+store and reports rows/s and peak traced memory.  Peak memory should stay
+roughly flat as the scale grows; the store is checked against the sheet it
+came from.
+
+    python benchmarks/bench_ingest.py [--scales 10 100 1000] [--chunk-rows 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import openpyxl
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+from college_predictor.data import PROFILE_SHEET, UNI_SHEET  # noqa: E402
+from college_predictor.ingest import CHUNK_ROWS, UNI_COLS, ingest, open_store  # noqa: E402
+from synthetic import base_sheets, synthetic_sheets  # noqa: E402
+
+BAD_EVERY = 997   # one bad row per this many
+
+
+def with_bad_rows(uni):
+    uni = uni.astype(object)
+    bad = np.arange(0, len(uni), BAD_EVERY)
+    uni.iloc[bad[0::3], uni.columns.get_loc("Country")] = None
+    uni.iloc[bad[1::3], uni.columns.get_loc("Required Profile Score")] = "tbc"
+    uni.iloc[bad[2::3], uni.columns.get_loc("Required Profile Score")] = 250
+    return uni, len(bad)
+
+
+def write_xlsx(path, profile, uni):
+    wb = openpyxl.Workbook(write_only=True)
+    for name, df in ((PROFILE_SHEET, profile), (UNI_SHEET, uni)):
+        ws = wb.create_sheet(name)
+        ws.append(list(df.columns))
+        for row in df.itertuples(index=False):
+            ws.append([None if isinstance(v, float) and np.isnan(v) else v for v in row])
+    wb.save(path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args()
+
+    base = base_sheets()
+    print(f"{'scale':>6} {'rows':>9} {'bad':>6} {'seconds':>8} {'rows/s':>9} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            profile, uni = synthetic_sheets(scale, base=base)
+            uni, n_bad = with_bad_rows(uni)
+            half = len(uni) // 2
+            xlsx, csv = os.path.join(tmp, "part1.xlsx"), os.path.join(tmp, "part2.csv")
+            write_xlsx(xlsx, profile, uni.iloc[:half])
+            uni.iloc[half:].rename(columns={"QS Ranking": "Rank QS"}).to_csv(csv, index=False)
+            store = os.path.join(tmp, "store")
+
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            report = ingest([xlsx, csv], store, chunk_rows=args.chunk_rows)
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            good = np.ones(len(uni), dtype=bool)
+            good[np.arange(0, len(uni), BAD_EVERY)] = False
+            expected = uni["Required Profile Score"][good].astype(np.float64).to_numpy()
+            stored = open_store(store).uni_df
+            ok = (report.bad == n_bad and np.array_equal(
+                stored["Required Profile Score"].to_numpy(dtype=np.float64), expected,
+                equal_nan=True))
+            print(f"{scale:>5}x {report.rows:>9,} {report.bad:>6} {elapsed:>8.2f} "
+                  f"{report.rows / elapsed:>9,.0f} {peak / 2**20:>9.1f}"
+                  f"{'' if ok else '  MISMATCH'}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark: PDF render time and peak Python memory against gap-analysis size,
+for the classic single-Table layout and the chunked fast path.
+
+    python benchmarks/bench_pdf.py [--sizes 100 1000 5000] [--classic-max 5000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+from college_predictor.index import GAP_COLS  # noqa: E402
+from college_predictor.report import build_pdf  # noqa: E402
+
+MODES = {
+    "classic":   dict(fast=False),
+    "fast":      dict(fast=True),
+    "fast+%.1f": dict(fast=True, float_precision=1),
+}
+
+
+def synthetic_gap_view(n, rng):
+    score = np.round(rng.random(n) * 100, 1)
+    req   = rng.integers(20, 100, n)
+    df = pd.DataFrame({
+        "Country": rng.choice(["USA", "UK", "Australia", "Germany", "Canada"], n),
+        "University": [f"Synthetic University of Somewhere No. {i}" for i in range(n)],
+        "QS Ranking": rng.integers(1, 1500, n),
+        "Required Profile Score": req,
+        "Your Profile %": score,
+        "Gap %": np.round(req - score, 1),
+    })[GAP_COLS]
+    return df.sort_values("Gap %", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def measure(tables, kwargs):
+    # Timed and traced in separate runs: tracemalloc slows ReportLab ~10x
+    t0 = time.perf_counter()
+    pdf = build_pdf(*tables, **kwargs).getvalue()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    build_pdf(*tables, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(pdf)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 5_000, 20_000])
+    ap.add_argument("--classic-max", type=int, default=5_000,
+                    help="skip the (quadratic) classic layout above this many rows")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(7)
+    scores = pd.DataFrame({"Country": ["USA", "UK"], "Total Profile %": [61.6, 71.7]})
+    print(f"{'rows':>7} {'mode':>10} {'seconds':>9} {'peak MiB':>9} {'pdf KiB':>8}")
+    for n in args.sizes:
+        gap_view = synthetic_gap_view(n, rng)
+        tables = (scores, gap_view, gap_view.iloc[:6], gap_view.iloc[6:12], gap_view.iloc[12:18])
+        for mode, kwargs in MODES.items():
+            if mode == "classic" and n > args.classic_max:
+                continue
+            elapsed, peak, size = measure(tables, kwargs)
+            print(f"{n:>7} {mode:>10} {elapsed:>9.3f} {peak / 2**20:>9.1f} {size / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark suite: scoring, gap analysis and bucketing at synthetic scale.
+
+For each scale (a multiple of the shipped workbook, see ``synthetic.py``) every
+stage is run for random students and reported as throughput, p50/p90/p99
+latency and peak traced memory (measured in a separate, untimed call, since
+tracemalloc distorts timings).  Results are compared with a stored baseline;
+``--check`` exits non-zero when a stage's p50 regressed beyond ``--tolerance``.
+
+Stages:
+
+``country_score``   ``engine.score_countries`` over all countries
+``gap_sort``        ``engine.gap_analysis``: score_map join + sort_values("Gap %")
+``anchor_slice``    ``engine.bucket_universities`` on that gap view
+``index_buckets``   ``UniversityIndex.buckets``, the path ``predict`` uses
+``predict``         ``engine.predict`` end to end
+``nearest``         ``UniversityIndex.nearest``: 10 closest universities
+``top_by_qs``       ``UniversityIndex.top_by_qs``: 10 best QS ranks within reach
+``index_build``     ``UniversityIndex(uni_df)``, paid once per workbook load
+
+    python benchmarks/bench_pipeline.py [--scales 1 10 100 1000] [--iterations 200]
+        [--save-baseline] [--check] [--tolerance 1.5]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+from college_predictor.engine import (ALL, bucket_universities, build_user_profile,  # noqa: E402
+                                      gap_analysis, predict, score_countries)
+from college_predictor.index import UniversityIndex  # noqa: E402
+from synthetic import base_sheets, synthetic_dataset, synthetic_inputs  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline_pipeline.json")
+SCALES   = [1, 10, 100, 1000]
+
+
+def stages(dataset):
+    """``{name: (prepare, fn)}``: ``prepare(user_profile)`` builds the stage's
+    input untimed, ``fn(input)`` is the timed call."""
+    sel = (ALL,)
+
+    def scores(up):
+        return score_countries(dataset, up, sel)
+
+    def score_map(up):
+        cs = scores(up)
+        return dict(zip(cs["Country"], cs["Total Profile %"]))
+
+    return {
+        "country_score": (lambda up: up, scores),
+        "gap_sort":      (scores, lambda cs: gap_analysis(dataset.uni_df, cs)),
+        "anchor_slice":  (lambda up: gap_analysis(dataset.uni_df, scores(up)),
+                          bucket_universities),
+        "index_buckets": (score_map, dataset.uni_index.buckets),
+        "predict":       (lambda up: up, lambda up: predict(up, sel, dataset)),
+        "nearest":       (score_map, dataset.uni_index.nearest),
+        "top_by_qs":     (score_map, dataset.uni_index.top_by_qs),
+        "index_build":   (lambda up: dataset.uni_df, UniversityIndex),
+    }
+
+
+def run_stage(prepare, fn, profiles, budget):
+    latencies = []
+    started = time.perf_counter()
+    for up in profiles:
+        arg = prepare(up)
+        t0 = time.perf_counter()
+        fn(arg)
+        latencies.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > budget and len(latencies) >= 5:
+            break
+    arg = prepare(profiles[0])
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    lat = np.array(latencies)
+    p50, p90, p99 = np.percentile(lat, [50, 90, 99]) * 1000
+    return {"n": len(lat), "ops_per_s": len(lat) / lat.sum(),
+            "p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "peak_mib": peak / 2**20}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--budget", type=float, default=10.0,
+                    help="max seconds per stage and scale (at least 5 iterations)")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true",
+                    help="exit 1 if any p50 regressed beyond --tolerance")
+    ap.add_argument("--tolerance", type=float, default=1.5)
+    args = ap.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+
+    base = base_sheets()
+    rng  = np.random.default_rng(3)
+    profiles = [build_user_profile(**synthetic_inputs(rng)) for _ in range(args.iterations)]
+    results, regressions = {}, []
+    print(f"{'scale':>6} {'stage':>14} {'n':>5} {'ops/s':>10} {'p50 ms':>9} "
+          f"{'p90 ms':>9} {'p99 ms':>9} {'peak MiB':>9} {'vs base':>8}")
+    for scale in args.scales:
+        dataset = synthetic_dataset(scale, base=base)
+        # Weight matrix and index are built once per workbook load, not per request
+        dataset.weights
+        dataset.uni_index
+        results[str(scale)] = {}
+        for name, (prepare, fn) in stages(dataset).items():
+            r = run_stage(prepare, fn, profiles, args.budget)
+            results[str(scale)][name] = r
+            ref = baseline.get(str(scale), {}).get(name)
+            ratio = r["p50_ms"] / ref["p50_ms"] if ref else None
+            if ratio is not None and ratio > args.tolerance:
+                regressions.append((scale, name, ratio))
+            print(f"{scale:>5}x {name:>14} {r['n']:>5} {r['ops_per_s']:>10,.0f} "
+                  f"{r['p50_ms']:>9.3f} {r['p90_ms']:>9.3f} {r['p99_ms']:>9.3f} "
+                  f"{r['peak_mib']:>9.2f} {f'{ratio:.2f}x' if ratio else '-':>8}",
+                  flush=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "results": results}, fh, indent=1, sort_keys=True)
+            fh.write("\n")
+        print(f"baseline written to {args.baseline}")
+    for scale, name, ratio in regressions:
+        print(f"REGRESSION {scale}x {name}: p50 {ratio:.2f}x baseline", file=sys.stderr)
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
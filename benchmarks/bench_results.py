@@ -0,0 +1,88 @@
+"""Benchmark: the prediction log (``college_predictor.results``) at scale.
+
+Predicts a pool of random students once, then logs ``--records`` predictions
+drawn from the pool through ``ResultLog`` and reports:
+
+``record``   latency of ``ResultLog.record`` on the request path (p50/p99)
+``write``    records/s committed by the background writer, and bytes/record
+``query``    ``ResultStore.students_with`` for a university in the Target
+             bucket, as the log grows (p50 over ``--queries`` universities):
+             all matches, and the first 100 (index cost without the output)
+
+    python benchmarks/bench_results.py [--records 1000000] [--pool 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+from college_predictor import load_dataset, predict  # noqa: E402
+from college_predictor.engine import build_user_profile  # noqa: E402
+from college_predictor.results import ResultLog, ResultStore  # noqa: E402
+from synthetic import BASE_WORKBOOK, synthetic_inputs  # noqa: E402
+
+CHECKPOINTS = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--records", type=int, default=1_000_000)
+    ap.add_argument("--pool", type=int, default=500)
+    ap.add_argument("--queries", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    dataset = load_dataset(BASE_WORKBOOK)
+    countries = dataset.profile_df["Country"].unique()
+    pool = []
+    for _ in range(args.pool):
+        up  = build_user_profile(**synthetic_inputs(rng))
+        sel = ("All",) if rng.random() < 0.5 else tuple(rng.choice(countries, 2, replace=False))
+        pool.append((predict(up, sel, dataset), up, sel))
+    targets = sorted({u for p, _, _ in pool for u in p.target["University"]})
+    probe = [targets[i] for i in rng.choice(len(targets), min(args.queries, len(targets)),
+                                            replace=False)]
+
+    print(f"{'records':>10} {'record p50':>11} {'record p99':>11} {'write/s':>9} "
+          f"{'B/record':>9} {'query p50':>10} {'matches':>9} {'first 100':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.sqlite")
+        log, store = ResultLog(path), ResultStore(path)
+        done = 0
+        for stop in [c for c in CHECKPOINTS if c < args.records] + [args.records]:
+            latencies = np.empty(stop - done)
+            t0 = time.perf_counter()
+            for i, j in enumerate(rng.integers(0, len(pool), stop - done)):
+                prediction, up, sel = pool[j]
+                s = time.perf_counter()
+                while not log.record(prediction, up, sel, session=f"s{done + i}", dataset=dataset):
+                    log.flush()    # the queue is full: let the writer catch up
+                latencies[i] = time.perf_counter() - s
+            log.flush()
+            elapsed = time.perf_counter() - t0
+            done = stop
+
+            size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+            times, first, matches = [], [], 0
+            for uni in probe:
+                s = time.perf_counter()
+                matches += len(store.students_with(uni, "Target"))
+                times.append(time.perf_counter() - s)
+                s = time.perf_counter()
+                store.students_with(uni, "Target", limit=100)
+                first.append(time.perf_counter() - s)
+            print(f"{done:>10,} {np.median(latencies) * 1e6:>9.1f}us "
+                  f"{np.percentile(latencies, 99) * 1e6:>9.1f}us {len(latencies) / elapsed:>9,.0f} "
+                  f"{size / done:>9.0f} {np.median(times) * 1e3:>8.1f}ms "
+                  f"{matches // len(probe):>9,} {np.median(first) * 1e3:>8.1f}ms", flush=True)
+        log.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Micro-benchmark: row-wise ``DataFrame.apply(country_score)`` vs the
+vectorised ``CountryWeights.scores`` as the number of country rows grows.
+
+    python benchmarks/bench_scoring.py [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+from college_predictor.scoring import ACAD_KEYS, ACT_KEYS, CountryWeights, FEATURE_KEYS  # noqa: E402
+
+SIZES = [13, 100, 1_000, 10_000, 100_000]
+
+
+def synthetic_profile(n, rng):
+    weights = rng.integers(0, 51, size=(n, len(FEATURE_KEYS))) * 0.005
+    df = pd.DataFrame(weights, columns=FEATURE_KEYS)
+    df.insert(0, "Country", [f"Country {i}" for i in range(n)])
+    return df
+
+
+def synthetic_user(rng):
+    # Python floats, as produced by the Streamlit number inputs
+    r = lambda lo, hi: int(rng.integers(lo, hi + 1))
+    return {
+        "Class 9": r(0, 100) / 100, "Class 10": r(0, 100) / 100,
+        "Class 11": r(0, 100) / 100, "Class 12": r(0, 100) / 100,
+        "SAT": r(400, 1600) / 1600, "AP": r(0, 50) / 50,
+        "CC": r(0, 3) / 3, "EC": r(0, 3) / 3, "Internship": r(0, 2) / 2,
+        "Community": float(r(0, 1)), "Research": float(r(0, 1)), "LOR": r(0, 3) / 3,
+    }
+
+
+def rowwise(profile_df, user_profile):
+    # The original implementation from college_predictor_app.py
+    def country_score(row):
+        total = (sum(user_profile[k] * row[k] for k in ACAD_KEYS + ACT_KEYS)
+                 + user_profile["LOR"] * row["LOR"])
+        return round(total * 100, 1)
+    return profile_df.apply(country_score, axis=1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-rows", type=int, default=max(SIZES))
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'rows':>8} {'apply ms':>10} {'vector ms':>10} {'speedup':>9}")
+    for n in [s for s in SIZES if s <= args.max_rows]:
+        profile_df   = synthetic_profile(n, rng)
+        user_profile = synthetic_user(rng)
+        weights      = CountryWeights.from_profile(profile_df)
+
+        expected = rowwise(profile_df, user_profile).to_numpy()
+        got      = weights.scores(user_profile)
+        assert np.array_equal(expected, got), "vectorised scores differ from row-wise"
+
+        number = 1 if n >= 10_000 else 10
+        t_row = min(timeit.repeat(lambda: rowwise(profile_df, user_profile),
+                                  number=number, repeat=args.repeat)) / number
+        t_vec = min(timeit.repeat(lambda: weights.scores(user_profile),
+                                  number=number * 10, repeat=args.repeat)) / (number * 10)
+        print(f"{n:>8} {t_row * 1e3:>10.3f} {t_vec * 1e3:>10.3f} {t_row / t_vec:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: ``engine.predict`` as the number of selected countries grows.
+
+For each scale (see ``synthetic.py``) and each selection size, random students
+with random country selections are predicted two ways:
+
+``mask``     ``engine.predict``: every country scored, the selection applied
+             as a boolean mask, scores passed to the index by country code
+``strings``  the previous path, kept here for reference: ``profile_df`` filtered
+             with ``isin``, a ``{country: score}`` dict, ``buckets(dict)``
+
+Both must give the same buckets; p50 latencies in milliseconds.
+
+    python benchmarks/bench_selection.py [--scales 1 10 100] [--iterations 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+from college_predictor.engine import (ALL, build_user_profile, country_score_map,  # noqa: E402
+                                      predict, select_countries)
+from synthetic import base_sheets, synthetic_dataset, synthetic_inputs  # noqa: E402
+
+SIZES = [1, 4, 16, 64, 256, 1024]
+
+
+def by_strings(dataset, up, sel):
+    country_scores = select_countries(dataset.profile_df, sel)[["Country"]].copy()
+    country_scores["Total Profile %"] = dataset.weights.score_series(up)
+    return dataset.uni_index.buckets(country_score_map(country_scores))
+
+
+def p50_ms(fn, cases):
+    times = []
+    for up, sel in cases:
+        t0 = time.perf_counter()
+        fn(up, sel)
+        times.append(time.perf_counter() - t0)
+    return np.median(times) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    ap.add_argument("--iterations", type=int, default=100)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = base_sheets()
+    print(f"{'scale':>6} {'selected':>9} {'mask ms':>9} {'strings ms':>11} {'speedup':>8}")
+    for scale in args.scales:
+        dataset = synthetic_dataset(scale, base=base)
+        countries = dataset.profile_df["Country"].unique()
+        dataset.uni_index, dataset.country_codes, dataset.country_rows   # built once, untimed
+        for n in [s for s in SIZES if s < len(countries)] + [ALL]:
+            cases = []
+            for _ in range(args.iterations):
+                up  = build_user_profile(**synthetic_inputs(rng))
+                sel = (ALL,) if n == ALL else tuple(rng.choice(countries, n, replace=False))
+                cases.append((up, sel))
+            for up, sel in cases[:5]:
+                got, want = predict(up, sel, dataset), by_strings(dataset, up, sel)
+                assert all(a.equals(b) for a, b in zip((got.ambitious, got.target, got.safe), want))
+            mask    = p50_ms(lambda up, sel: predict(up, sel, dataset), cases)
+            strings = p50_ms(lambda up, sel: by_strings(dataset, up, sel), cases)
+            label = f"all {len(countries)}" if n == ALL else n
+            print(f"{scale:>5}x {label:>9} {mask:>9.3f} {strings:>11.3f} "
+                  f"{strings / mask:>7.1f}x", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: cold start of the Streamlit entry point.
+
+Each repetition runs in a fresh interpreter, as on a new replica:
+
+``import``        importing streamlit and ``college_predictor`` (what the
+                  app's top-level imports cost before any script code runs)
+``first render``  the first script run of a new process (``AppTest``), with
+                  the workbook load and every module the page pulls in
+``rerun``         a second run in the same process, i.e. a warm rerun
+
+and reports which heavy optional modules the first render loaded.  Medians
+over ``--repeat`` processes.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--app college_predictor_app.py]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+HEAVY = ["reportlab", "pyarrow", "openpyxl", "uvicorn", "college_predictor.report",
+         "college_predictor.whatif"]
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import streamlit
+import college_predictor
+t1 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+t2 = time.perf_counter()
+at.run()
+t3 = time.perf_counter()
+loaded = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+at.run()
+t4 = time.perf_counter()
+assert not at.exception, at.exception
+print(json.dumps({"import": t1 - t0, "first render": t3 - t2, "rerun": t4 - t3,
+                  "loaded": loaded}))
+"""
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--app", default=os.path.join(ROOT, "college_predictor_app.py"))
+    args = ap.parse_args()
+
+    runs = []
+    for _ in range(args.repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE, os.path.abspath(args.app),
+                              json.dumps(HEAVY)],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    for name in ("import", "first render", "rerun"):
+        times = [r[name] * 1000 for r in runs]
+        print(f"{name:>13}: median {statistics.median(times):8.1f} ms  "
+              f"(min {min(times):.1f}, max {max(times):.1f})")
+    print(f"{'loaded':>13}: {', '.join(runs[0]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
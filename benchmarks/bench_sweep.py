@@ -0,0 +1,75 @@
+"""Benchmark: what-if sweeps (``college_predictor.sweep``).
+
+Sweeps the default grid (Class 12 x SAT x LORs x extra-curriculars) at each
+``--scales`` (see ``synthetic.py``; 0 is the real workbook) for every worker
+count and block size, and reports points/s.  Every run must write the same
+file, and ``--check`` random points are compared with ``engine.predict``.
+
+    python benchmarks/bench_sweep.py [--scales 0 10] [--workers 1 2 4] [--blocks 1024 4096]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+from college_predictor import load_dataset, predict  # noqa: E402
+from college_predictor.engine import ALL, build_user_profile  # noqa: E402
+from college_predictor.sweep import (BUCKET_SLOTS, DEFAULT_BASE, open_sweep,  # noqa: E402
+                                     sweep)
+from synthetic import BASE_WORKBOOK, base_sheets, synthetic_dataset  # noqa: E402
+
+
+def digest(path):
+    with open(path, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def spot_check(path, dataset, n, rng):
+    result = open_sweep(path)
+    names = dataset.uni_df["University"].astype(str).to_numpy()
+    for flat in rng.choice(result.slots[..., 0].size, n, replace=False):
+        at = np.unravel_index(flat, result.slots.shape[:-1])
+        inputs = {**DEFAULT_BASE, **{a: v[i] for (a, v), i in zip(result.axes.items(), at)}}
+        want = predict(build_user_profile(**inputs), (ALL,), dataset)
+        for bucket, frame in zip(BUCKET_SLOTS, (want.ambitious, want.target, want.safe)):
+            rows = result.slots[at][BUCKET_SLOTS[bucket]]
+            assert list(names[rows[rows >= 0]]) == list(frame["University"].astype(str)), at
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", type=int, nargs="+", default=[0, 10])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--blocks", type=int, nargs="+", default=[1024, 4096])
+    ap.add_argument("--check", type=int, default=50)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = base_sheets()
+    print(f"cpus: {os.cpu_count()}")
+    print(f"{'scale':>6} {'universities':>13} {'points':>9} {'workers':>8} {'block':>6} "
+          f"{'seconds':>8} {'points/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            dataset = load_dataset(BASE_WORKBOOK) if scale == 0 else synthetic_dataset(scale, base=base)
+            seen = set()
+            for workers in args.workers:
+                for block in args.blocks:
+                    path = os.path.join(tmp, f"sweep-{scale}-{workers}-{block}.npy")
+                    stats = sweep(path, dataset=dataset, workers=workers, block=block)
+                    seen.add(digest(path))
+                    print(f"{scale or 'real':>6} {stats['universities']:>13,} "
+                          f"{stats['points']:>9,} {workers:>8} {block:>6} "
+                          f"{stats['seconds']:>8.2f} {stats['points_per_second']:>10,.0f}",
+                          flush=True)
+            assert len(seen) == 1, "sweeps differ between worker counts / block sizes"
+            spot_check(path, dataset, args.check, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Load test: many concurrent sessions of the Streamlit app.
+
+Starts ``streamlit run college_predictor_app.py`` headless on a free local
+port, once per ``--sessions`` level, and drives that many sessions at once
+over Streamlit's own websocket protocol, exactly as browser tabs would: each
+session sends ``rerun_script`` messages carrying its widget states and waits
+for ``script_finished``.  Every session plays a typical student journey with
+random inputs and think times:
+
+``load``     open the page
+``input``    pick countries, type marks, SAT, activities and LORs (one rerun
+             per widget, as the browser reruns on every committed edit)
+``predict``  press "Find My Universities"
+``whatif``   switch on what-if mode
+``input``    change the SAT score
+``predict``  press "Find My Universities" again
+
+Reported per level: rerun latency percentiles (all reruns, and ``predict``
+alone), the server's CPU time per session and utilisation of one core, and
+its resident memory (idle after a warm-up session, peak under load, and the
+peak's growth per session).  CPU and memory come from ``/proc``, so Linux only.
+
+Results are compared with a stored baseline (``baseline_app_load.json``);
+``--check`` exits non-zero when a level's p50 regressed beyond ``--tolerance``.
+
+    python benchmarks/load_app.py [--sessions 1 4 16] [--think 0.2]
+        [--save-baseline] [--check] [--tolerance 1.5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import streamlit
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline_app_load.json")
+COUNTRIES = ["USA", "UK", "Canada", "Australia", "Germany", "Ireland", "Japan"]
+LEVELS = [1, 4, 16]
+
+FIND = "🔍 Find My Universities"
+WHAT_IF = "🔬 What-if mode"
+
+
+def journey(rng):
+    """``[(kind, {widget label: value}, pressed button label or None)]``."""
+    r = lambda lo, hi: int(rng.integers(lo, hi + 1))
+    countries = ["All"] if r(0, 1) else [str(c) for c in
+                                         rng.choice(COUNTRIES, r(1, 3), replace=False)]
+    edits = [
+        ("🌐 Choose Countries", countries),
+        ("Class 9 %", r(40, 100)), ("Class 10 %", r(40, 100)),
+        ("Class 11 %", r(40, 100)), ("Class 12 %", r(40, 100)),
+        ("SAT/ACT (400-1600)", r(400, 1600)),
+        ("Extra-curricular (0-3)", r(0, 3)), ("Number of LORs (0-3)", r(0, 3)),
+    ]
+    steps, state = [("load", {}, None)], {}
+    for label, value in edits:
+        state = {**state, label: value}
+        steps.append(("input", state, None))
+    steps.append(("predict", state, FIND))
+    state = {**state, WHAT_IF: True}
+    steps.append(("whatif", state, None))
+    state = {**state, "SAT/ACT (400-1600)": r(400, 1600)}
+    steps += [("input", state, None), ("predict", state, FIND)]
+    return steps
+
+
+# ─────────────────────────────────────────────
+# Server process
+# ─────────────────────────────────────────────
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true",
+           "--server.port", str(port), "--server.fileWatcherType", "none",
+           "--browser.gatherUsageStats", "false"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc, f"ws://127.0.0.1:{port}/_stcore/stream"
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit("streamlit exited during start-up")
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("streamlit did not become healthy within 60s")
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")   # utime + stime
+
+
+def rss_mib(pid):
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+# ─────────────────────────────────────────────
+# Sessions
+# ─────────────────────────────────────────────
+class Session:
+    """One browser tab: a websocket plus the widget ids the last run rendered."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = {}   # label -> (id, element type)
+        self.errors = 0
+
+    async def rerun(self, values, pressed=None):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        for label, value in values.items():
+            if label not in self.widgets:
+                continue            # not on the page (yet)
+            widget_id, kind = self.widgets[label]
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            if kind == "multiselect":
+                state.string_array_value.data.extend(value)
+            elif kind == "checkbox":
+                state.bool_value = bool(value)
+            else:
+                state.double_value = float(value)
+        if pressed is not None:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = self.widgets[pressed][0]
+            state.trigger_value = True
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._element(fwd.delta.new_element)
+            elif kind == "script_finished":
+                return time.perf_counter() - t0
+
+    def _element(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors += 1
+            return
+        proto = getattr(element, kind)
+        widget_id = getattr(proto, "id", "")
+        if widget_id and getattr(proto, "label", ""):
+            self.widgets[proto.label] = (widget_id, kind)
+
+
+async def play(url, steps, think, rng, latencies):
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        session = Session(ws)
+        for kind, values, pressed in steps:
+            latencies.append((kind, await session.rerun(values, pressed)))
+            await asyncio.sleep(rng.exponential(think) if think else 0)
+        return session.errors
+
+
+async def run_level(url, pid, n, think, rng):
+    latencies, peak = [], [rss_mib(pid)]
+
+    async def sample():
+        while True:
+            peak.append(rss_mib(pid))
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample())
+    cpu0, t0 = cpu_seconds(pid), time.perf_counter()
+    errors = await asyncio.gather(*(
+        play(url, journey(rng), think, np.random.default_rng(rng.integers(1 << 32)), latencies)
+        for _ in range(n)))
+    wall, cpu = time.perf_counter() - t0, cpu_seconds(pid) - cpu0
+    sampler.cancel()
+    return latencies, wall, cpu, max(peak), sum(errors)
+
+
+def measure(app, n, think, seed):
+    rng = np.random.default_rng(seed)
+    proc, url = start_server(app)
+    try:
+        # One untimed session pays the imports and the workbook load
+        asyncio.run(run_level(url, proc.pid, 1, 0, rng))
+        time.sleep(0.5)
+        idle = rss_mib(proc.pid)
+        latencies, wall, cpu, peak, errors = asyncio.run(run_level(url, proc.pid, n, think, rng))
+    finally:
+        proc.terminate()
+        proc.wait()
+    everything = np.array([t for _, t in latencies]) * 1000
+    predicts = np.array([t for kind, t in latencies if kind == "predict"]) * 1000
+    p50, p90, p99 = np.percentile(everything, [50, 90, 99])
+    return {
+        "reruns": len(everything), "errors": errors,
+        "p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": everything.max(),
+        "predict_p50_ms": np.percentile(predicts, 50),
+        "predict_p99_ms": np.percentile(predicts, 99),
+        "cpu_s_per_session": cpu / n, "cpu_utilisation": cpu / wall,
+        "rss_idle_mib": idle, "rss_peak_mib": peak, "mib_per_session": (peak - idle) / n,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sessions", type=int, nargs="+", default=LEVELS)
+    ap.add_argument("--think", type=float, default=0.2,
+                    help="mean seconds between a session's reruns (exponential)")
+    ap.add_argument("--app", default=os.path.join(ROOT, "college_predictor_app.py"))
+    ap.add_argument("--seed", type=int, default=5)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true",
+                    help="exit 1 if any level's p50 regressed beyond --tolerance")
+    ap.add_argument("--tolerance", type=float, default=1.5)
+    args = ap.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+
+    results, regressions = {}, []
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'predict p50':>12} {'predict p99':>12} {'cpu s/sess':>11} {'cpu %':>6} "
+          f"{'idle MiB':>9} {'peak MiB':>9} {'MiB/sess':>9} {'vs base':>8}")
+    for n in args.sessions:
+        r = measure(os.path.abspath(args.app), n, args.think, args.seed)
+        results[str(n)] = r
+        ref = baseline.get(str(n))
+        ratio = r["p50_ms"] / ref["p50_ms"] if ref else None
+        if ratio is not None and ratio > args.tolerance:
+            regressions.append((n, ratio))
+        print(f"{n:>8} {r['reruns']:>7} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['predict_p50_ms']:>12.1f} {r['predict_p99_ms']:>12.1f} "
+              f"{r['cpu_s_per_session']:>11.2f} {r['cpu_utilisation'] * 100:>5.0f}% "
+              f"{r['rss_idle_mib']:>9.1f} {r['rss_peak_mib']:>9.1f} "
+              f"{r['mib_per_session']:>9.2f} {f'{ratio:.2f}x' if ratio else '-':>8}", flush=True)
+        if r["errors"]:
+            print(f"  {r['errors']} reruns raised an exception", file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "cpus": os.cpu_count(), "streamlit": streamlit.__version__,
+                       "think_s": args.think, "results": results}, fh, indent=1, sort_keys=True)
+            fh.write("\n")
+        print(f"baseline written to {args.baseline}")
+    for n, ratio in regressions:
+        print(f"REGRESSION {n} sessions: p50 {ratio:.2f}x baseline", file=sys.stderr)
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Load test: latency percentiles and throughput of the prediction service.
+
+Starts ``python -m college_predictor serve`` on a free local port (or targets
+``--url``), then drives ``POST /predict`` from ``--concurrency`` keep-alive
+connections with random form inputs.  ``--distinct`` profiles are cycled, so a
+small value exercises the workers' prediction memo and a large one the cold
+path.
+
+    python benchmarks/load_service.py [--requests 5000] [--concurrency 16]
+        [--workers 4] [--distinct 500] [--url http://127.0.0.1:8000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+COUNTRIES = ["USA", "UK", "Canada", "Australia", "Germany", "Ireland", "Japan"]
+
+
+def synthetic_requests(n, rng):
+    bodies = []
+    for _ in range(n):
+        r = lambda lo, hi: int(rng.integers(lo, hi + 1))
+        body = {
+            "class9": r(40, 100), "class10": r(40, 100),
+            "class11": r(40, 100), "class12": r(40, 100), "sat": r(400, 1600),
+            "ap_scores": [r(0, 50) / 10 for _ in range(r(0, 5))],
+            "cc": r(0, 3), "ec": r(0, 3), "internships": r(0, 2),
+            "community": bool(r(0, 1)), "research": bool(r(0, 1)), "n_lor": r(0, 3),
+        }
+        if r(0, 1):
+            body["countries"] = [str(c) for c in
+                                 rng.choice(COUNTRIES, r(1, 3), replace=False)]
+        bodies.append(json.dumps(body).encode())
+    return bodies
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "college_predictor", "serve", "--port", str(port)]
+    if workers is not None:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1):
+                return proc, url
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit("server exited during start-up")
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("server did not become healthy within 60s")
+
+
+async def _client(host, port, path, bodies, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            t0 = time.perf_counter()
+            writer.write(request)
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.partition(b":")
+                if name.lower() == b"content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            statuses.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(url, bodies, concurrency):
+    parts = urlsplit(url)
+    latencies, statuses = [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _client(parts.hostname, parts.port or 80, "/predict",
+                bodies[i::concurrency], latencies, statuses)
+        for i in range(concurrency)))
+    return time.perf_counter() - t0, np.array(latencies), statuses
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--requests", type=int, default=5_000)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--workers", type=int, default=None, help="service worker processes")
+    ap.add_argument("--distinct", type=int, default=500, help="distinct request bodies")
+    ap.add_argument("--warmup", type=int, default=200)
+    ap.add_argument("--url", help="target a running service instead of starting one")
+    args = ap.parse_args()
+
+    rng    = np.random.default_rng(11)
+    pool   = synthetic_requests(args.distinct, rng)
+    bodies = [pool[i % len(pool)] for i in range(args.requests)]
+    proc, url = (None, args.url) if args.url else start_server(args.workers)
+    try:
+        asyncio.run(run_load(url, pool[:args.warmup], args.concurrency))
+        elapsed, lat, statuses = asyncio.run(run_load(url, bodies, args.concurrency))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    errors = sum(s != 200 for s in statuses)
+    p50, p90, p99 = np.percentile(lat, [50, 90, 99]) * 1000
+    print(f"{len(lat)} requests, concurrency {args.concurrency}, "
+          f"{args.distinct} distinct bodies, {errors} non-200")
+    print(f"throughput {len(lat) / elapsed:,.0f} req/s")
+    print(f"latency ms  p50 {p50:.2f}  p90 {p90:.2f}  p99 {p99:.2f}  max {lat.max() * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    main()
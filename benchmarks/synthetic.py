@@ -0,0 +1,80 @@
+"""Synthetic workbooks shaped like the shipped ``College Finder UG New.xlsx``.
+
+``synthetic_sheets(scale)`` returns raw ``College_Finder`` and ``University``
+sheets (same headers as the workbook, before normalisation) with ``scale``
+times as many countries and universities.  Every synthetic country is a
+jittered copy of a real one: weights are perturbed and re-rounded to the
+sheet's 0.005 grid, and its universities follow the real country's required
+scores (with integer noise, so ties stay common) and QS ranks.  A small share
+of required scores is left blank, as the data-entry team sometimes does.
+
+    from synthetic import synthetic_dataset
+    dataset = synthetic_dataset(100)      # 1,300 countries, 16,100 universities
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+from college_predictor.data import (EXCEL_PATH, PROFILE_SHEET, UNI_SHEET, Dataset,  # noqa: E402
+                                    normalise_profile, normalise_uni)
+
+BASE_WORKBOOK = os.path.join(os.path.dirname(__file__), os.pardir, EXCEL_PATH)
+BLANK_REQUIRED = 0.005
+
+
+def base_sheets():
+    sheets = pd.read_excel(BASE_WORKBOOK, sheet_name=[PROFILE_SHEET, UNI_SHEET])
+    return sheets[PROFILE_SHEET], sheets[UNI_SHEET]
+
+
+def synthetic_sheets(scale, seed=0, base=None):
+    """Raw ``(College_Finder, University)`` sheets at ``scale`` x the base size."""
+    rng = np.random.default_rng(seed)
+    profile, uni = base if base is not None else base_sheets()
+    weight_cols = profile.columns[1:]
+
+    copies = []
+    for k in range(scale):
+        p = profile.copy()
+        if k:
+            jitter = rng.uniform(0.8, 1.2, size=(len(p), len(weight_cols)))
+            p[weight_cols] = np.round(p[weight_cols].to_numpy() * jitter / 0.005) * 0.005
+            p["Country"] = p["Country"] + f" {k}"
+        copies.append(p)
+    profile_out = pd.concat(copies, ignore_index=True)
+
+    copies = []
+    for k in range(scale):
+        u = uni.copy()
+        if k:
+            u["Country"]    = u["Country"] + f" {k}"
+            u["University"] = u["University"] + f" ({k})"
+            u["QS Ranking"] = rng.integers(1, 1500, len(u))
+            req = u["Required Profile Score"].to_numpy(dtype=np.float64)
+            req = np.clip(req + rng.integers(-4, 5, len(u)), 30, 100)
+            req[rng.random(len(u)) < BLANK_REQUIRED] = np.nan
+            u["Required Profile Score"] = req
+        copies.append(u)
+    uni_out = pd.concat(copies, ignore_index=True)
+    return profile_out, uni_out
+
+
+def synthetic_dataset(scale, seed=0, base=None):
+    """A normalised ``Dataset`` built from ``synthetic_sheets``."""
+    profile, uni = synthetic_sheets(scale, seed, base)
+    return Dataset(normalise_profile(profile), normalise_uni(uni),
+                   path=f"<synthetic x{scale}>", content_hash=f"synthetic-{scale}-{seed}",
+                   source="synthetic")
+
+
+def synthetic_inputs(rng):
+    """Random ``build_user_profile`` keyword arguments, as the form would give."""
+    r = lambda lo, hi: int(rng.integers(lo, hi + 1))
+    return dict(class9=r(40, 100), class10=r(40, 100), class11=r(40, 100),
+                class12=r(40, 100), sat=r(400, 1600),
+                ap_scores=[r(0, 50) / 10 for _ in range(r(0, 5))],
+                cc=r(0, 3), ec=r(0, 3), internships=r(0, 2),
+                community=bool(r(0, 1)), research=bool(r(0, 1)), n_lor=r(0, 3))
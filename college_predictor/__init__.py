@@ -0,0 +1,36 @@
+"""Prediction core for the Yocket University Readiness Assessment app."""
+from .cache import (
+    LRUCache,
+    PredictionCache,
+    cached_predict,
+    prediction_cache_stats,
+    profile_key,
+)
+from .data import (
+    EXCEL_PATH,
+    NUM_COLS_PROFILE,
+    Dataset,
+    WorkbookCache,
+    load_dataset,
+    load_stats,
+    read_dataset,
+    read_workbook,
+)
+from .engine import (
+    BUCKET_OFFSETS,
+    GAP_COLS,
+    Prediction,
+    bucket_universities,
+    build_user_profile,
+    code_scores,
+    country_score_map,
+    find_anchor,
+    gap_analysis,
+    nearest_universities,
+    predict,
+    score_countries,
+    selection_mask,
+    top_universities_by_qs,
+)
+from .scoring import ACAD_KEYS, ACT_KEYS, FEATURE_KEYS, CountryWeights, round1
+from .snapshot import read_snapshot, snapshot_path, write_snapshot
@@ -0,0 +1,25 @@
+"""Command-line entry point: ``python -m college_predictor <command> ...``."""
+import importlib
+import sys
+
+COMMANDS = {
+    "batch":    "college_predictor.batch",
+    "ingest":   "college_predictor.ingest",
+    "report":   "college_predictor.report",
+    "results":  "college_predictor.results",
+    "serve":    "college_predictor.service",
+    "snapshot": "college_predictor.snapshot",
+    "sweep":    "college_predictor.sweep",
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: python -m college_predictor {{{','.join(COMMANDS)}}} ...", file=sys.stderr)
+        return 2
+    return importlib.import_module(COMMANDS[argv[0]]).main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Batch predictions for whole cohorts of students.
+
+Takes a CSV or Parquet file with one student per row, using the same inputs
+as the Streamlit form, and produces per-student country scores, the university
+gap analysis and the Ambitious/Target/Safe buckets.  Each chunk of students is
+scored with one ``students x weights`` product and joined to the universities
+through integer country codes, so nothing loops over students or universities
+in Python.  Input is read and output written chunk by chunk, so memory stays
+flat regardless of cohort size (it grows with ``chunk_size x universities``).
+
+Input columns (missing ones take the form's defaults):
+
+========================  ==================================================
+``Student ID``            optional; defaults to the row number
+``Class 9`` .. ``Class 12``  percentages, 0-100
+``SAT``                   400-1600
+``AP1`` .. ``AP5``        AP scores 0-5; blank means the AP was not taken
+``CC``, ``EC``            counts, 0-3
+``Internship``            count, 0-2
+``Community``, ``Research``  0/1
+``LOR``                   count, 0-3
+``Countries``             ``;``-separated country names; blank or ``All``
+                          selects every country
+========================  ==================================================
+
+Usage::
+
+    python -m college_predictor batch students.csv --out buckets.csv \\
+        [--scores scores.csv] [--gaps gaps.parquet] [--top-qs top.csv [--top-k 10]] \\
+        [--chunk-size 1000]
+
+``--top-qs`` lists each student's best QS-ranked universities already within
+reach, from the dataset's university index (one index query per student).
+Every output row carries the ``Dataset Version`` it was predicted from.
+
+Parquet input/output needs ``pyarrow``.
+"""
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .data import EXCEL_PATH, load_dataset, map_country
+from .engine import BUCKET_OFFSETS, GAP_COLS, code_scores
+from .scoring import FEATURE_KEYS, round1, weighted_totals
+
+STUDENT_ID = "Student ID"
+VERSION    = "Dataset Version"
+AP_COLS    = [f"AP{i}" for i in range(1, 6)]
+
+
+@dataclass
+class BatchResult:
+    scores: pd.DataFrame    # Student ID, Country, Total Profile %
+    buckets: pd.DataFrame   # Student ID, Bucket, Gap Rank + GAP_COLS
+    gaps: pd.DataFrame      # Student ID, Gap Rank + GAP_COLS (only if requested)
+    n_students: int
+    top_qs: pd.DataFrame = None   # Student ID, QS Pick + GAP_COLS (only if requested)
+    dataset_version: str = None   # Dataset.version the chunk was predicted from
+
+    def output(self, name):
+        """The ``name`` table with a ``Dataset Version`` column, as written to files."""
+        return getattr(self, name).assign(**{VERSION: self.dataset_version})
+
+
+# ─────────────────────────────────────────────
+# Inputs
+# ─────────────────────────────────────────────
+def _col(df, name, default=0.0):
+    if name not in df.columns:
+        return np.full(len(df), default, dtype=np.float64)
+    return pd.to_numeric(df[name], errors="coerce").fillna(default).to_numpy(dtype=np.float64)
+
+
+def user_matrix(students):
+    """Normalise raw form inputs to an ``(n_students, len(FEATURE_KEYS))`` matrix,
+    row-wise identical to ``engine.build_user_profile``."""
+    ap_sum = np.zeros(len(students))
+    n_ap   = np.zeros(len(students))
+    for col in AP_COLS:
+        if col in students.columns:
+            score = pd.to_numeric(students[col], errors="coerce").to_numpy(dtype=np.float64)
+            taken = ~np.isnan(score)
+            ap_sum += np.where(taken, score, 0.0)
+            n_ap   += taken
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_ap = np.where(n_ap > 0, ap_sum / (n_ap * 5), 0.0)
+
+    features = {
+        "Class 9":  _col(students, "Class 9") / 100,
+        "Class 10": _col(students, "Class 10") / 100,
+        "Class 11": _col(students, "Class 11") / 100,
+        "Class 12": _col(students, "Class 12") / 100,
+        "SAT":      _col(students, "SAT", 400) / 1600,
+        "AP":       avg_ap,
+        "CC":       _col(students, "CC") / 3,
+        "EC":       _col(students, "EC") / 3,
+        "Internship": _col(students, "Internship") / 2,
+        "Community":  (_col(students, "Community") != 0).astype(np.float64),
+        "Research":   (_col(students, "Research") != 0).astype(np.float64),
+        "LOR":      _col(students, "LOR") / 3,
+    }
+    return np.column_stack([features[k] for k in FEATURE_KEYS])
+
+
+def selection_mask(students, countries):
+    """Boolean ``(n_students, n_countries)`` mask of each student's countries."""
+    if "Countries" not in students.columns:
+        return np.ones((len(students), len(countries)), dtype=bool)
+    code = {c: i for i, c in enumerate(countries)}
+    mask = np.zeros((len(students), len(countries)), dtype=bool)
+    for row, value in enumerate(students["Countries"].fillna("All").astype(str)):
+        names = [c.strip() for c in value.split(";") if c.strip()]
+        if not names or "All" in names:
+            mask[row] = True
+        else:
+            mask[row, [code[c] for c in names if c in code]] = True
+    return mask
+
+
+# ─────────────────────────────────────────────
+# Scoring + bucketing
+# ─────────────────────────────────────────────
+def _uni_codes(uni_df, countries):
+    # dict(zip(...)) semantics: a duplicated country name maps to its last row
+    last = {c: i for i, c in enumerate(countries)}
+    codes = map_country(uni_df["Country"], last)
+    return np.where(np.isnan(codes), -1, codes).astype(np.int64)
+
+
+def top_qs_frame(ids, scores, selected, dataset, k=10, max_gap=0.0):
+    """Each student's ``k`` best QS-ranked universities with a gap of at most
+    ``max_gap`` (``UniversityIndex.top_by_qs``)."""
+    frames = []
+    for sid, row, sel in zip(ids, scores, selected):
+        picks = dataset.uni_index.top_by_qs(code_scores(dataset, sel, row[sel]), k, max_gap)
+        picks.insert(0, STUDENT_ID, sid)
+        picks.insert(1, "QS Pick", np.arange(1, len(picks) + 1))
+        frames.append(picks)
+    if not frames:
+        return pd.DataFrame(columns=[STUDENT_ID, "QS Pick"] + GAP_COLS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def predict_frame(students, dataset=None, include_gaps=False, top_qs=0):
+    """Predict one in-memory chunk of students (``top_qs``: picks per student)."""
+    dataset   = dataset or load_dataset(EXCEL_PATH)
+    weights   = dataset.weights
+    uni_df    = dataset.uni_df
+    ids       = (students[STUDENT_ID].to_numpy() if STUDENT_ID in students.columns
+                 else students.index.to_numpy())
+    n, n_uni  = len(students), len(uni_df)
+
+    scores   = round1(weighted_totals(user_matrix(students), weights.matrix) * 100)
+    selected = selection_mask(students, weights.countries)
+
+    # Join countries -> universities by integer code
+    codes    = _uni_codes(uni_df, weights.countries)
+    has_code = codes >= 0
+    safe_idx = np.where(has_code, codes, 0)
+    uni_score = scores[:, safe_idx]                                  # (n, n_uni)
+    in_view   = has_code[None, :] & selected[:, safe_idx]
+    required  = uni_df["Required Profile Score"].to_numpy(dtype=np.float64)
+    gap       = np.round(required[None, :] - uni_score, 1)
+
+    # Same order as sort_values("Gap %", ascending=False, kind="stable"):
+    # descending gap, NaN gaps last, rows outside the view after everything.
+    key   = np.where(in_view, np.where(np.isnan(gap), np.inf, -gap), np.nan)
+    order = np.argsort(key, axis=1, kind="stable")
+    n_view     = in_view.sum(axis=1)
+    sorted_gap = np.take_along_axis(gap, order, axis=1)
+    rank       = np.arange(n_uni)
+    sorted_gap[rank[None, :] >= n_view[:, None]] = np.nan
+
+    # Anchor: first row with the smallest positive gap, else smallest |gap|
+    # (which, with no positive gaps, is the first row).
+    pos   = sorted_gap > 0
+    n_pos = pos.sum(axis=1)
+    last_pos = np.take_along_axis(sorted_gap, np.maximum(n_pos - 1, 0)[:, None], axis=1)
+    anchor   = np.where(n_pos > 0, np.argmax(sorted_gap == last_pos, axis=1), 0)
+    has_anchor = (n_pos > 0) | ~np.isnan(sorted_gap[:, :1]).all(axis=1)
+
+    rows, positions, labels = [], [], []
+    for bucket, offsets in BUCKET_OFFSETS.items():
+        at = anchor[:, None] + np.array(offsets)[None, :]
+        ok = has_anchor[:, None] & (at >= 0) & (at < n_view[:, None])
+        s, k = np.nonzero(ok)
+        rows.append(s)
+        positions.append(at[s, k])
+        labels.append(np.full(len(s), bucket, dtype=object))
+    rows, positions, labels = map(np.concatenate, (rows, positions, labels))
+    by_rank = np.lexsort((positions, rows))
+
+    def gap_frame(student_rows, positions):
+        uni_rows = order[student_rows, positions]
+        frame = uni_df.iloc[uni_rows][["Country","University","QS Ranking",
+                                       "Required Profile Score"]].reset_index(drop=True)
+        frame.insert(0, STUDENT_ID, ids[student_rows])
+        frame.insert(1, "Gap Rank", positions + 1)
+        frame["Your Profile %"] = uni_score[student_rows, uni_rows]
+        frame["Gap %"]          = gap[student_rows, uni_rows]
+        return frame
+
+    buckets = gap_frame(rows[by_rank], positions[by_rank])
+    buckets.insert(1, "Bucket", labels[by_rank])
+
+    s, c = np.nonzero(selected)
+    score_df = pd.DataFrame({
+        STUDENT_ID: ids[s],
+        "Country": weights.countries[c],
+        "Total Profile %": scores[s, c],
+    })
+
+    if include_gaps:
+        s, p = np.nonzero(rank[None, :] < n_view[:, None])
+        gaps = gap_frame(s, p)[[STUDENT_ID, "Gap Rank"] + GAP_COLS]
+    else:
+        gaps = pd.DataFrame(columns=[STUDENT_ID, "Gap Rank"] + GAP_COLS)
+    top = top_qs_frame(ids, scores, selected, dataset, top_qs) if top_qs else None
+    return BatchResult(score_df, buckets, gaps, n, top, dataset.version)
+
+
+# ─────────────────────────────────────────────
+# Streaming file I/O
+# ─────────────────────────────────────────────
+def _is_parquet(path):
+    return os.fspath(path).lower().endswith((".parquet", ".pq"))
+
+
+def read_students(path, chunk_size=1000):
+    """Yield DataFrame chunks of a CSV or Parquet student file."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Append DataFrame chunks to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path    = path
+        self._writer = None
+        self._first  = True
+
+    def write(self, df):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a",
+                      header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def predict_file(path, chunk_size=1000, dataset=None, include_gaps=False, top_qs=0):
+    """Yield a ``BatchResult`` per chunk of the student file."""
+    dataset = dataset or load_dataset(EXCEL_PATH)
+    offset = 0
+    for chunk in read_students(path, chunk_size):
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield predict_frame(chunk, dataset, include_gaps, top_qs)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="python -m college_predictor batch",
+        description="Ambitious/Target/Safe predictions for a file of students.")
+    ap.add_argument("students", help="CSV or Parquet file, one student per row")
+    ap.add_argument("--out", required=True, help="bucket output (.csv or .parquet)")
+    ap.add_argument("--scores", help="optional country-score output")
+    ap.add_argument("--gaps", help="optional full gap-analysis output")
+    ap.add_argument("--top-qs", help="optional output of the best QS-ranked universities "
+                                     "within reach")
+    ap.add_argument("--top-k", type=int, default=10, help="universities per student in --top-qs")
+    ap.add_argument("--workbook", default=EXCEL_PATH,
+                    help="xlsx workbook or ingest store directory")
+    ap.add_argument("--chunk-size", type=int, default=1000)
+    args = ap.parse_args(argv)
+
+    dataset = load_dataset(args.workbook)
+    writers = {name: ChunkWriter(path) for name, path in
+               (("buckets", args.out), ("scores", args.scores), ("gaps", args.gaps),
+                ("top_qs", args.top_qs)) if path}
+    n = 0
+    try:
+        for result in predict_file(args.students, args.chunk_size, dataset,
+                                   include_gaps="gaps" in writers,
+                                   top_qs=args.top_k if "top_qs" in writers else 0):
+            for name, writer in writers.items():
+                writer.write(result.output(name))
+            n += result.n_students
+    finally:
+        for writer in writers.values():
+            writer.close()
+    print(f"Predicted {n} students -> {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Process-wide memo of full predictions.
+
+Form inputs are small integers and percentages, so many students submit
+exactly the same profile and country selection.  Results are memoised in a
+bounded LRU with a time-to-live, keyed on a canonical hash of the normalised
+profile and the selection, and shared by every Streamlit session in the
+process.  The memo is tied to the workbook's content hash and is cleared as
+soon as a newer workbook version is loaded; sessions still holding an older
+version are served uncached, so the memo never keeps a retired version alive.
+
+Cached ``Prediction`` objects are shared between callers and must be treated
+as read-only.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from .data import EXCEL_PATH, load_dataset
+from .engine import ALL, predict
+from .scoring import user_vector
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with an optional per-entry time-to-live."""
+
+    def __init__(self, maxsize=4096, ttl=3600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self._clock  = clock
+        self._lock   = threading.Lock()
+        self._data   = OrderedDict()   # key -> (expires_at, value)
+        self._stats  = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._stats["misses"] += 1
+                return default
+            if self.ttl is not None and item[0] <= self._clock():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            expires = self._clock() + self.ttl if self.ttl is not None else None
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._data), maxsize=self.maxsize)
+
+
+def profile_key(user_profile, sel=(ALL,)):
+    """Canonical hash of a normalised profile and a country selection.
+
+    The profile is hashed by the exact float64 bytes of its feature vector, so
+    only profiles that score identically share a key; the selection is order-
+    and duplicate-insensitive, and anything containing "All" is just "All".
+    """
+    countries = (ALL,) if ALL in sel else tuple(sorted(set(sel)))
+    h = hashlib.sha256(user_vector(user_profile).tobytes())
+    h.update("\x1f".join(countries).encode())
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """``predict`` memoised per workbook version."""
+
+    def __init__(self, maxsize=4096, ttl=3600.0):
+        self._cache = LRUCache(maxsize, ttl)
+        self._lock  = threading.Lock()
+        self._content_hash = None
+        self._generation = 0
+        self._invalidations = 0
+
+    def _check_dataset(self, dataset):
+        # True if results for ``dataset`` may be memoised
+        with self._lock:
+            if dataset.content_hash == self._content_hash:
+                return True
+            if dataset.generation < self._generation:
+                return False   # a version older than the memo's
+            if self._content_hash is not None:
+                self._invalidations += 1
+            self._cache.clear()
+            self._content_hash = dataset.content_hash
+            self._generation = dataset.generation
+            return True
+
+    def predict(self, user_profile, sel=(ALL,), dataset=None, compute=None):
+        """Memoised prediction; on a miss ``compute(user_profile, sel)`` (default
+        ``engine.predict`` on ``dataset``) produces the result."""
+        dataset = dataset or load_dataset(EXCEL_PATH)
+        if not self._check_dataset(dataset):
+            return (compute(user_profile, sel) if compute is not None
+                    else predict(user_profile, sel, dataset))
+        key = (dataset.content_hash, profile_key(user_profile, sel))
+        result = self._cache.get(key)
+        if result is None:
+            result = (compute(user_profile, sel) if compute is not None
+                      else predict(user_profile, sel, dataset))
+            self._cache.put(key, result)
+        return result
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return dict(self._cache.stats(), invalidations=self._invalidations)
+
+
+_predictions = PredictionCache()
+
+
+def cached_predict(user_profile, sel=(ALL,), dataset=None, compute=None):
+    """``engine.predict`` served from the process-wide memo when possible."""
+    return _predictions.predict(user_profile, sel, dataset, compute)
+
+
+def prediction_cache_stats():
+    """Hit/miss/eviction counters of the process-wide prediction memo."""
+    return _predictions.stats()
@@ -0,0 +1,37 @@
+"""HTML for the university cards on the results page.
+
+A whole bucket is rendered as one CSS-grid block, so the page sends a single
+element per bucket instead of a ``st.columns`` row plus one ``st.markdown``
+per university.  Cells are formatted column-wise with pandas string ops; the
+markup keeps the ``uni-card`` classes, so the page's adaptive light/dark CSS
+applies unchanged.
+"""
+import html
+
+import pandas as pd
+
+
+def _escaped(col):
+    return col.astype(str).map(html.escape)
+
+
+def _whole(col):
+    # int() of each value, '–' where missing
+    values = pd.to_numeric(col, errors="coerce")
+    out = values.dropna().astype("int64").astype(str)
+    return out.reindex(col.index, fill_value="–")
+
+
+def cards_html(df, colour):
+    """One ``<div class='uni-grid'>`` holding a card per row of a bucket."""
+    if df.empty:
+        return "<div class='uni-grid'></div>"
+    cards = (f"<div class='uni-card' style='border-top:4px solid {colour};'><h4>"
+             + _escaped(df["University"]) + "</h4>"
+             "<div style='font-size:.8rem;margin-bottom:.4rem;'>"
+             + _escaped(df["Country"]) + " · QS #" + _whole(df["QS Ranking"]) + "</div>"
+             "<div style='font-size:.85rem;line-height:1.35rem;'>"
+             "<strong>Required:</strong> " + _whole(df["Required Profile Score"]) + "<br>"
+             "<strong>Your score:</strong> " + df["Your Profile %"].astype(str) + "</div>"
+             "</div>")
+    return "<div class='uni-grid'>" + "".join(cards.tolist()) + "</div>"
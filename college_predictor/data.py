@@ -0,0 +1,388 @@
+"""Workbook loading for the college predictor.
+
+The workbook is parsed once per process and shared by every Streamlit session.
+It is re-read only when the file changes: a cheap ``stat`` (mtime + size) is
+done on every access, and a content hash is computed only when the stat
+differs, so touching the file without editing it does not trigger a reparse.
+
+Each parsed workbook is an immutable, versioned ``Dataset``.  Once one is
+loaded, a changed file is parsed, normalised and indexed in a background
+thread while callers keep getting the current version; the new one is then
+swapped in with a single assignment.  Nothing is mutated in place, so a
+caller holding a ``Dataset`` keeps a consistent snapshot for as long as it
+likes, and an old version is freed when its last holder lets go.
+
+When an up-to-date binary snapshot (see ``college_predictor.snapshot``) sits
+next to the workbook it is loaded instead of parsing the xlsx.  A path may
+also name a store directory written by ``college_predictor.ingest``; its
+version is the source hash recorded in its ``meta.json``, which ``ingest``
+rewrites (replacing the whole directory) on every run.
+"""
+import hashlib
+import io
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from .index import UniversityIndex
+from .scoring import CountryWeights
+from .snapshot import read_snapshot, snapshot_path
+
+EXCEL_PATH    = "College Finder UG New.xlsx"
+PROFILE_SHEET = "College_Finder"
+UNI_SHEET     = "University"
+
+NUM_COLS_PROFILE = [
+    "Class 9","Class 10","Class 11","Class 12","SAT","AP",
+    "CC","EC","Internship","Community","Research","LOR",
+]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Normalised sheets plus the fingerprint of the file they came from."""
+    profile_df: pd.DataFrame
+    uni_df: pd.DataFrame
+    path: str
+    content_hash: str
+    source: str = "xlsx"   # "xlsx", "snapshot" or "store" (see ingest)
+    generation: int = 0    # load order in this process (0: not from the cache)
+
+    @property
+    def version(self):
+        """Short content hash: the same workbook has the same version everywhere."""
+        return self.content_hash[:12]
+
+    def prepare(self):
+        """Build the lazily-derived tables now, so first requests do not pay for them."""
+        self.weights, self.uni_index, self.country_codes, self.country_rows
+        return self
+
+    @cached_property
+    def weights(self):
+        """Country weight matrix, built on first use and kept with the data."""
+        return CountryWeights.from_profile(self.profile_df)
+
+    @cached_property
+    def uni_index(self):
+        """Universities pre-sorted by required score within each country."""
+        return UniversityIndex(self.uni_df)
+
+    @cached_property
+    def country_codes(self):
+        """``uni_index`` country code of each ``profile_df`` row (-1: no universities)."""
+        return self.uni_index.codes(self.weights.countries)
+
+    @cached_property
+    def country_rows(self):
+        """``{country: profile_df row positions}``, for building selection masks."""
+        return self.profile_df.groupby("Country", sort=False).indices
+
+
+# ─────────────────────────────────────────────
+# Normalisation
+# ─────────────────────────────────────────────
+def normalise_profile(profile_df):
+    """Tidy the ``College_Finder`` sheet: short headers, numeric weights, no nan countries."""
+    profile_df = profile_df.copy()
+    profile_df.columns = profile_df.columns.str.strip()
+    profile_df.rename(columns={
+        "CC (Max 3)": "CC",
+        "EC (Max 3)": "EC",
+        "Internship (Max 2)": "Internship",
+    }, inplace=True)
+    profile_df[NUM_COLS_PROFILE] = (
+        profile_df[NUM_COLS_PROFILE].apply(pd.to_numeric, errors="coerce").fillna(0)
+    )
+    profile_df["Country"] = profile_df["Country"].astype(str).str.strip()
+    return profile_df[profile_df["Country"].str.lower() != "nan"]
+
+
+def uni_header_map(columns):
+    """``{header: canonical}`` for the score/rank headers of a ``University`` sheet.
+
+    Headers are expected already stripped; only those needing a rename appear.
+    """
+    rename_uni = {}
+    for col in columns:
+        key = col.lower().replace(" ", "")
+        if key.startswith("requiredprofile"):
+            rename_uni[col] = "Required Profile Score"
+        elif key in {"qsranking", "qsrank", "rankqs"}:
+            rename_uni[col] = "QS Ranking"
+    return rename_uni
+
+
+def normalise_uni(uni_df):
+    """Tidy the ``University`` sheet: canonical score/rank headers, numeric score."""
+    uni_df = uni_df.copy()
+    uni_df.columns = uni_df.columns.str.strip()
+    uni_df.rename(columns=uni_header_map(uni_df.columns), inplace=True)
+    uni_df["Required Profile Score"] = pd.to_numeric(
+        uni_df["Required Profile Score"], errors="coerce"
+    )
+    return compact_uni(uni_df)
+
+
+def _compact_number(s):
+    # Smallest integer dtype for whole-number columns; float32 only when every
+    # value survives the round trip, so results and their formatting are unchanged.
+    if s.dtype.kind in "iu":
+        return pd.to_numeric(s, downcast="integer")
+    if s.dtype.kind == "f":
+        values = s.to_numpy()
+        as32 = values.astype(np.float32)
+        if np.array_equal(as32.astype(values.dtype), values, equal_nan=True):
+            return s.astype(np.float32)
+    return s
+
+
+def compact_uni(uni_df):
+    """Shrink the university table for long-lived, shared use.
+
+    Country and University become categoricals (int codes plus one string
+    table), QS rank and required score the narrowest lossless numeric dtype,
+    and header-less all-blank columns are dropped.
+    """
+    junk = [c for c in uni_df.columns
+            if str(c).startswith("Unnamed:") and uni_df[c].isna().all()]
+    uni_df = uni_df.drop(columns=junk)
+    for col in ("Country", "University"):
+        uni_df[col] = uni_df[col].astype("category")
+    for col in ("QS Ranking", "Required Profile Score"):
+        if col in uni_df.columns:
+            uni_df[col] = _compact_number(uni_df[col])
+    return uni_df
+
+
+def map_country(country, mapping):
+    """``country.map(mapping)`` as a float64 array (NaN where unmapped).
+
+    For a categorical column each category is looked up once and the result
+    gathered by code, without materialising the strings.
+    """
+    if isinstance(country.dtype, pd.CategoricalDtype):
+        per_cat = np.append(
+            np.asarray(country.cat.categories.map(lambda c: mapping.get(c, np.nan)),
+                       dtype=np.float64), np.nan)
+        return per_cat[country.cat.codes.to_numpy()]   # code -1 -> trailing NaN
+    return country.map(mapping).to_numpy(dtype=np.float64)
+
+
+def read_workbook(path=EXCEL_PATH, data=None):
+    """Parse both sheets in a single pass over the file and normalise them.
+
+    ``data`` is the file's bytes when the caller already read them.
+    """
+    source = path if data is None else io.BytesIO(data)
+    sheets = pd.read_excel(source, sheet_name=[PROFILE_SHEET, UNI_SHEET])
+    return normalise_profile(sheets[PROFILE_SHEET]), normalise_uni(sheets[UNI_SHEET])
+
+
+def read_dataset(path, content_hash, data=None):
+    """Load normalised sheets for ``path``, preferring a matching snapshot.
+
+    ``data``, when given, is the workbook's bytes that ``content_hash`` was
+    computed from; they are parsed instead of reopening the file, so the
+    version always describes what was parsed.  A store directory is read as
+    is.  Returns ``(profile_df, uni_df, source)``.
+    """
+    if os.path.isdir(path):
+        store = read_snapshot(path, content_hash)
+        if store is None:
+            raise ValueError(f"{path}: not a store of version {content_hash[:12]}")
+        return store[0], store[1], "store"
+    snap = read_snapshot(snapshot_path(path), content_hash)
+    if snap is not None:
+        return snap[0], snap[1], "snapshot"
+    profile_df, uni_df = read_workbook(path, data)
+    return profile_df, uni_df, "xlsx"
+
+
+def store_hash(store_dir):
+    """Source hash an ``ingest`` store records in its ``meta.json``."""
+    with open(os.path.join(store_dir, "meta.json")) as fh:
+        return json.load(fh)["source_sha256"]
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ─────────────────────────────────────────────
+# Process-wide cache
+# ─────────────────────────────────────────────
+class WorkbookCache:
+    """Thread-safe, per-path cache of versioned datasets.
+
+    The first ``get`` of a path loads it in the caller's thread.  After that a
+    changed file is reloaded in the background (``background=True``): ``get``
+    returns the current version until the new one is parsed and indexed, then
+    every later ``get`` returns the new one.  A reload that fails (say, the
+    file was caught half-written) leaves the current version in place and is
+    retried when the file changes again, and a file that is briefly missing
+    (replaced by a non-atomic deploy) keeps the current version served.
+
+    ``stats()`` reports how often the workbook was actually parsed versus
+    served from memory, how long the parses took, how many versions were
+    swapped in, and which versions are still alive (held by some reader).
+    """
+
+    def __init__(self, reader=read_dataset, background=True):
+        self._reader  = reader
+        self._background = background
+        self._lock    = threading.Lock()      # lookups and the swap
+        self._loading = threading.Lock()      # one parse at a time
+        self._entries = {}   # abs path -> (stat key, Dataset)
+        self._pending = {}   # abs path -> reload thread
+        self._failed  = {}   # abs path -> stat key of the last failed reload
+        self._live    = []   # weakrefs to every version handed out
+        self._generations = itertools.count(1)
+        self._stats   = {
+            "loads": 0, "snapshot_loads": 0, "hits": 0, "hash_checks": 0,
+            "swaps": 0, "reload_errors": 0, "stat_errors": 0, "last_error": None,
+            "last_load_seconds": 0.0, "total_load_seconds": 0.0,
+        }
+
+    @staticmethod
+    def _stat_key(path):
+        if os.path.isdir(path):
+            path = os.path.join(path, "meta.json")   # a store: new with every ingest
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, path=EXCEL_PATH):
+        path = os.path.abspath(path)
+        try:
+            stat_key = self._stat_key(path)
+        except OSError as exc:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None:
+                    raise
+                # Mid-replace: keep serving what we have
+                self._stats["hits"] += 1
+                self._stats["stat_errors"] += 1
+                self._stats["last_error"] = f"{type(exc).__name__}: {exc}"
+                return entry[1]
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stat_key:
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None and self._background:
+                # Changed on disk: serve the current version, reload behind it
+                self._stats["hits"] += 1
+                self._start_reload(path, stat_key)
+                return entry[1]
+        # First load, or a synchronous cache: in this thread
+        return self._load(path, stat_key)
+
+    def _start_reload(self, path, stat_key):
+        # Called with the lock held
+        thread = self._pending.get(path)
+        if (thread is not None and thread.is_alive()) or self._failed.get(path) == stat_key:
+            return   # the next get after a running reload picks up any newer change
+        thread = threading.Thread(target=self._reload, args=(path, stat_key),
+                                  name="workbook-reload", daemon=True)
+        self._pending[path] = thread
+        thread.start()
+
+    def _reload(self, path, stat_key):
+        try:
+            self._load(path, stat_key)
+        except Exception as exc:   # keep serving the current version
+            with self._lock:
+                self._failed[path] = stat_key
+                self._stats["reload_errors"] += 1
+                self._stats["last_error"] = f"{type(exc).__name__}: {exc}"
+
+    def _load(self, path, stat_key):
+        # Loads are serialised; the lookup lock is only taken to read and swap
+        with self._loading:
+            with self._lock:
+                entry = self._entries.get(path)
+            if entry is not None and entry[0] == stat_key:
+                return entry[1]   # loaded while we waited
+
+            if os.path.isdir(path):
+                # read_snapshot checks the tables still belong to this hash
+                data, digest = None, store_hash(path)
+            else:
+                # Hash and parse the same bytes: a file replaced between two
+                # reads must not be stored under the other version's hash
+                with open(path, "rb") as fh:
+                    data = fh.read()
+                digest = hashlib.sha256(data).hexdigest()
+            if entry is not None:
+                with self._lock:
+                    self._stats["hash_checks"] += 1
+                    if entry[1].content_hash == digest:
+                        # Touched but not edited: keep the parsed copy.
+                        self._entries[path] = (stat_key, entry[1])
+                        self._stats["hits"] += 1
+                        return entry[1]
+
+            t0 = time.perf_counter()
+            profile_df, uni_df, source = self._reader(path, digest, data)
+            dataset = Dataset(profile_df, uni_df, path, digest, source,
+                              generation=next(self._generations)).prepare()
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self._entries[path] = (stat_key, dataset)   # the swap
+                self._live = [r for r in self._live if r() is not None] + [weakref.ref(dataset)]
+                self._stats["loads"] += 1
+                if entry is not None:
+                    self._stats["swaps"] += 1
+                if source == "snapshot":
+                    self._stats["snapshot_loads"] += 1
+                self._stats["last_load_seconds"]   = elapsed
+                self._stats["total_load_seconds"] += elapsed
+            return dataset
+
+    def wait(self, timeout=None):
+        """Block until running background reloads have finished."""
+        with self._lock:
+            threads = list(self._pending.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            live = [r() for r in self._live]
+            return dict(self._stats, live_versions=[d.version for d in live if d is not None],
+                        reloading=sum(t.is_alive() for t in self._pending.values()))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._failed.clear()
+
+
+_cache = WorkbookCache()
+
+
+def load_dataset(path=EXCEL_PATH):
+    """Return the current version of the normalised workbook (or ingest store).
+
+    Only the first call for a path parses it in the caller's thread; a later
+    change to the file is picked up in the background (see ``WorkbookCache``).
+    """
+    return _cache.get(path)
+
+
+def load_stats():
+    """Load counters and timings of the process-wide workbook cache."""
+    return _cache.stats()
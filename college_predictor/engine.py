@@ -0,0 +1,198 @@
+"""Side-effect-free prediction engine.
+
+Everything the Streamlit page, batch jobs and services need for a single
+student, with no UI imports: turn form inputs into a ``user_profile``, score
+the selected countries, compute the university gap analysis and split it into
+Ambitious/Target/Safe buckets around the anchor university.
+
+Every country is always scored in one pass; the multiselect value only becomes
+a boolean mask over the ``College_Finder`` rows, and the selected scores reach
+the university index as an array by integer country code, so the hot path does
+no DataFrame filtering or string-keyed lookups.
+"""
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from .data import EXCEL_PATH, load_dataset, map_country
+from .index import BUCKET_OFFSETS, GAP_COLS
+from .timing import stage
+
+ALL = "All"
+
+
+@dataclass(frozen=True)
+class Prediction:
+    country_scores: pd.DataFrame   # Country, Total Profile %
+    ambitious: pd.DataFrame
+    target: pd.DataFrame
+    safe: pd.DataFrame
+    uni_df: pd.DataFrame = field(repr=False)
+    # Per uni_index country code, NaN where not selected (see code_scores)
+    code_scores: np.ndarray = field(default=None, repr=False)
+    dataset_version: str = None    # Dataset.version of the workbook used
+
+    @cached_property
+    def gap_view(self):
+        """Full gap analysis (GAP_COLS, Gap % descending), built on first use."""
+        return gap_analysis(self.uni_df, self.country_scores)
+
+
+def build_user_profile(class9, class10, class11, class12, sat, ap_scores=(),
+                       cc=0, ec=0, internships=0, community=False, research=False,
+                       n_lor=0):
+    """Normalise raw form inputs (percentages, SAT 400-1600, AP scores 0-5,
+    counts) into the 0-1 ``user_profile`` the country weights apply to."""
+    n_ap = len(ap_scores)
+    return {
+        "Class 9": class9 / 100, "Class 10": class10 / 100,
+        "Class 11": class11 / 100, "Class 12": class12 / 100,
+        "SAT": sat / 1600,
+        "AP": sum(ap_scores) / (n_ap * 5) if n_ap else 0.0,
+        "CC": cc / 3, "EC": ec / 3, "Internship": internships / 2,
+        "Community": 1.0 if community else 0.0,
+        "Research": 1.0 if research else 0.0,
+        "LOR": n_lor / 3,
+    }
+
+
+def select_countries(profile_df, sel):
+    """Rows of ``profile_df`` for the multiselect value ``sel``."""
+    return profile_df if ALL in sel else profile_df[profile_df["Country"].isin(sel)]
+
+
+def selection_mask(dataset, sel=(ALL,)):
+    """Boolean mask of the ``profile_df`` rows ``select_countries`` would keep."""
+    if ALL in sel:
+        return np.ones(len(dataset.country_codes), dtype=bool)
+    mask = np.zeros(len(dataset.country_codes), dtype=bool)
+    rows = dataset.country_rows
+    for country in sel:
+        if country in rows:
+            mask[rows[country]] = True
+    return mask
+
+
+def country_frame(dataset, rows, scores):
+    """The ``country_scores`` table for ``profile_df`` rows ``rows`` (a mask or
+    positions) and their ``scores``."""
+    profile_df = dataset.profile_df
+    pos = np.flatnonzero(rows) if rows.dtype == bool else rows   # take() beats a mask here
+    return pd.DataFrame({"Country": profile_df["Country"].array.take(pos),
+                         "Total Profile %": scores}, index=profile_df.index[pos])
+
+
+def code_scores(dataset, rows, scores):
+    """``scores`` of ``profile_df`` rows ``rows`` (a mask or positions) as an
+    array by ``uni_index`` country code, NaN for countries not selected."""
+    codes = dataset.country_codes[rows]
+    by_code = np.full(len(dataset.uni_index.countries), np.nan)
+    keep = codes >= 0
+    # A duplicated country keeps its last row, as in country_score_map
+    by_code[codes[keep]] = np.asarray(scores)[keep]
+    return by_code
+
+
+def _selected_scores(dataset, user_profile, sel):
+    # (mask, scores of the masked rows); every country is scored
+    with stage("country_score"):
+        scores = dataset.weights.scores(user_profile)
+    with stage("select_countries"):
+        mask = selection_mask(dataset, sel)
+    return mask, scores[mask]
+
+
+def score_countries(dataset, user_profile, sel=(ALL,)):
+    """Total Profile % of each selected country, in sheet order."""
+    return country_frame(dataset, *_selected_scores(dataset, user_profile, sel))
+
+
+def country_score_map(country_scores):
+    """``{country: Total Profile %}`` of a score table (last duplicate wins)."""
+    return dict(zip(country_scores["Country"], country_scores["Total Profile %"]))
+
+
+def gap_analysis(uni_df, country_scores):
+    """Required-vs-achieved gap for every university in a scored country,
+    largest gap first (ties keep workbook order).
+
+    Only the scored rows are gathered from ``uni_df``; the table itself is
+    never copied.
+    """
+    score_map = country_score_map(country_scores)
+    with stage("gap_analysis", memory=True):
+        score = map_country(uni_df["Country"], score_map)
+        rows  = np.flatnonzero(~np.isnan(score))
+        score = score[rows]
+        required = uni_df["Required Profile Score"].to_numpy(dtype=np.float64)[rows]
+        gap   = np.round(required - score, 1)
+        # sort_values("Gap %", ascending=False, kind="stable"): NaN gaps last
+        order = np.argsort(np.where(np.isnan(gap), np.inf, -gap), kind="stable")
+        rows  = rows[order]
+        columns = {c: uni_df[c].array.take(rows) for c in GAP_COLS[:4]}
+        columns["Your Profile %"] = score[order]
+        columns["Gap %"]          = gap[order]
+        return pd.DataFrame(columns)
+
+
+def find_anchor(gap_view):
+    """Row of the university closest above the student's profile.
+
+    That is the smallest positive gap; if nothing is out of reach, the smallest
+    absolute gap.  Returns ``None`` when no university has a gap.
+    """
+    gaps = gap_view["Gap %"]
+    pos  = gaps > 0
+    if pos.any():
+        return gaps[pos].idxmin()
+    if gaps.notna().any():
+        return gaps.abs().idxmin()
+    return None
+
+
+def bucket_universities(gap_view):
+    """Split ``gap_view`` into ``(ambitious, target, safe)`` around the anchor."""
+    anchor = find_anchor(gap_view)
+    if anchor is None:
+        empty = gap_view.iloc[:0]
+        return empty, empty, empty
+    buckets = []
+    for offsets in BUCKET_OFFSETS.values():
+        start = max(0, anchor + offsets.start)
+        stop  = max(0, anchor + offsets.stop)
+        buckets.append(gap_view.iloc[start:stop])
+    return tuple(buckets)
+
+
+def predict(user_profile, sel=(ALL,), dataset=None):
+    """Country scores and buckets for one student.
+
+    Buckets come from the dataset's sorted university index, so the full gap
+    view is only built if ``Prediction.gap_view`` is actually used.
+    """
+    dataset = dataset or load_dataset(EXCEL_PATH)
+    mask, scores = _selected_scores(dataset, user_profile, sel)
+    by_code = code_scores(dataset, mask, scores)
+    with stage("buckets"):
+        buckets = dataset.uni_index.buckets(by_code)
+    return Prediction(country_frame(dataset, mask, scores), *buckets,
+                      uni_df=dataset.uni_df, code_scores=by_code,
+                      dataset_version=dataset.version)
+
+
+def nearest_universities(user_profile, k=10, sel=(ALL,), dataset=None):
+    """The ``k`` universities in the selected countries whose required score is
+    closest to the student's country score (``UniversityIndex.nearest``)."""
+    dataset = dataset or load_dataset(EXCEL_PATH)
+    by_code = code_scores(dataset, *_selected_scores(dataset, user_profile, sel))
+    return dataset.uni_index.nearest(by_code, k)
+
+
+def top_universities_by_qs(user_profile, k=10, max_gap=0.0, sel=(ALL,), dataset=None):
+    """The ``k`` best QS-ranked universities in the selected countries with a gap
+    of at most ``max_gap`` (``UniversityIndex.top_by_qs``)."""
+    dataset = dataset or load_dataset(EXCEL_PATH)
+    by_code = code_scores(dataset, *_selected_scores(dataset, user_profile, sel))
+    return dataset.uni_index.top_by_qs(by_code, k, max_gap)
@@ -0,0 +1,157 @@
+"""Incremental predictions for one session's successive form submissions.
+
+Streamlit reruns the whole script on every widget change, but a student
+usually nudges one field or toggles one country.  ``IncrementalPredictor``
+keeps a small dependency graph and recomputes only what an edit invalidates::
+
+    profile ─► vector ─► scores (all countries) ─┐
+                                                  ├─► selected scores ─┬─► country_scores
+    sel ─────► selection (row positions) ─────────┘                    └─► code scores ─► buckets
+
+* Inputs only bump their version when the value actually changes, so a rerun
+  with the same profile and selection recomputes nothing.
+* A selection change re-filters the already computed scores; nothing is
+  re-scored, and selecting a country the workbook lacks changes nothing.
+* A change to a few features is a rank-1 update per changed feature of the
+  unrounded totals, ``total += 100 * weight[:, k] * (new[k] - old[k])``,
+  then re-rounded.  The update can differ from the feature-order
+  accumulation of ``CountryWeights.scores`` by a few ulps, which only changes
+  the rounding of a total next to a ``.x5`` boundary; those rows are
+  recomputed exactly, so scores stay bit-identical.  Everything is rescored
+  exactly when more than ``full_threshold`` of the features changed, and
+  after ``exact_every`` updates in a row so the ulps cannot pile up.
+* The score table and buckets are rebuilt only when the selected countries'
+  scores changed (e.g. not when an edit leaves every rounded score as it was).
+
+Results are identical to ``engine.predict`` for the same inputs.
+"""
+from collections import Counter
+
+import numpy as np
+
+from .engine import ALL, Prediction, code_scores, country_frame, selection_mask
+from .scoring import round1, user_vector, weighted_totals
+
+_UNSET = object()
+# Totals whose tenths are this close to .5 are recomputed exactly after a
+# rank-1 update (its error is ~1e-13; round1 uses the same margin)
+_NEAR  = 1e-6
+
+
+class _Input:
+    def __init__(self, equal):
+        self.value   = _UNSET
+        self.version = 0
+        self._equal  = equal
+
+    def set(self, value):
+        if self.value is _UNSET or not self._equal(self.value, value):
+            self.value    = value
+            self.version += 1
+
+
+class _Node:
+    """Derived value recomputed when any dependency's version moved.
+
+    ``compute(previous, *values)`` gets its own previous value (``None`` on
+    first use) so it can update incrementally.  The version only moves when
+    ``equal`` says the new value differs, which stops no-op changes from
+    propagating further down the graph.
+    """
+
+    def __init__(self, name, compute, deps, equal, stats):
+        self.name     = name
+        self.value    = None
+        self.version  = 0
+        self._compute = compute
+        self._deps    = deps
+        self._equal   = equal
+        self._seen    = None
+        self._stats   = stats
+
+    def get(self):
+        values = [d.get() if isinstance(d, _Node) else d.value for d in self._deps]
+        seen = tuple(d.version for d in self._deps)
+        if seen != self._seen:
+            new = self._compute(self.value, *values)
+            self._stats[self.name] += 1
+            if self._seen is None or not self._equal(self.value, new):
+                self.value    = new
+                self.version += 1
+            self._seen = seen
+        return self.value
+
+
+def _same_array(a, b):
+    return np.array_equal(a, b)
+
+
+def _same_pair(a, b):
+    return np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+
+
+def _never(a, b):
+    # Terminal nodes: nothing downstream to spare, so skip the comparison
+    return False
+
+
+class IncrementalPredictor:
+    """``engine.predict`` for one stream of inputs, reusing the previous result."""
+
+    def __init__(self, dataset, full_threshold=0.5, exact_every=1000):
+        self.dataset = dataset
+        self.full_threshold = full_threshold   # rescore everything above this share of features
+        self.exact_every    = exact_every      # rank-1 updates between exact rescores
+        self.stats   = Counter()
+        self._matrix = dataset.weights.matrix
+
+        self._profile = _Input(lambda a, b: a == b)
+        self._sel     = _Input(lambda a, b: a == b)
+        node = lambda name, fn, deps, equal: _Node(name, fn, deps, equal, self.stats)
+        self._vector   = node("vector", lambda _, up: user_vector(up),
+                              [self._profile], _same_array)
+        self._totals   = node("scores", self._score, [self._vector], _same_pair)
+        self._selected = node("selection", self._select, [self._sel], _same_array)
+        self._picked   = node("selected_scores", lambda _, totals, pos: (pos, totals[1][pos]),
+                              [self._totals, self._selected], _same_pair)
+        self._frame    = node("country_scores", self._country_scores, [self._picked], _never)
+        self._codes    = node("code_scores", lambda _, picked: code_scores(dataset, *picked),
+                              [self._picked], _never)
+        self._buckets  = node("buckets", lambda _, by_code: dataset.uni_index.buckets(by_code),
+                              [self._codes], _never)
+
+    # ── node computations ──────────────────────
+    def _score(self, previous, vector):
+        # (vector, scores, unrounded totals, rank-1 updates since the last exact rescore)
+        if previous is not None and previous[3] < self.exact_every:
+            old_vector, _, old_totals, updates = previous
+            changed = np.flatnonzero(old_vector != vector)
+            if len(changed) <= self.full_threshold * len(vector):
+                totals = old_totals.copy()
+                for k in changed:
+                    totals += self._matrix[:, k] * ((vector[k] - old_vector[k]) * 100)
+                tenths = totals * 10
+                near = np.flatnonzero(np.abs(np.abs(tenths - np.trunc(tenths)) - 0.5) < _NEAR)
+                if len(near):
+                    totals[near] = weighted_totals(vector, self._matrix[near]) * 100
+                self.stats["rank1_updates"] += 1
+                self.stats["boundary_rows"] += len(near)
+                return vector, round1(totals), totals, updates + 1
+        self.stats["full_rescores"] += 1
+        totals = weighted_totals(vector, self._matrix) * 100
+        return vector, round1(totals), totals, 0
+
+    def _select(self, _, sel):
+        # Row positions of select_countries(profile_df, sel)
+        return np.flatnonzero(selection_mask(self.dataset, sel))
+
+    def _country_scores(self, _, picked):
+        return country_frame(self.dataset, *picked)
+
+    # ── public API ─────────────────────────────
+    def predict(self, user_profile, sel=(ALL,)):
+        """Same result as ``engine.predict(user_profile, sel, dataset)``."""
+        self._profile.set(dict(user_profile))
+        self._sel.set(tuple(sel))
+        return Prediction(self._frame.get(), *self._buckets.get(), uni_df=self.dataset.uni_df,
+                          code_scores=self._codes.get(), dataset_version=self.dataset.version)
@@ -0,0 +1,419 @@
+"""Per-country sorted index of universities for fast bucketing.
+
+Within one country every university's gap is ``round(required - score, 1)``
+with a single per-country score, so ordering a country's universities by
+"Required Profile Score" (descending) also orders them by gap.  The index keeps
+that order per country, built once at load time.  A request then locates the
+anchor by binary search and merges only the few rows around it, in
+``O(countries * log n + k)`` instead of sorting the whole gap view.  With
+many countries selected, the selected rows' gaps are computed in one
+vectorised pass instead, and only the rows next to the anchor are sorted.
+
+Results are identical to ``engine.bucket_universities(engine.gap_analysis(...))``:
+rows are ordered by descending gap with ties in workbook order, universities
+without a required score come last, and the row index is the position in that
+full gap view.
+
+Each country also keeps its universities in QS order, and the whole table is
+kept merged across countries in both orders, for the top-K queries:
+
+``nearest(scores, k)``         the k universities whose required score is
+                               closest to the student's, ``O(C log n + C k)``
+``top_by_qs(scores, k, g)``    the k best QS-ranked universities with a gap of
+                               at most g, scanning each country's QS order only
+                               until k rows qualify
+
+Countries are integer-coded by their position in ``countries`` (first
+appearance in the sheet).  Every query takes ``scores`` as a per-code array
+(NaN for countries not selected, see ``code_scores``), which the engine builds
+from the scores of all countries and a selection mask with no string lookups.
+A ``{country: Total Profile %}`` map is accepted too, as is one score for all
+countries, in which case the merged views answer the top-K queries without
+visiting the countries one by one.
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+GAP_COLS = ["Country","University","QS Ranking",
+            "Required Profile Score","Your Profile %","Gap %"]
+
+# Positions relative to the anchor university in the gap-sorted list
+BUCKET_OFFSETS = {
+    "Ambitious": range(-11, -5),
+    "Target":    range(-5, 1),
+    "Safe":      range(1, 7),
+}
+
+_FEW_COUNTRIES = 32   # buckets/top_by_qs visit countries one by one up to this many
+
+_BEFORE = -min(o.start for o in BUCKET_OFFSETS.values())   # rows above the anchor
+_AFTER  = max(o.stop for o in BUCKET_OFFSETS.values())     # anchor + rows below
+
+
+def _gap(required, score):
+    # Same arithmetic as Series.round(1) on the gap column
+    return np.round(required - score, 1)
+
+
+def _gap_scalar(required, score):
+    # np.round(x, 1) is rint(x * 10) / 10; the builtin round() of a float is
+    # also round-half-even, so this matches _gap at a fraction of the cost.
+    return round((required - score) * 10) / 10
+
+
+def _qs_order(qs, rows):
+    # Best QS first, unranked last, ties by workbook row
+    return np.lexsort((rows, np.where(np.isnan(qs), np.inf, qs)))
+
+
+def _count_gap_above(required, score, threshold, inclusive=False):
+    """Leading rows of a descending ``required`` run whose gap is ``> threshold``
+    (``>=`` if inclusive), by binary search."""
+    lo, hi = 0, len(required)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        g = _gap_scalar(float(required[mid]), score)
+        if g > threshold or (inclusive and g == threshold):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _nearest_window(required, score, k):
+    """``[lo, hi)`` of a descending ``required`` run holding the ``k`` rows
+    closest to ``score``: |gap| falls then rises along the run, so they lie
+    within ``k`` rows of where the gap changes sign.  The window is widened
+    to whole runs of equal gap at both ends, so ties are settled by workbook
+    row rather than by where the window was cut."""
+    at = _count_gap_above(required, score, 0.0)
+    lo, hi = max(0, at - k), min(len(required), at + k)
+    if lo < hi:
+        lo = _count_gap_above(required, score, _gap_scalar(float(required[lo]), score))
+        hi = _count_gap_above(required, score, _gap_scalar(float(required[hi - 1]), score),
+                              inclusive=True)
+    return lo, hi
+
+
+def _scan_within(rows, required, max_gap, k, score_of):
+    """First ``k`` of ``rows`` (in their order) with a gap of at most ``max_gap``,
+    scored by ``score_of(rows)``.  Checked in growing chunks, so a query
+    that finds its rows early stops early."""
+    found, n, start, step = [], 0, 0, max(4 * k, 64)
+    while start < len(rows) and n < k:
+        chunk = rows[start:start + step]
+        hit = chunk[_gap(required[chunk], score_of(chunk)) <= max_gap]
+        found.append(hit)
+        n += len(hit)
+        start += step
+        step *= 2
+    return np.concatenate(found)[:k] if found else np.array([], dtype=np.int64)
+
+
+@dataclass
+class _CountryRows:
+    required: np.ndarray    # Required Profile Score, descending, NaN excluded
+    rows: np.ndarray        # uni_df positions, same order (ties by position)
+    nan_rows: np.ndarray    # uni_df positions with no required score
+
+    def __post_init__(self):
+        # Python floats for the scalar binary searches
+        self._required = self.required.tolist()
+
+    def count_above(self, score, threshold, inclusive=False):
+        """Number of leading rows whose gap is ``> threshold`` (``>=`` if inclusive)."""
+        return _count_gap_above(self._required, score, threshold, inclusive)
+
+    def gap_at(self, i, score):
+        return _gap_scalar(self._required[i], score)
+
+    def tie_span(self, i, score):
+        """``[start, stop)`` of the rows sharing row ``i``'s gap.
+
+        Rows with equal required scores are already in workbook order, so the
+        span only matters when rounding merges different required scores.
+        """
+        g = self.gap_at(i, score)
+        start = self.count_above(score, g)
+        stop  = self.count_above(score, g, inclusive=True)
+        if self._required[start] == self._required[stop - 1]:
+            return i, i + 1
+        return start, stop
+
+    def window(self, lo, hi, score):
+        """Gaps, rows and scores for rows ``[lo, hi)``."""
+        return (_gap(self.required[lo:hi], score), self.rows[lo:hi],
+                np.full(hi - lo, score, dtype=np.float64))
+
+
+def _merge(windows):
+    """Concatenate ``(gaps, rows, scores)`` windows in gap-view order:
+    descending gap, ties by workbook row."""
+    if not windows:
+        return np.array([]), np.array([], dtype=np.int64), np.array([])
+    gaps, rows, scores = (np.concatenate(parts) for parts in zip(*windows))
+    order = np.lexsort((rows, -gaps))
+    return gaps[order], rows[order], scores[order]
+
+
+class UniversityIndex:
+    """Universities grouped by country and pre-sorted by required score and QS rank."""
+
+    def __init__(self, uni_df):
+        self.uni_df = uni_df
+        # Column arrays for building result frames without DataFrame indexing
+        self._arrays = {c: uni_df[c].array for c in GAP_COLS[:4]}
+        required = uni_df["Required Profile Score"].to_numpy(dtype=np.float64)
+        self._qs = pd.to_numeric(uni_df["QS Ranking"], errors="coerce").to_numpy(dtype=np.float64)
+        self._required = required
+        groups = uni_df.groupby("Country", sort=False).indices
+        code = np.full(len(uni_df), -1, dtype=np.int64)
+        for i, pos in enumerate(groups.values()):
+            code[pos] = i
+
+        # Merged views over every country (rows with a required score only)
+        rows = np.flatnonzero(~np.isnan(required) & (code >= 0))
+        self._by_required = rows[np.lexsort((rows, -required[rows]))]
+        self._by_qs       = rows[_qs_order(self._qs[rows], rows)]
+        self._required_desc = required[self._by_required]
+
+        # A stable regroup of the merged views by country gives each country's
+        # runs in the same orders, with no per-country sort.  The regrouped
+        # required-score view is kept whole too, for queries over many countries.
+        self._code   = code
+        self._bounds = np.searchsorted(np.sort(code[rows]), np.arange(len(groups) + 1))
+        flat         = self._by_required[np.argsort(code[self._by_required], kind="stable")]
+        self._by_qs_flat    = self._by_qs[np.argsort(code[self._by_qs], kind="stable")]
+        self._flat_rows     = flat
+        self._flat_required = required[flat]
+        # Ascending within and across countries: code, then descending required
+        top, low = (np.nanmax(required), np.nanmin(required)) if len(rows) else (0.0, 0.0)
+        self._span = top - low + 1
+        self._top  = top
+        self._flat_key = code[flat] * self._span + (top - self._flat_required)
+
+        # Rows without a required score, grouped by country the same way
+        nan_rows = np.flatnonzero(np.isnan(required) & (code >= 0))
+        self._nan_rows   = nan_rows[np.argsort(code[nan_rows], kind="stable")]
+        self._nan_bounds = np.searchsorted(code[self._nan_rows], np.arange(len(groups) + 1))
+
+        self.countries = {}
+        for i, country in enumerate(groups):
+            a, b = self._bounds[i], self._bounds[i + 1]
+            self.countries[country] = _CountryRows(
+                required=self._flat_required[a:b], rows=flat[a:b],
+                nan_rows=self._nan_rows[self._nan_bounds[i]:self._nan_bounds[i + 1]],
+            )
+        self._names = pd.Index(list(groups))
+        self._country_list = list(self.countries.values())
+
+    # ── integer country codes ──────────────────
+    def codes(self, names):
+        """Code of each country name, -1 for a country with no universities."""
+        return self._names.get_indexer(names)
+
+    def code_scores(self, score_map):
+        """A ``{country: score}`` map as a per-code array, NaN where unscored."""
+        codes, values = self._query(score_map, None)
+        scores = np.full(len(self._country_list), np.nan)
+        scores[codes] = values
+        return scores
+
+    def _gap_frame(self, rows, scores, gaps, start):
+        columns = {c: a.take(rows) for c, a in self._arrays.items()}
+        columns["Your Profile %"] = np.asarray(scores, dtype=np.float64)
+        columns["Gap %"]          = np.asarray(gaps, dtype=np.float64)
+        return pd.DataFrame(columns, index=pd.RangeIndex(start, start + len(rows)))
+
+    def buckets(self, scores):
+        """``(ambitious, target, safe)`` for per-code scores or a ``{country:
+        Total Profile %}`` map."""
+        codes, values = self._query(scores, None)
+        around = self._around_few if len(codes) <= _FEW_COUNTRIES else self._around_many
+        found = around(codes, values)
+        if found is None:
+            empty = self._gap_frame(np.array([], dtype=np.int64), [], [], 0)
+            return empty, empty, empty
+        anchor, before, after = found
+        if len(after[0]) < _AFTER:
+            # Universities without a required score follow, in workbook order
+            idx, score = _ranges(self._nan_bounds[codes], self._nan_bounds[codes + 1], values)
+            order = np.argsort(self._nan_rows[idx], kind="stable")[:_AFTER - len(after[0])]
+            after = tuple(np.concatenate([a, b]) for a, b in zip(after, (
+                np.full(len(order), np.nan), self._nan_rows[idx][order], score[order],
+            )))
+
+        gaps, rows, scores = (np.concatenate([a, b]) for a, b in zip(before, after))
+        start = anchor - len(before[0])
+        frame = self._gap_frame(rows, scores, gaps, start)
+        buckets = []
+        for offsets in BUCKET_OFFSETS.values():
+            lo = max(0, anchor + offsets.start) - start
+            hi = max(0, anchor + offsets.stop) - start
+            buckets.append(frame.iloc[lo:hi])
+        return tuple(buckets)
+
+    def _around_few(self, codes, values):
+        """``(anchor, before, after)``: the anchor's position in the gap view and
+        the ``(gaps, rows, scores)`` of up to ``_BEFORE`` rows above it and
+        ``_AFTER`` rows from it, by binary search in each country's run."""
+        sel = [(self._country_list[c], s) for c, s in zip(codes.tolist(), values.tolist())]
+
+        # Anchor gap: the smallest positive gap, else the largest gap overall
+        n_pos = [c.count_above(s, 0) for c, s in sel]
+        pos_tail = [c.gap_at(p - 1, s) for (c, s), p in zip(sel, n_pos) if p]
+        if pos_tail:
+            anchor_gap = min(pos_tail)
+        else:
+            heads = [c.gap_at(0, s) for c, s in sel if len(c.required)]
+            if not heads:
+                return None
+            anchor_gap = max(heads)
+
+        # Rows above the anchor are those with a strictly larger gap
+        above = [c.count_above(s, anchor_gap) for c, s in sel]
+        anchor = sum(above)
+
+        before, after = [], []
+        for (c, s), q in zip(sel, above):
+            if q:
+                lo = c.tie_span(max(0, q - _BEFORE), s)[0]
+                before.append(c.window(lo, q, s))
+            if q < len(c.required):
+                hi = c.tie_span(min(len(c.required), q + _AFTER) - 1, s)[1]
+                after.append(c.window(q, hi, s))
+        before = _merge(before)
+        before = tuple(a[len(before[0]) - min(anchor, _BEFORE):] for a in before)
+        after  = tuple(a[:_AFTER] for a in _merge(after))
+        return anchor, before, after
+
+    def _around_many(self, codes, values):
+        """``_around_few`` for many countries: every selected row's gap at once
+        from the regrouped view, then only the candidates next to the anchor
+        are ordered."""
+        idx, score = _ranges(self._bounds[codes], self._bounds[codes + 1], values)
+        if not len(idx):
+            return None
+        gaps = _gap(self._flat_required[idx], score)
+        rows = self._flat_rows[idx]
+        pos  = gaps > 0
+        anchor_gap = gaps[pos].min() if pos.any() else gaps.max()
+        above = gaps > anchor_gap
+        before = _edge(gaps[above], rows[above], score[above], _BEFORE, last=True)
+        after  = _edge(gaps[~above], rows[~above], score[~above], _AFTER, last=False)
+        return int(above.sum()), before, after
+
+    # ── top-K queries ──────────────────────────
+    def _query(self, scores, countries):
+        """``(codes, scores)`` arrays of the queried countries."""
+        if isinstance(scores, np.ndarray) and scores.ndim:
+            codes = np.flatnonzero(~np.isnan(scores))
+            if countries is not None:
+                codes = np.intersect1d(codes, self.codes(list(countries)))
+            return codes, scores[codes]
+        if isinstance(scores, Mapping):
+            names = list(scores) if countries is None else [c for c in countries if c in scores]
+            values = np.fromiter((scores[c] for c in names), dtype=np.float64, count=len(names))
+        else:
+            names = self._names if countries is None else list(countries)
+            values = np.full(len(names), scores, dtype=np.float64)
+        codes = self._names.get_indexer(names)
+        return codes[codes >= 0], values[codes >= 0]
+
+    def _result(self, rows, scores, key, k):
+        # Keep the first k candidates by key, ties by workbook row
+        gaps = _gap(self._required[rows], scores)
+        keys = key(rows, gaps)
+        if len(rows) > k:
+            keep = keys <= np.partition(keys, k - 1)[k - 1]
+            rows, scores, gaps, keys = rows[keep], scores[keep], gaps[keep], keys[keep]
+        order = np.lexsort((rows, keys))[:k]
+        return self._gap_frame(rows[order], scores[order], gaps[order], 0)
+
+    def nearest(self, scores, k=10, countries=None):
+        """The ``k`` universities whose required score is closest to the student's.
+
+        Ordered by absolute ``Gap %``, ties by workbook row.  ``countries``
+        limits the search (default: every country in ``scores``, or all of
+        them for a single score).  Universities without a required score are
+        never returned.
+        """
+        if countries is None and not isinstance(scores, (Mapping, np.ndarray)):
+            lo, hi = _nearest_window(self._required_desc, scores, k)
+            rows   = self._by_required[lo:hi]
+            score  = np.full(len(rows), scores, dtype=np.float64)
+            return self._result(rows, score, lambda _, gaps: np.abs(gaps), k)
+
+        # Every country at once: the k rows either side of where each country's
+        # run crosses its score, located in the regrouped view by one search
+        codes, values = self._query(scores, countries)
+        first, last = self._bounds[codes], self._bounds[codes + 1]
+        offset = np.clip(self._top - values, -0.5, self._span - 0.5)   # stay in the country
+        at = np.searchsorted(self._flat_key, codes * self._span + offset)
+        # One spare row each side absorbs float error in the composite key
+        lo, hi = np.maximum(first, at - k - 1), np.minimum(last, at + k + 1)
+        idx, score = _ranges(lo, hi, values)
+        absgap = np.abs(_gap(self._flat_required[idx], score))
+        if len(idx) > k:
+            # Only a run of gaps tied with the k-th smallest can reach past a
+            # window's edge; widen those windows to the whole run.
+            kth = np.partition(absgap, k - 1)[k - 1]
+            ends = np.cumsum(hi - lo)
+            cut_lo = (lo > first) & (absgap[np.minimum(ends - (hi - lo), len(idx) - 1)] == kth)
+            cut_hi = (hi < last) & (absgap[ends - 1] == kth)
+            for j in np.flatnonzero((cut_lo | cut_hi) & (hi > lo)):
+                rows = self._flat_required[first[j]:last[j]]
+                lo[j] = first[j] + _count_gap_above(rows, values[j], _gap_scalar(
+                    float(self._flat_required[lo[j]]), values[j]))
+                hi[j] = first[j] + _count_gap_above(rows, values[j], _gap_scalar(
+                    float(self._flat_required[hi[j] - 1]), values[j]), inclusive=True)
+            idx, score = _ranges(lo, hi, values)
+        rows = self._flat_rows[idx]
+        return self._result(rows, score, lambda _, gaps: np.abs(gaps), k)
+
+    def top_by_qs(self, scores, k=10, max_gap=0.0, countries=None):
+        """The ``k`` best QS-ranked universities with ``Gap %`` at most ``max_gap``.
+
+        With the default ``max_gap`` of 0 these are the best-ranked universities
+        the student already reaches.  Ordered by QS rank (unranked last), ties
+        by workbook row; ``countries`` as for ``nearest``.
+        """
+        qs = lambda rows, _: np.where(np.isnan(self._qs[rows]), np.inf, self._qs[rows])
+        codes, values = self._query(scores, countries)
+        if len(codes) <= _FEW_COUNTRIES:
+            # Each country's own QS run, stopping at its first k qualifying rows
+            parts = [_scan_within(self._by_qs_flat[self._bounds[c]:self._bounds[c + 1]],
+                                  self._required, max_gap, k, lambda rows, v=v: v)
+                     for c, v in zip(codes.tolist(), values.tolist())]
+            rows = np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+        else:
+            # The merged QS run, each row scored with its country's score
+            per_code = np.full(len(self._bounds), np.nan)
+            per_code[codes] = values
+            rows = _scan_within(self._by_qs, self._required, max_gap, k,
+                                lambda rows: per_code[self._code[rows]])
+        score = np.full(len(self._bounds), np.nan)
+        score[codes] = values
+        return self._result(rows, score[self._code[rows]], qs, k)
+
+
+def _edge(gaps, rows, scores, n, last):
+    """The first (``last``: final) ``n`` rows in gap-view order, sorting only
+    those that can make the cut."""
+    if len(gaps) > n:
+        kth = np.partition(gaps, n - 1)[n - 1] if last else np.partition(gaps, -n)[-n]
+        keep = gaps <= kth if last else gaps >= kth
+        gaps, rows, scores = gaps[keep], rows[keep], scores[keep]
+    order = np.lexsort((rows, -gaps))
+    order = order[max(0, len(order) - n):] if last else order[:n]
+    return gaps[order], rows[order], scores[order]
+
+
+def _ranges(lo, hi, values):
+    """Concatenated ``arange(lo[i], hi[i])`` and ``values[i]`` repeated alongside."""
+    n = hi - lo
+    idx = np.arange(n.sum()) + np.repeat(lo - (np.cumsum(n) - n), n)
+    return idx, np.repeat(values, n)
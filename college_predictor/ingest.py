@@ -0,0 +1,389 @@
+"""Streaming ingestion of university workbooks and CSV exports into a store.
+
+Several country-specific workbooks and CSV exports are merged into one store
+that ``open_store`` loads like the shipped workbook.  Sources are never read
+whole: xlsx sheets are streamed with openpyxl in read-only mode and CSVs with
+``pandas.read_csv(chunksize=...)``, ``chunk_rows`` rows at a time.  Each chunk
+gets the same header normalisation as ``normalise_uni`` (``uni_header_map``)
+and numeric coercion, is validated, and its good rows are appended to on-disk
+column spools; bad rows go to a CSV report with the reason.  The store is then
+assembled from the spools by memory-mapped copies, so peak memory is bounded
+by the chunk size plus the table of distinct country and university names,
+not by the total row count.
+
+Only the columns the engine uses (``UNI_COLS``) are kept.  A row is bad when
+its country or university is blank, its QS rank or required score is present
+but not a number, or the required score lies outside 0-100; a blank required
+score is kept, as in the workbook.
+
+Country weights come from the ``College_Finder`` sheet of the xlsx sources
+(the last row per country wins) or, if none has one, from ``--profile``.
+
+The store uses the snapshot layout (see ``college_predictor.snapshot``), with
+Country and University as categoricals and numeric columns in their narrowest
+lossless dtype, exactly as ``compact_uni`` would leave them.  Build it with::
+
+    python -m college_predictor ingest us.xlsx uk.xlsx extra.csv --out universities.store \\
+        [--bad-rows bad_rows.csv] [--profile "College Finder UG New.xlsx"] [--chunk-rows 5000]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from .data import (EXCEL_PATH, PROFILE_SHEET, UNI_SHEET, Dataset, file_hash,
+                   normalise_profile, store_hash, uni_header_map)
+from .snapshot import FORMAT_VERSION, _write_table, read_snapshot
+
+UNI_COLS     = ["Country", "University", "QS Ranking", "Required Profile Score"]
+BAD_ROW_COLS = ["Source", "Row", "Reason"] + UNI_COLS
+CHUNK_ROWS   = 5000
+
+_TEXT_COLS    = UNI_COLS[:2]
+_NUMERIC_COLS = UNI_COLS[2:]
+
+
+class SchemaError(ValueError):
+    """A source lacks one of ``UNI_COLS`` after header normalisation."""
+
+
+@dataclass
+class IngestReport:
+    rows: int = 0                  # data rows read
+    stored: int = 0
+    bad: int = 0
+    per_source: dict = field(default_factory=dict)   # path -> (rows, bad)
+    unweighted_countries: list = field(default_factory=list)   # no College_Finder row
+
+
+# ─────────────────────────────────────────────
+# Streaming readers
+# ─────────────────────────────────────────────
+def _headers(cells):
+    # Stripped header strings; blank ones named like pandas does
+    return [f"Unnamed: {i}" if c is None else str(c).strip() for i, c in enumerate(cells)]
+
+
+def _xlsx_chunks(path, sheet, chunk_rows):
+    """``(row numbers, DataFrame)`` chunks of ``sheet`` (``None``: the
+    ``University`` sheet, else the first one), streamed in read-only mode."""
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            sheet = UNI_SHEET if UNI_SHEET in wb.sheetnames else wb.sheetnames[0]
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = _headers(next(rows, ()))
+        width = len(header)
+        numbers, buf = [], []
+        for number, row in enumerate(rows, start=2):
+            if all(v is None for v in row):
+                continue
+            numbers.append(number)
+            buf.append(row[:width] + (None,) * (width - len(row)))
+            if len(buf) == chunk_rows:
+                yield numbers, pd.DataFrame(buf, columns=header, dtype=object)
+                numbers, buf = [], []
+        if buf or not numbers:
+            yield numbers, pd.DataFrame(buf, columns=header, dtype=object)
+    finally:
+        wb.close()
+
+
+def _csv_chunks(path, chunk_rows):
+    start = 2   # line 1 is the header
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=object):
+        chunk.columns = _headers(chunk.columns)
+        yield list(range(start, start + len(chunk))), chunk.reset_index(drop=True)
+        start += len(chunk)
+
+
+def _uni_chunks(path, chunk_rows):
+    if path.lower().endswith(".csv"):
+        chunks = _csv_chunks(path, chunk_rows)
+    else:
+        chunks = _xlsx_chunks(path, None, chunk_rows)
+    for numbers, chunk in chunks:
+        chunk = chunk.rename(columns=uni_header_map(chunk.columns))
+        missing = [c for c in UNI_COLS if c not in chunk.columns]
+        if missing:
+            raise SchemaError(f"{path}: no {', '.join(missing)} column "
+                              f"(headers: {', '.join(map(str, chunk.columns))})")
+        yield numbers, chunk[UNI_COLS]
+
+
+# ─────────────────────────────────────────────
+# Validation
+# ─────────────────────────────────────────────
+def _blank(s):
+    return (s.isna() | s.astype(str).str.strip().eq("")).to_numpy()
+
+
+def validate(chunk):
+    """Coerce one chunk of ``UNI_COLS`` rows and split it.
+
+    Returns ``(good, reasons)``: the good rows with stripped names (as
+    ``normalise_profile`` strips the weights' countries, so they join) and
+    numeric score and rank columns, and a reason per row (``""`` for good ones).
+    """
+    req = pd.to_numeric(chunk["Required Profile Score"], errors="coerce")
+    qs  = pd.to_numeric(chunk["QS Ranking"], errors="coerce")
+    checks = [
+        (_blank(chunk["Country"]),    "missing Country"),
+        (_blank(chunk["University"]), "missing University"),
+        (req.isna().to_numpy() & ~_blank(chunk["Required Profile Score"]),
+         "Required Profile Score is not a number"),
+        (((req < 0) | (req > 100)).to_numpy(), "Required Profile Score outside 0-100"),
+        (qs.isna().to_numpy() & ~_blank(chunk["QS Ranking"]), "QS Ranking is not a number"),
+    ]
+    reasons = np.select([c for c, _ in checks], [r for _, r in checks], default="")
+    ok = reasons == ""
+    good = pd.DataFrame({
+        "Country":    np.char.strip(chunk["Country"].to_numpy()[ok].astype(str)),
+        "University": np.char.strip(chunk["University"].to_numpy()[ok].astype(str)),
+        "QS Ranking": qs.to_numpy(dtype=np.float64)[ok],
+        "Required Profile Score": req.to_numpy(dtype=np.float64)[ok],
+    })
+    return good, reasons
+
+
+# ─────────────────────────────────────────────
+# Store
+# ─────────────────────────────────────────────
+class _ColumnSpool:
+    """Append-only raw file of one column, plus what its final dtype needs."""
+
+    def __init__(self, path, dtype):
+        self.path  = path
+        self.dtype = np.dtype(dtype)
+        self.n     = 0
+        self._fh   = open(path, "wb")
+        self.has_nan, self.integral, self.f32_lossless = False, True, True
+        self.lo, self.hi = np.inf, -np.inf
+
+    def append(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        values.tofile(self._fh)
+        self.n += len(values)
+        if self.dtype.kind == "f" and len(values):
+            finite = values[~np.isnan(values)]
+            self.has_nan |= len(finite) < len(values)
+            self.integral &= bool(np.array_equal(finite, np.trunc(finite)))
+            self.f32_lossless &= bool(np.array_equal(
+                values.astype(np.float32).astype(np.float64), values, equal_nan=True))
+            if len(finite):
+                self.lo, self.hi = min(self.lo, finite.min()), max(self.hi, finite.max())
+
+    def final_dtype(self):
+        # What _compact_number gives the whole column read by pd.read_excel
+        if self.n and self.integral and not self.has_nan:
+            return pd.to_numeric(pd.Series([self.lo, self.hi], dtype=np.int64),
+                                 downcast="integer").dtype
+        return np.dtype(np.float32 if self.n and self.f32_lossless else np.float64)
+
+    def slices(self, chunk_rows):
+        self._fh.close()
+        if not self.n:
+            return
+        data = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(self.n,))
+        for start in range(0, self.n, chunk_rows):
+            yield start, data[start:start + chunk_rows]
+
+
+class _StoreWriter:
+    """Assembles the ``uni`` table of a snapshot from validated chunks."""
+
+    def __init__(self, out_dir, chunk_rows):
+        self.out_dir    = out_dir
+        self.chunk_rows = chunk_rows
+        spool = lambda col, dtype: _ColumnSpool(os.path.join(out_dir, f"spool.{col}"), dtype)
+        self.numeric = {col: spool(col, np.float64) for col in _NUMERIC_COLS}
+        self.codes   = {col: spool(col, np.int32) for col in _TEXT_COLS}
+        self.lookup  = {col: {} for col in _TEXT_COLS}   # name -> first-seen code
+
+    def append(self, good):
+        for col in _NUMERIC_COLS:
+            self.numeric[col].append(good[col].to_numpy())
+        for col in _TEXT_COLS:
+            lookup = self.lookup[col]
+            self.codes[col].append(np.fromiter(
+                (lookup.setdefault(v, len(lookup)) for v in good[col]),
+                dtype=np.int32, count=len(good)))
+
+    def _save(self, fname, dtype, shape, columns):
+        # columns: one spool per row of the saved array (a single 1-d spool if shape is 1-d)
+        out = open_memmap(os.path.join(self.out_dir, fname), mode="w+", dtype=dtype, shape=shape)
+        target = out if len(shape) == 2 else out[None, :]
+        for i, (source, convert) in enumerate(columns):
+            for start, values in source.slices(self.chunk_rows):
+                target[i, start:start + len(values)] = convert(values)
+        out.flush()
+        del out
+
+    def finish(self):
+        """Write the table files and return its snapshot metadata."""
+        n = self.numeric[_NUMERIC_COLS[0]].n
+        meta = {"columns": UNI_COLS, "blocks": [], "categorical": [], "text": []}
+        for i, col in enumerate(_TEXT_COLS):
+            # Sorted categories, as astype("category") gives
+            names = sorted(self.lookup[col])
+            remap = np.empty(len(names), dtype=np.int32)
+            remap[np.fromiter(map(self.lookup[col].get, names), dtype=np.int32,
+                              count=len(names))] = np.arange(len(names))
+            dtype = pd.Categorical.from_codes([], names).codes.dtype if names else np.int8
+            self._save(f"uni.cat{i}.codes.npy", dtype, (n,),
+                       [(self.codes[col], lambda codes: remap[codes])])
+            width = max(map(len, names), default=1)
+            table = open_memmap(os.path.join(self.out_dir, f"uni.cat{i}.categories.npy"),
+                                mode="w+", dtype=f"<U{width}", shape=(len(names),))
+            for start in range(0, len(names), self.chunk_rows):
+                table[start:start + self.chunk_rows] = names[start:start + self.chunk_rows]
+            table.flush()
+            del table
+            meta["categorical"].append({"file": f"uni.cat{i}", "column": col, "ordered": False})
+        blocks = {}
+        for col in _NUMERIC_COLS:
+            blocks.setdefault(self.numeric[col].final_dtype().str, []).append(col)
+        for i, (dtype, cols) in enumerate(blocks.items()):
+            fname = f"uni.block{i}.npy"
+            self._save(fname, dtype, (len(cols), n),
+                       [(self.numeric[c], lambda v, d=dtype: v.astype(d)) for c in cols])
+            meta["blocks"].append({"file": fname, "dtype": dtype, "columns": cols})
+        index = open_memmap(os.path.join(self.out_dir, "uni.index.npy"), mode="w+",
+                            dtype=np.int64, shape=(n,))
+        for start in range(0, n, self.chunk_rows):
+            stop = min(start + self.chunk_rows, n)
+            index[start:stop] = np.arange(start, stop)
+        index.flush()
+        del index
+        for spool in (*self.numeric.values(), *self.codes.values()):
+            os.remove(spool.path)
+        return meta
+
+
+def _profile_table(sources, profile, chunk_rows):
+    frames = [chunk for path in sources if not path.lower().endswith(".csv")
+              for _, chunk in _xlsx_chunks_if(path, PROFILE_SHEET, chunk_rows)]
+    if not frames:
+        frames = [chunk for _, chunk in _xlsx_chunks(profile, PROFILE_SHEET, chunk_rows)]
+    profile_df = pd.concat(frames, ignore_index=True)
+    # read_only sheets report trailing empty columns that read_excel leaves out
+    profile_df = normalise_profile(profile_df.drop(columns=[
+        c for c in profile_df.columns if c.startswith("Unnamed:") and profile_df[c].isna().all()]))
+    return profile_df.drop_duplicates("Country", keep="last").reset_index(drop=True)
+
+
+def _xlsx_chunks_if(path, sheet, chunk_rows):
+    # _xlsx_chunks, or nothing when the workbook has no such sheet
+    wb = openpyxl.load_workbook(path, read_only=True)
+    present = sheet in wb.sheetnames
+    wb.close()
+    return _xlsx_chunks(path, sheet, chunk_rows) if present else ()
+
+
+def sources_hash(sources):
+    """Fingerprint of the ingested files, recorded as the store's source hash."""
+    h = hashlib.sha256()
+    for path in sources:
+        h.update(f"{os.path.basename(path)}\0{file_hash(path)}\n".encode())
+    return h.hexdigest()
+
+
+def ingest(sources, out_dir, bad_rows=None, profile=EXCEL_PATH, chunk_rows=CHUNK_ROWS):
+    """Stream ``sources`` (xlsx/CSV paths) into a store at ``out_dir``.
+
+    Bad rows are written to ``bad_rows`` (default ``<out_dir>/bad_rows.csv``).
+    The store replaces ``out_dir`` atomically once every source was read.
+    Returns an ``IngestReport``; raises ``SchemaError`` for a source without
+    the needed columns.
+    """
+    sources = [os.fspath(p) for p in sources]
+    tmp_dir = os.fspath(out_dir) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    report = IngestReport()
+    try:
+        writer = _StoreWriter(tmp_dir, chunk_rows)
+        bad_path = os.path.join(tmp_dir, "bad_rows.csv") if bad_rows is None else bad_rows
+        with open(bad_path, "w", newline="") as fh:
+            bad_out = csv.writer(fh)
+            bad_out.writerow(BAD_ROW_COLS)
+            for path in sources:
+                rows = bad = 0
+                for numbers, chunk in _uni_chunks(path, chunk_rows):
+                    good, reasons = validate(chunk)
+                    writer.append(good)
+                    for i in np.flatnonzero(reasons != ""):
+                        bad_out.writerow([path, numbers[i], reasons[i],
+                                          *("" if pd.isna(v) else v
+                                            for v in chunk.iloc[i].tolist())])
+                    rows += len(chunk)
+                    bad  += len(chunk) - len(good)
+                report.per_source[path] = (rows, bad)
+                report.rows += rows
+                report.bad  += bad
+        report.stored = report.rows - report.bad
+
+        profile_df = _profile_table(sources, profile, chunk_rows)
+        weighted = set(profile_df["Country"])
+        report.unweighted_countries = sorted(c for c in writer.lookup["Country"]
+                                             if c not in weighted)
+        meta = {"format": FORMAT_VERSION, "source_sha256": sources_hash(sources),
+                "sources": sources, "tables": {
+                    "profile": _write_table(profile_df, tmp_dir, "profile"),
+                    "uni": writer.finish()}}
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as fh:
+            json.dump(meta, fh, indent=1)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return report
+
+
+def open_store(store_dir):
+    """``Dataset`` from a store written by ``ingest``."""
+    digest = store_hash(store_dir)
+    tables = read_snapshot(store_dir, digest)
+    if tables is None:
+        raise ValueError(f"{store_dir}: not a store of snapshot format {FORMAT_VERSION}")
+    return Dataset(*tables, path=os.fspath(store_dir), content_hash=digest, source="store")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m college_predictor ingest",
+                                 description="Merge university workbooks/CSVs into a store.")
+    ap.add_argument("sources", nargs="+", help="xlsx workbooks and CSV exports")
+    ap.add_argument("--out", required=True, help="store directory to (re)create")
+    ap.add_argument("--bad-rows", help="CSV report of rejected rows "
+                                       "(default: bad_rows.csv in the store)")
+    ap.add_argument("--profile", default=EXCEL_PATH,
+                    help="workbook with the College_Finder sheet, if no source has one")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args(argv)
+
+    try:
+        report = ingest(args.sources, args.out, args.bad_rows, args.profile, args.chunk_rows)
+    except SchemaError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    for path, (rows, bad) in report.per_source.items():
+        print(f"{path}: {rows} rows, {bad} bad")
+    print(f"Wrote {report.stored} universities to {args.out!r} ({report.bad} bad rows)")
+    if report.unweighted_countries:
+        print(f"warning: no College_Finder weights for {', '.join(report.unweighted_countries)}",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,501 @@
+"""PDF reports, rendered off the request thread and cached by content.
+
+``build_pdf`` lays out the country scores, the full gap analysis and the three
+buckets with ReportLab.  Long tables (the gap analysis over thousands of
+universities) go through a fast path of page-sized tables with fixed geometry.
+``ReportRenderer`` runs it in a worker pool and
+returns a ``concurrent.futures.Future`` that the UI can poll.  Rendered bytes
+are cached under the student's profile key (``cache.profile_key``) and the
+dataset version, so identical submissions reuse the same PDF without the
+request thread building the gap analysis, and a render already in flight is
+shared rather than repeated.  A render that failed is remembered too, so it
+is reported instead of being retried on every poll.
+
+``render_cohort`` is the bulk mode: one PDF per student of a cohort file,
+scored in vectorised chunks and rendered across processes with a bounded
+number of reports in flight, written to a directory or zip as they finish
+and resumable after a crash::
+
+    python -m college_predictor report students.csv --out reports.zip [--workers 4] \\
+        [--workbook "College Finder UG New.xlsx"]
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import (PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table,
+                                TableStyle)
+from reportlab.platypus.tables import CellStyle
+
+from .batch import STUDENT_ID, predict_file
+from .cache import LRUCache, profile_key
+from .data import EXCEL_PATH, load_dataset
+from .timing import stage
+
+REPORT_TITLE = "Yocket Study-Abroad | Personalised University Report"
+
+
+# Tables longer than this are rendered in fixed-geometry, page-sized chunks
+LARGE_TABLE_ROWS = 200
+
+_MARGIN     = 30
+_ROW_HEIGHT = 18          # 10pt font, 12pt leading, 3pt top/bottom padding
+_TABLE_STYLE = TableStyle([
+    ('GRID',(0,0),(-1,-1),0.25,colors.grey),
+    ('BACKGROUND',(0,0),(-1,0),colors.lightgrey),
+    ('VALIGN',(0,0),(-1,-1),'TOP'),
+])
+# The fast path only uses non-cell commands (grid lines, header background) and
+# one CellStyle shared by every cell.  The defaults (10pt font, 12pt leading,
+# 3pt padding) exactly fill _ROW_HEIGHT, so VALIGN has nothing to do.
+_FAST_TABLE_STYLE = TableStyle([
+    ('GRID',(0,0),(-1,-1),0.25,colors.grey),
+    ('BACKGROUND',(0,0),(-1,0),colors.lightgrey),
+])
+_SHARED_CELL_STYLE = CellStyle("fast-table")
+
+
+@lru_cache(maxsize=None)
+def _styles():
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=64)
+def _col_widths(columns, page_w):
+    if 'University' in columns:
+        uni_w   = (page_w-2*_MARGIN)*0.35
+        other_w = (page_w-2*_MARGIN-uni_w)/(len(columns)-1)
+        return tuple(uni_w if c=='University' else other_w for c in columns)
+    return ((page_w-2*_MARGIN)/len(columns),)*len(columns)
+
+
+def _cell_strings(df, float_precision):
+    """Table body as lists of strings.
+
+    With ``float_precision`` set, float columns are formatted with that many
+    decimals in one vectorised call instead of ``astype(str)``'s shortest
+    round-trip repr (identical for the one-decimal scores and gaps).
+    """
+    if float_precision is None:
+        return df.astype(str).values.tolist()
+    cols = []
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind == "f":
+            cols.append(np.char.mod(f"%.{float_precision}f", values))
+        else:
+            cols.append(df[col].astype(str).to_numpy())
+    return np.column_stack(cols).tolist() if cols and len(df) else []
+
+
+def _fast_tables(df, widths, first_rows, rows, float_precision):
+    """Page-sized Tables with precomputed column widths and row heights, so
+    ReportLab neither measures every cell nor re-splits one huge table.
+
+    The first table holds ``first_rows`` data rows, the rest ``rows`` each;
+    every table repeats the header, which lands at the top of each page.
+    """
+    header = [str(c) for c in df.columns]
+    body   = _cell_strings(df, float_precision)
+    cell_row = [_SHARED_CELL_STYLE] * len(header)
+    start, size = 0, max(1, first_rows)
+    while True:
+        data = [header] + body[start:start + size]
+        tbl  = Table(data, repeatRows=1, colWidths=widths,
+                     rowHeights=[_ROW_HEIGHT] * len(data),
+                     cellStyles=[cell_row] * len(data))
+        tbl.setStyle(_FAST_TABLE_STYLE)
+        yield tbl
+        start += size
+        size   = max(1, rows)
+        if start >= len(body):
+            return
+
+
+def build_pdf(country_scores, gap_view, amb, tgt, safe,
+              fast=None, float_precision=None, dataset_version=None):
+    """Render the report; returns a BytesIO positioned at the start.
+
+    ``fast`` selects the chunked table path (``None``: only for tables longer
+    than ``LARGE_TABLE_ROWS``); ``float_precision`` formats float cells with a
+    fixed number of decimals on that path.  ``dataset_version`` is printed
+    under the title.
+    """
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=landscape(A4),
+                            leftMargin=_MARGIN, rightMargin=_MARGIN,
+                            topMargin=_MARGIN, bottomMargin=_MARGIN)
+    page_w, page_h = landscape(A4)
+    frame_w = page_w - 2*_MARGIN - 12   # SimpleDocTemplate frames pad 6pt a side
+    frame_h = page_h - 2*_MARGIN - 12
+    styles = _styles()
+    elems  = [Paragraph(REPORT_TITLE, styles['Title'])]
+    if dataset_version:
+        elems.append(Paragraph(f"Admissions data version {dataset_version}", styles['Normal']))
+    elems.append(Spacer(1, 12))
+
+    def add_table(df, hdr):
+        heading = Paragraph(hdr, styles['Heading2'])
+        if fast or (fast is None and len(df) > LARGE_TABLE_ROWS):
+            rows = int(frame_h // _ROW_HEIGHT) - 1
+            if len(df) <= rows:
+                first = rows
+                elems.append(heading)
+            else:
+                # Start on a fresh page so every chunk fills exactly one page
+                _, head_h = heading.wrap(frame_w, frame_h)
+                first = int((frame_h - head_h - heading.getSpaceAfter()) // _ROW_HEIGHT) - 1
+                elems.extend([PageBreak(), heading])
+            elems.extend(_fast_tables(df, _col_widths(tuple(df.columns), page_w),
+                                      first, rows, float_precision))
+            elems.append(Spacer(1, 12))
+            return
+        elems.append(heading)
+        data = [df.columns.tolist()] + df.astype(str).values.tolist()
+        tbl = Table(data, repeatRows=1, colWidths=_col_widths(tuple(df.columns), page_w))
+        tbl.setStyle(_TABLE_STYLE)
+        elems.extend([tbl, Spacer(1, 12)])
+
+    add_table(country_scores, "Country-wise Profile Score")
+    add_table(gap_view,        "University Gap Analysis")
+    if not amb.empty:  add_table(amb,  "Ambitious Universities")
+    if not tgt.empty:  add_table(tgt,  "Target Universities")
+    if not safe.empty: add_table(safe, "Safe Universities")
+
+    doc.build(elems)
+    buf.seek(0)
+    return buf
+
+
+def report_tables(prediction):
+    """The five tables of a ``Prediction`` in ``build_pdf`` argument order."""
+    return (prediction.country_scores, prediction.gap_view,
+            prediction.ambitious, prediction.target, prediction.safe)
+
+
+def render_pdf_bytes(tables, dataset_version=None):
+    with stage("build_pdf"):
+        return build_pdf(*tables, dataset_version=dataset_version).getvalue()
+
+
+def render_prediction(prediction):
+    """PDF bytes of a ``Prediction``; builds its gap analysis if not done yet."""
+    return render_pdf_bytes(report_tables(prediction), prediction.dataset_version)
+
+
+class ReportRenderer:
+    """Background PDF rendering with a bytes cache keyed by the caller.
+
+    Failed renders are kept (as their failed Future) in a cache of the same
+    size, so the next ``submit`` of that key reports the error at once.
+    """
+
+    def __init__(self, executor=None, max_workers=2, cache_size=256):
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pdf")
+        self._cache    = LRUCache(maxsize=cache_size, ttl=None)
+        self._failed   = LRUCache(maxsize=cache_size, ttl=None)   # key -> failed Future
+        self._lock     = threading.Lock()
+        self._pending  = {}   # key -> Future
+
+    def submit(self, key, render, *args):
+        """Start ``render(*args)`` unless ``key`` is cached, in flight or failed;
+        return a Future resolving to the PDF bytes."""
+        data = self._cache.get(key)
+        if data is not None:
+            done = Future()
+            done.set_result(data)
+            return done
+        failed = self._failed.get(key)
+        if failed is not None:
+            return failed
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(render, *args)
+            self._pending[key] = future
+        # Outside the lock: a render that already finished calls back at once
+        future.add_done_callback(lambda f, key=key: self._finish(key, f))
+        return future
+
+    def _finish(self, key, future):
+        # Cached before it leaves _pending, so no submit in between starts it again
+        if not future.cancelled():
+            if future.exception() is None:
+                self._cache.put(key, future.result())
+            else:
+                self._failed.put(key, future)
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return dict(self._cache.stats(), pending=pending, failed=len(self._failed))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def submit_report(prediction, user_profile, sel):
+    """Render the PDF of ``predict(user_profile, sel)`` in the shared background
+    pool; the tables are built there too."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ReportRenderer()
+    key = (profile_key(user_profile, sel), prediction.dataset_version)
+    return _renderer.submit(key, render_prediction, prediction)
+
+
+# ─────────────────────────────────────────────
+# Bulk mode
+# ─────────────────────────────────────────────
+def _safe_name(student_id):
+    return re.sub(r"[^\w.-]+", "_", str(student_id)).strip("._") or "student"
+
+
+def _report_name(student_id, used):
+    """File name of a student's report, unique among ``used`` (then added).
+
+    IDs that sanitise alike (``a/b``, ``a_b``) get ``a_b.pdf``, ``a_b-2.pdf``,
+    ... in input order, so a resumed run names them the same way.
+    """
+    stem = _safe_name(student_id)
+    name, n = f"{stem}.pdf", 1
+    while name in used:
+        n += 1
+        name = f"{stem}-{n}.pdf"
+    used.add(name)
+    return name
+
+
+def cohort_tables(result):
+    """Yield ``(student_id, tables)`` for each student of a ``BatchResult``
+    built with ``include_gaps=True``."""
+    scores  = dict(tuple(result.scores.groupby(STUDENT_ID, sort=False)))
+    gaps    = dict(tuple(result.gaps.groupby(STUDENT_ID, sort=False)))
+    buckets = dict(tuple(result.buckets.groupby(STUDENT_ID, sort=False)))
+    empty_gaps = result.gaps.iloc[:0]
+    for sid in pd.unique(result.scores[STUDENT_ID]):
+        gap  = gaps.get(sid, empty_gaps).drop(columns=[STUDENT_ID, "Gap Rank"])
+        bkt  = buckets.get(sid, result.buckets.iloc[:0])
+        tables = [scores[sid].drop(columns=[STUDENT_ID]), gap]
+        for name in ("Ambitious", "Target", "Safe"):
+            tables.append(bkt[bkt["Bucket"] == name][gap.columns])
+        yield sid, tuple(tables)
+
+
+class _DirSink:
+    """Reports as files in a directory; each appears only once fully written."""
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+    def done(self):
+        return {name for name in os.listdir(self.path) if name.endswith(".pdf")}
+
+    def write(self, name, data):
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def checkpoint(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _ZipSink:
+    """Reports appended to one zip file.
+
+    Appending overwrites the central directory, so a crash would leave the
+    archive unreadable.  At each checkpoint the archive is closed, and the
+    offset where its central directory starts is saved with a copy of that
+    directory in ``<zip>.checkpoint``.  On resume the file is truncated to the
+    offset and the saved directory put back, recovering every report up to the
+    last checkpoint.  PDFs are already compressed, so entries are stored.
+    """
+
+    def __init__(self, path, resume):
+        self.path  = path
+        self._mark = path + ".checkpoint"
+        if resume and os.path.exists(path):
+            if os.path.exists(self._mark):
+                with open(self._mark, "rb") as fh:
+                    offset = int(fh.readline())
+                    tail   = fh.read()
+                with open(path, "r+b") as fh:
+                    fh.truncate(offset)
+                    fh.seek(offset)
+                    fh.write(tail)
+            self._zip = zipfile.ZipFile(path, "a")
+        else:
+            self._zip = zipfile.ZipFile(path, "w")
+        self.checkpoint()
+
+    def done(self):
+        return set(self._zip.namelist())
+
+    def write(self, name, data):
+        self._zip.writestr(name, data)
+
+    def checkpoint(self):
+        offset = self._zip.start_dir
+        self._zip.close()
+        with open(self.path, "rb") as fh:
+            fh.seek(offset)
+            tail = fh.read()
+        tmp = self._mark + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(b"%d\n" % offset + tail)
+        os.replace(tmp, self._mark)
+        self._zip = zipfile.ZipFile(self.path, "a")
+
+    def close(self):
+        self._zip.close()
+        os.remove(self._mark)
+
+
+@dataclass
+class CohortStats:
+    rendered: int = 0
+    skipped: int = 0          # already in the output (resumed run)
+    seconds: float = 0.0
+    peak_rss_mib: float = 0.0          # this process
+    worker_peak_rss_mib: float = 0.0   # largest worker
+
+    @property
+    def students_per_sec(self):
+        return self.rendered / self.seconds if self.seconds else 0.0
+
+
+def _peak_rss_mib(who):
+    try:
+        import resource
+    except ImportError:   # not on Windows
+        return 0.0
+    return resource.getrusage(getattr(resource, who)).ru_maxrss / 1024   # KiB on Linux
+
+
+def render_cohort(students_path, out, workers=None, chunk_size=500, dataset=None,
+                  max_in_flight=None, resume=True, checkpoint_every=200, progress=None):
+    """Render one PDF per student of a CSV/Parquet cohort file.
+
+    ``out`` is a directory, or a ``.zip`` file to append to.  Students are
+    scored ``chunk_size`` at a time (``batch.predict_file``) and their reports
+    rendered across ``workers`` processes.  At most ``max_in_flight`` reports
+    (default ``4 x workers``) are queued or rendering at once; reading more
+    students waits for a slot, so memory stays bounded whatever the cohort
+    size.  Reports are written as they finish; with ``resume`` those already
+    in ``out`` are skipped, so a crashed run picks up where it stopped.
+    ``progress(stats)`` is called after every checkpoint.
+
+    Reports are named after the Student ID; IDs that clash once made safe
+    for a file name get a numeric suffix (see ``_report_name``).  Students
+    whose country selection matches no country get no report.
+    Returns ``CohortStats``.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 4 * workers
+    if os.fspath(out).lower().endswith(".zip"):
+        sink = _ZipSink(out, resume)
+    else:
+        sink = _DirSink(out)
+    done  = sink.done() if resume else set()
+    stats = CohortStats()
+    started = time.perf_counter()
+    in_flight = {}   # future -> file name
+    used      = set()   # file names given out in this run, skipped ones included
+
+    def collect(futures):
+        for future in futures:
+            sink.write(in_flight.pop(future), future.result())
+            stats.rendered += 1
+            if stats.rendered % checkpoint_every == 0:
+                sink.checkpoint()
+                stats.seconds = time.perf_counter() - started
+                if progress:
+                    progress(stats)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in predict_file(students_path, chunk_size, dataset, include_gaps=True):
+                for sid, tables in cohort_tables(result):
+                    name = _report_name(sid, used)
+                    if name in done:
+                        stats.skipped += 1
+                        continue
+                    if len(in_flight) >= max_in_flight:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(finished)
+                    in_flight[pool.submit(render_pdf_bytes, tables,
+                                          result.dataset_version)] = name
+            collect(list(in_flight))
+    except BaseException:
+        sink.checkpoint()   # keep what was written for a resumed run
+        raise
+    sink.close()
+    stats.seconds = time.perf_counter() - started
+    stats.peak_rss_mib = _peak_rss_mib("RUSAGE_SELF")
+    # Children are only counted once they exited, i.e. after the pool shut down
+    stats.worker_peak_rss_mib = _peak_rss_mib("RUSAGE_CHILDREN")
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="python -m college_predictor report",
+        description="Render one PDF report per student of a cohort file.")
+    ap.add_argument("students", help="CSV or Parquet file, one student per row")
+    ap.add_argument("--out", "--out-dir", dest="out", required=True,
+                    help="output directory, or a .zip file")
+    ap.add_argument("--workbook", default=EXCEL_PATH,
+                    help="xlsx workbook or ingest store directory")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--chunk-size", type=int, default=500)
+    ap.add_argument("--max-in-flight", type=int, default=None,
+                    help="reports queued or rendering at once (default 4 x workers)")
+    ap.add_argument("--checkpoint-every", type=int, default=200)
+    ap.add_argument("--no-resume", dest="resume", action="store_false",
+                    help="render every student even if its report exists")
+    args = ap.parse_args(argv)
+
+    def progress(stats):
+        print(f"  {stats.rendered} rendered, {stats.students_per_sec:.1f} students/s",
+              file=sys.stderr, flush=True)
+
+    stats = render_cohort(args.students, args.out, args.workers, args.chunk_size,
+                          dataset=load_dataset(args.workbook),
+                          max_in_flight=args.max_in_flight, resume=args.resume,
+                          checkpoint_every=args.checkpoint_every, progress=progress)
+    print(f"Rendered {stats.rendered} reports -> {args.out} ({stats.skipped} already there) "
+          f"in {stats.seconds:.1f}s: {stats.students_per_sec:.1f} students/s, "
+          f"peak RSS {stats.peak_rss_mib:.0f} MiB (largest worker "
+          f"{stats.worker_peak_rss_mib:.0f} MiB)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Persistent, append-only log of every prediction, for counselling and analytics.
+
+Each "Find My Universities" submission (and each ``/predict`` request of the
+service) can append one record: the normalised ``user_profile``, the selected
+countries, the country scores and the Ambitious/Target/Safe universities.  The
+log is a local SQLite database in WAL mode, so readers (the query API, an
+export) never block the writers and several processes can append to it.
+
+Writes stay off the request path: ``ResultLog.record`` only puts the result on
+a queue.  A background thread drains it and commits in batches (up to
+``BATCH_ROWS`` records, or whatever arrived within ``FLUSH_SECONDS``), one
+transaction per batch.  If the queue is full the record is dropped and counted
+rather than making a student wait.
+
+Schema (rows are only ever inserted)::
+
+    predictions   id, ts, session, dataset, countries, <one REAL per feature>,
+                  scores (zlib-compressed JSON [[country, score], ...])
+    universities  id, name, country                     unique (name, country)
+    bucket_rows   university, bucket, prediction, gap   primary key in that order,
+                                                        WITHOUT ROWID
+
+"Every student whose Target bucket includes university X" is a range scan of
+``bucket_rows``' primary key followed by primary-key lookups into
+``predictions``, so it costs ``O(log n + matches)`` however large the log grows.
+
+Logging is off unless ``enable(path)`` is called or ``COLLEGE_PREDICTOR_RESULTS``
+names the database file.  A forked process (a service worker) inherits the log
+but not its writer thread, so ``log()`` reopens it there on first use.
+
+Usage::
+
+    python -m college_predictor results results.sqlite [--university NAME
+        [--bucket Target] [--out matches.csv]] [--export DIR]
+
+Without ``--university`` or ``--export`` it prints record counts.  ``--export``
+writes ``predictions.parquet`` and ``bucket_rows.parquet`` (needs ``pyarrow``).
+"""
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from multiprocessing import util as mp_util
+
+import pandas as pd
+
+from .engine import ALL
+from .index import BUCKET_OFFSETS
+from .scoring import FEATURE_KEYS
+
+ENV_VAR       = "COLLEGE_PREDICTOR_RESULTS"
+BUCKETS       = list(BUCKET_OFFSETS)                    # stored as their position
+FEATURE_COLS  = [k.lower().replace(" ", "_") for k in FEATURE_KEYS]
+BATCH_ROWS    = 500
+FLUSH_SECONDS = 0.5
+MAX_PENDING   = 100_000
+EXPORT_ROWS   = 100_000
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS predictions (
+    id        INTEGER PRIMARY KEY,
+    ts        REAL NOT NULL,
+    session   TEXT,
+    dataset   TEXT,
+    countries TEXT NOT NULL,
+    {", ".join(f"{c} REAL" for c in FEATURE_COLS)},
+    scores    BLOB
+);
+CREATE TABLE IF NOT EXISTS universities (
+    id      INTEGER PRIMARY KEY,
+    name    TEXT NOT NULL,
+    country TEXT NOT NULL,
+    UNIQUE (name, country)
+);
+CREATE TABLE IF NOT EXISTS bucket_rows (
+    university INTEGER NOT NULL,
+    bucket     INTEGER NOT NULL,
+    prediction INTEGER NOT NULL,
+    gap        REAL,
+    PRIMARY KEY (university, bucket, prediction)
+) WITHOUT ROWID;
+"""
+
+_INSERT_PREDICTION = (
+    f"INSERT INTO predictions (ts, session, dataset, countries, {', '.join(FEATURE_COLS)}, "
+    f"scores) VALUES ({', '.join('?' * (len(FEATURE_COLS) + 5))})")
+
+_log = None
+
+
+def connect(path):
+    """SQLite connection to the log at ``path`` in WAL mode, schema created."""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoints; WAL keeps it consistent
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def encode_scores(countries, scores):
+    pairs = list(zip(countries, scores))
+    return zlib.compress(json.dumps(pairs, separators=(",", ":")).encode())
+
+
+def decode_scores(blob):
+    """``{country: Total Profile %}`` of a stored ``scores`` blob."""
+    return dict(json.loads(zlib.decompress(blob)))
+
+
+# ─────────────────────────────────────────────
+# Writer
+# ─────────────────────────────────────────────
+class ResultLog:
+    """Asynchronous, batching appender of predictions to the log at ``path``."""
+
+    def __init__(self, path, batch_rows=BATCH_ROWS, flush_seconds=FLUSH_SECONDS,
+                 max_pending=MAX_PENDING):
+        self.path          = path
+        self.batch_rows    = batch_rows
+        self.flush_seconds = flush_seconds
+        self.pid           = os.getpid()   # the process the writer thread runs in
+        self.written = self.dropped = self.failed = self.batches = 0
+        self._queue  = queue.Queue(max_pending)
+        connect(path).close()                 # fail here, not in the thread, on a bad path
+        self._thread = threading.Thread(target=self._run, name="result-log", daemon=True)
+        self._thread.start()
+
+    def record(self, prediction, user_profile, sel=(ALL,), session=None, dataset=None):
+        """Queue one prediction; returns at once (``False`` if it was dropped)."""
+        item = (time.time(), session, getattr(dataset, "content_hash", dataset),
+                tuple(sel), [user_profile[k] for k in FEATURE_KEYS], prediction)
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # ── background thread ──────────────────────
+    def _run(self):
+        conn = connect(self.path)
+        uni_ids = {}
+        stop = False
+        while not stop:
+            batch, waiting = [self._queue.get()], []
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_rows:
+                last = batch[-1]
+                if last is None or isinstance(last, threading.Event):
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            records = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiting.append(item)
+                else:
+                    records.append(item)
+            if records:
+                try:
+                    self._write(conn, records, uni_ids)
+                except sqlite3.Error as exc:
+                    # Analytics must never take the app down: count and carry on
+                    self.failed += len(records)
+                    uni_ids.clear()   # ids inserted by the rolled-back batch
+                    print(f"result log: {len(records)} records lost: {exc}", file=sys.stderr)
+            for event in waiting:
+                event.set()
+        conn.close()
+
+    def _write(self, conn, records, uni_ids):
+        # The whole batch's tables are read column-wise after one concat each:
+        # per-frame column access costs far more than the SQLite inserts.
+        predictions = [r[-1] for r in records]
+        scores = _columns([p.country_scores for p in predictions], ["Country", "Total Profile %"])
+        picks  = _columns([getattr(p, name.lower()) for p in predictions for name in BUCKETS],
+                          ["University", "Country", "Gap %"])
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows, i, j = [], 0, 0
+            for (ts, session, dataset, sel, features, prediction), n in zip(
+                    records, (len(p.country_scores) for p in predictions)):
+                countries = ALL if ALL in sel else ";".join(sel)
+                pid = conn.execute(_INSERT_PREDICTION, (
+                    ts, session, dataset, countries, *features,
+                    encode_scores(scores[0][i:i + n], scores[1][i:i + n]))).lastrowid
+                i += n
+                for bucket, name in enumerate(BUCKETS):
+                    for _ in range(len(getattr(prediction, name.lower()))):
+                        key = (picks[0][j], picks[1][j])
+                        if key not in uni_ids:
+                            uni_ids[key] = _university_id(conn, *key)
+                        gap = picks[2][j]
+                        rows.append((uni_ids[key], bucket, pid, None if gap != gap else gap))
+                        j += 1
+            conn.executemany("INSERT INTO bucket_rows VALUES (?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.written += len(records)
+        self.batches += 1
+
+
+def _columns(frames, names):
+    table = pd.concat(frames, ignore_index=True)
+    return [table[c].tolist() for c in names]
+
+
+def _university_id(conn, name, country):
+    conn.execute("INSERT OR IGNORE INTO universities (name, country) VALUES (?, ?)",
+                 (name, country))
+    return conn.execute("SELECT id FROM universities WHERE name = ? AND country = ?",
+                        (name, country)).fetchone()[0]
+
+
+# ─────────────────────────────────────────────
+# Query API
+# ─────────────────────────────────────────────
+class ResultStore:
+    """Read side of the log: indexed lookups and analytics export."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = connect(path)
+
+    def close(self):
+        self.conn.close()
+
+    def counts(self):
+        """``{table: rows}``."""
+        return {t: self.conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+                for t in ("predictions", "universities", "bucket_rows")}
+
+    def students_with(self, university, bucket="Target", country=None, limit=None):
+        """Every logged prediction with ``university`` in ``bucket``, oldest first.
+
+        One row per prediction: its id, time, session, dataset, countries,
+        inputs, the university's country and its ``Gap %``.
+        """
+        where, params = "name = ?", [university]
+        if country is not None:
+            where, params = where + " AND country = ?", params + [country]
+        unis = self.conn.execute(f"SELECT id, country FROM universities WHERE {where}",
+                                 params).fetchall()
+        columns = ["id", "ts", "session", "dataset", "countries", *FEATURE_COLS]
+        if not unis:
+            return pd.DataFrame(columns=columns + ["university_country", "gap"])
+        marks = ", ".join("?" * len(unis))
+        sql = (f"SELECT {', '.join('p.' + c for c in columns)}, u.country, b.gap "
+               f"FROM bucket_rows b JOIN predictions p ON p.id = b.prediction "
+               f"JOIN universities u ON u.id = b.university "
+               f"WHERE b.university IN ({marks}) AND b.bucket = ? ORDER BY b.prediction")
+        params = [u for u, _ in unis] + [BUCKETS.index(bucket)]
+        if limit is not None:
+            sql, params = sql + " LIMIT ?", params + [limit]
+        df = pd.DataFrame(self.conn.execute(sql, params).fetchall(),
+                          columns=columns + ["university_country", "gap"])
+        df["ts"] = pd.to_datetime(df["ts"], unit="s")
+        return df
+
+    def bucket_counts(self, university):
+        """Number of logged predictions that put ``university`` in each bucket."""
+        rows = self.conn.execute(
+            "SELECT b.bucket, count(*) FROM bucket_rows b JOIN universities u "
+            "ON u.id = b.university WHERE u.name = ? GROUP BY b.bucket", (university,))
+        counts = dict(rows.fetchall())
+        return {name: counts.get(i, 0) for i, name in enumerate(BUCKETS)}
+
+    def export(self, out_dir, chunk_rows=EXPORT_ROWS):
+        """Write ``predictions.parquet`` and ``bucket_rows.parquet`` (universities
+        and buckets by name) to ``out_dir``, streaming ``chunk_rows`` at a time."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(out_dir, exist_ok=True)
+        queries = {
+            "predictions": ("SELECT id, ts, session, dataset, countries, "
+                            f"{', '.join(FEATURE_COLS)}, scores FROM predictions ORDER BY id"),
+            "bucket_rows": ("SELECT b.prediction, b.bucket, u.name AS university, "
+                            "u.country, b.gap FROM bucket_rows b JOIN universities u "
+                            "ON u.id = b.university ORDER BY b.prediction, b.bucket"),
+        }
+        written = {}
+        for name, sql in queries.items():
+            writer, n = None, 0
+            path = os.path.join(out_dir, f"{name}.parquet")
+            for chunk in pd.read_sql_query(sql, self.conn, chunksize=chunk_rows):
+                if name == "predictions":
+                    chunk["ts"] = pd.to_datetime(chunk["ts"], unit="s")
+                    chunk["scores"] = [json.dumps(decode_scores(b)) for b in chunk["scores"]]
+                else:
+                    chunk["bucket"] = pd.Categorical.from_codes(chunk["bucket"], BUCKETS)
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+                writer.write_table(table)
+                n += len(chunk)
+            if writer is not None:
+                writer.close()
+            written[name] = n
+        return written
+
+
+# ─────────────────────────────────────────────
+# Process-wide log
+# ─────────────────────────────────────────────
+def _open(path, **kwargs):
+    result_log = ResultLog(path, **kwargs)
+    atexit.register(result_log.close)
+    # multiprocessing children leave through os._exit, which skips atexit but
+    # runs these finalizers
+    mp_util.Finalize(result_log, result_log.close, exitpriority=0)
+    return result_log
+
+
+def enable(path, **kwargs):
+    """Start logging to ``path`` (idempotent) and return the ``ResultLog``."""
+    global _log
+    if _log is None:
+        _log = _open(path, **kwargs)
+    return _log
+
+
+def log():
+    """The active ``ResultLog``, or ``None`` while logging is off."""
+    global _log
+    if _log is not None and _log.pid != os.getpid():
+        # Forked: the inherited writer thread only exists in the parent
+        _log = _open(_log.path, batch_rows=_log.batch_rows,
+                     flush_seconds=_log.flush_seconds, max_pending=_log._queue.maxsize)
+    return _log
+
+
+_path = os.environ.get(ENV_VAR, "").strip()
+if _path:
+    enable(_path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m college_predictor results",
+                                 description="Query or export the prediction log.")
+    ap.add_argument("db", help="SQLite log written with COLLEGE_PREDICTOR_RESULTS")
+    ap.add_argument("--university", help="list predictions with this university in --bucket")
+    ap.add_argument("--bucket", default="Target", choices=BUCKETS)
+    ap.add_argument("--country", help="only the university of this country")
+    ap.add_argument("--limit", type=int)
+    ap.add_argument("--out", help="write the --university matches to this CSV")
+    ap.add_argument("--export", metavar="DIR", help="export the whole log as Parquet")
+    args = ap.parse_args(argv)
+
+    store = ResultStore(args.db)
+    try:
+        if args.university:
+            matches = store.students_with(args.university, args.bucket, args.country,
+                                          args.limit)
+            if args.out:
+                matches.to_csv(args.out, index=False)
+            else:
+                print(matches.to_string(index=False))
+            print(f"{len(matches)} predictions with {args.university} in {args.bucket}",
+                  file=sys.stderr)
+        if args.export:
+            written = store.export(args.export)
+            print(", ".join(f"{n} {name}" for name, n in written.items())
+                  + f" -> {args.export}", file=sys.stderr)
+        if not (args.university or args.export):
+            for table, n in store.counts().items():
+                print(f"{table:>13}: {n:,}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
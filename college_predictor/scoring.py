@@ -0,0 +1,79 @@
+"""Vectorised country scoring.
+
+A country's profile score is a weighted sum of the student's normalised inputs:
+``round(100 * sum(user[k] * weight[country, k]), 1)`` over ``FEATURE_KEYS``.
+The per-country weights are stacked once into a ``(n_countries, n_features)``
+matrix so every country is scored in one matrix–vector product.
+
+The product is accumulated feature by feature in the same order as the
+original row-wise ``country_score`` (BLAS is free to reorder additions), and
+rounding follows Python's ``round`` rather than ``np.round``, so scores are
+bit-identical to the scalar implementation.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+ACAD_KEYS    = ["Class 9","Class 10","Class 11","Class 12","SAT","AP"]
+ACT_KEYS     = ["CC","EC","Internship","Community","Research"]
+FEATURE_KEYS = ACAD_KEYS + ACT_KEYS + ["LOR"]
+
+
+def round1(values):
+    """Vectorised ``round(x, 1)`` with Python's correctly-rounded semantics.
+
+    ``np.round`` scales by 10 before rounding, which misrounds values lying
+    within an ulp of a ``.x5`` boundary (e.g. 71.55); those few are redone with
+    the builtin.
+    """
+    x   = np.asarray(values, dtype=np.float64)
+    out = np.round(x, 1)
+    scaled = x * 10
+    near = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near.any():
+        out[near] = [round(v, 1) for v in x[near].tolist()]
+    return out
+
+
+def weighted_totals(users, matrix):
+    """``users @ matrix.T`` accumulated in ``FEATURE_KEYS`` order.
+
+    ``users`` is a single ``(n_features,)`` vector or an ``(n_students,
+    n_features)`` matrix; the result is ``(n_countries,)`` or ``(n_students,
+    n_countries)`` accordingly.
+    """
+    users = np.asarray(users, dtype=np.float64)
+    total = np.multiply.outer(users[..., 0], matrix[:, 0])
+    for k in range(1, matrix.shape[1]):
+        total += np.multiply.outer(users[..., k], matrix[:, k])
+    return total
+
+
+def user_vector(user_profile):
+    """The ``user_profile`` dict as a vector in ``FEATURE_KEYS`` order."""
+    return np.array([user_profile[k] for k in FEATURE_KEYS], dtype=np.float64)
+
+
+@dataclass(frozen=True)
+class CountryWeights:
+    """Country weight matrix built once from the ``College_Finder`` sheet."""
+    countries: np.ndarray   # country names, in profile_df row order
+    index: pd.Index         # profile_df index, for aligning results
+    matrix: np.ndarray      # (n_countries, len(FEATURE_KEYS)) float64
+
+    @classmethod
+    def from_profile(cls, profile_df):
+        return cls(
+            countries=profile_df["Country"].to_numpy(dtype=object),
+            index=profile_df.index,
+            matrix=np.ascontiguousarray(profile_df[FEATURE_KEYS].to_numpy(dtype=np.float64)),
+        )
+
+    def scores(self, user_profile):
+        """Total Profile % of every country for one ``user_profile`` dict."""
+        return round1(weighted_totals(user_vector(user_profile), self.matrix) * 100)
+
+    def score_series(self, user_profile):
+        """``scores`` as a Series aligned to the ``profile_df`` index."""
+        return pd.Series(self.scores(user_profile), index=self.index)
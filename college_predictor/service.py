@@ -0,0 +1,271 @@
+"""Headless JSON prediction service for partner integrations.
+
+A plain ASGI application (no web framework) with two routes:
+
+``POST /predict``
+    Body: the form inputs as JSON, named like ``engine.build_user_profile``'s
+    arguments plus ``countries``::
+
+        {"class9": 85, "class10": 70, "class11": 80, "class12": 90, "sat": 1400,
+         "ap_scores": [4.5, 5], "cc": 1, "ec": 2, "internships": 1,
+         "community": true, "research": false, "n_lor": 2,
+         "countries": ["UK", "Canada"]}
+
+    Everything but ``class9``-``class12`` and ``sat`` is optional; ``countries``
+    defaults to all.  Returns the country scores and the Ambitious/Target/Safe
+    buckets, with the ``dataset_version`` they were computed from.  Invalid
+    input gets a 400 with ``{"error": ...}``.
+
+``GET /health``
+    ``{"status": "ok"}`` once the workers are up.
+
+Predictions run in a process pool whose workers each load the workbook once
+at start-up and keep their own prediction memo, so a request costs one small
+pickle round trip plus (on a memo miss) one prediction.  An edited workbook is
+reloaded by each worker in the background and swapped in without a restart
+(see ``data.WorkbookCache``); every request uses one version throughout.
+``workers=0`` predicts in the event loop's thread pool instead, which is handy
+for debugging.  With ``COLLEGE_PREDICTOR_RESULTS`` set, each worker also
+appends its predictions to the shared result log (``college_predictor.results``).
+
+Usage (needs ``uvicorn``)::
+
+    python -m college_predictor serve [--host 127.0.0.1] [--port 8000] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import results
+from .cache import cached_predict
+from .data import EXCEL_PATH, load_dataset
+from .engine import ALL, build_user_profile
+
+# field -> (type, min, max); None bounds are unchecked
+REQUIRED_FIELDS = {
+    "class9":  (float, 0, 100),
+    "class10": (float, 0, 100),
+    "class11": (float, 0, 100),
+    "class12": (float, 0, 100),
+    "sat":     (float, 400, 1600),
+}
+OPTIONAL_FIELDS = {
+    "cc":          (int, 0, 3),
+    "ec":          (int, 0, 3),
+    "internships": (int, 0, 2),
+    "n_lor":       (int, 0, 3),
+    "community":   (bool, None, None),
+    "research":    (bool, None, None),
+}
+MAX_AP = 5
+
+# Bucket columns -> JSON keys
+_BUCKET_KEYS = {
+    "Country": "country", "University": "university", "QS Ranking": "qs_ranking",
+    "Required Profile Score": "required_score", "Your Profile %": "your_score",
+    "Gap %": "gap",
+}
+_BUCKETS = ("ambitious", "target", "safe")
+
+
+class InvalidRequest(ValueError):
+    """The request body does not describe a valid student profile."""
+
+
+def _number(name, value, kind, lo, hi):
+    if kind is bool:
+        if not isinstance(value, bool):
+            raise InvalidRequest(f"{name} must be true or false")
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise InvalidRequest(f"{name} must be a number")
+    if kind is int and value != int(value):
+        raise InvalidRequest(f"{name} must be a whole number")
+    if not lo <= value <= hi:
+        raise InvalidRequest(f"{name} must be between {lo} and {hi}")
+    return kind(value)
+
+
+def parse_request(payload, countries):
+    """``(user_profile, sel)`` from a decoded request body.
+
+    ``countries`` are the workbook's country names; unknown names are rejected.
+    """
+    if not isinstance(payload, dict):
+        raise InvalidRequest("body must be a JSON object")
+    unknown = set(payload) - set(REQUIRED_FIELDS) - set(OPTIONAL_FIELDS) - {"ap_scores", "countries"}
+    if unknown:
+        raise InvalidRequest(f"unknown fields: {', '.join(sorted(unknown))}")
+    kwargs = {}
+    for name, spec in REQUIRED_FIELDS.items():
+        if name not in payload:
+            raise InvalidRequest(f"{name} is required")
+        kwargs[name] = _number(name, payload[name], *spec)
+    for name, spec in OPTIONAL_FIELDS.items():
+        if name in payload:
+            kwargs[name] = _number(name, payload[name], *spec)
+
+    ap_scores = payload.get("ap_scores", [])
+    if not isinstance(ap_scores, list) or len(ap_scores) > MAX_AP:
+        raise InvalidRequest(f"ap_scores must be a list of at most {MAX_AP} scores")
+    kwargs["ap_scores"] = [_number("ap_scores", s, float, 0, 5) for s in ap_scores]
+
+    sel = payload.get("countries") or [ALL]
+    if isinstance(sel, str):
+        sel = [sel]
+    if not isinstance(sel, list) or not all(isinstance(c, str) for c in sel):
+        raise InvalidRequest("countries must be a list of country names")
+    missing = set(sel) - set(countries) - {ALL}
+    if missing:
+        raise InvalidRequest(f"unknown countries: {', '.join(sorted(missing))}")
+    return build_user_profile(**kwargs), tuple(sel)
+
+
+def _records(df, keys):
+    # Column-wise tolist() is far cheaper than to_dict("records") on small frames
+    columns = []
+    for col in keys:
+        values = df[col].tolist()
+        if df[col].dtype.kind == "f":
+            values = [None if v != v else v for v in values]   # NaN -> null
+        columns.append(values)
+    names = list(keys.values())
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def prediction_json(prediction):
+    """JSON-ready dict of a ``Prediction``'s country scores and buckets, and the
+    dataset version that produced them."""
+    return {
+        "dataset_version": prediction.dataset_version,
+        "country_scores": _records(prediction.country_scores,
+                                   {"Country": "country", "Total Profile %": "score"}),
+        **{name: _records(getattr(prediction, name), _BUCKET_KEYS) for name in _BUCKETS},
+    }
+
+
+# ─────────────────────────────────────────────
+# Worker side
+# ─────────────────────────────────────────────
+_workbook = EXCEL_PATH
+
+
+def _init_worker(path):
+    global _workbook
+    _workbook = path
+    load_dataset(path)
+
+
+def handle_predict(body):
+    """Raw request body -> ``(status, response body)``; runs in a worker."""
+    dataset = load_dataset(_workbook)
+    try:
+        payload = json.loads(body)
+        user_profile, sel = parse_request(payload, dataset.weights.countries)
+    except (ValueError, TypeError) as exc:   # JSONDecodeError and InvalidRequest
+        return 400, json.dumps({"error": str(exc)}).encode()
+    result = cached_predict(user_profile, sel, dataset)
+    result_log = results.log()
+    if result_log is not None:
+        result_log.record(result, user_profile, sel, dataset=dataset)
+    return 200, json.dumps(prediction_json(result)).encode()
+
+
+# ─────────────────────────────────────────────
+# ASGI app
+# ─────────────────────────────────────────────
+MAX_BODY = 64 * 1024
+
+
+class PredictionService:
+    """ASGI application serving ``/predict`` and ``/health``."""
+
+    def __init__(self, workers=None, path=EXCEL_PATH):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.path    = path
+        self._pool   = None
+
+    def start(self):
+        if self.workers:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(self.path,))
+            # Bring every worker up (and its workbook loaded) before serving
+            for f in [self._pool.submit(_init_worker, self.path) for _ in range(self.workers)]:
+                f.result()
+        else:
+            _init_worker(self.path)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            status, body = await self._route(scope, receive)
+            await send({"type": "http.response.start", "status": status,
+                        "headers": [(b"content-type", b"application/json"),
+                                    (b"content-length", str(len(body)).encode())]})
+            await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await asyncio.get_running_loop().run_in_executor(None, self.start)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _route(self, scope, receive):
+        method, path = scope["method"], scope["path"]
+        if path == "/health" and method == "GET":
+            return 200, b'{"status": "ok"}'
+        if path != "/predict":
+            return 404, b'{"error": "not found"}'
+        if method != "POST":
+            return 405, b'{"error": "use POST"}'
+        body = await _read_body(receive)
+        if body is None:
+            return 413, b'{"error": "request body too large"}'
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, handle_predict, body)
+
+
+async def _read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m college_predictor serve",
+                                 description="JSON HTTP prediction service.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=None,
+                    help="prediction processes (default: CPU count; 0 = in-process)")
+    ap.add_argument("--workbook", default=EXCEL_PATH,
+                    help="xlsx workbook or ingest store directory")
+    args = ap.parse_args(argv)
+    import uvicorn
+    uvicorn.run(PredictionService(args.workers, args.workbook),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Pre-normalised binary snapshot of the workbook.
+
+Parsing the xlsx with openpyxl dominates cold start, so a build step writes the
+already-normalised sheets to a directory of ``.npy`` files that are memory-mapped
+back at startup.  Columns of the same numeric dtype are stored together as one
+``(n_cols, n_rows)`` array, which is exactly pandas' block layout, so numeric
+columns are handed to pandas without copying.  Categorical columns are stored
+as their integer codes (memory-mapped too) plus the category strings; other
+text columns as fixed-width unicode plus a null mask.
+
+The snapshot records the SHA-256 of the workbook it was built from and is
+ignored as soon as the workbook no longer matches.
+
+Build it with::
+
+    python -m college_predictor snapshot ["College Finder UG New.xlsx"]
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 2
+TABLES = ("profile", "uni")
+
+
+def snapshot_path(xlsx_path):
+    """Default snapshot directory for a workbook: ``<workbook>.snapshot``."""
+    return os.fspath(xlsx_path) + ".snapshot"
+
+
+def _write_table(df, out_dir, name):
+    blocks, categorical, text = {}, [], {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            categorical.append(col)
+        elif pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype):
+            blocks.setdefault(s.dtype.str, []).append(col)
+        else:
+            text[col] = None
+
+    meta = {"columns": [str(c) for c in df.columns], "blocks": [], "categorical": [],
+            "text": []}
+    for i, (dtype, cols) in enumerate(blocks.items()):
+        fname = f"{name}.block{i}.npy"
+        arr = np.vstack([df[c].to_numpy(dtype=dtype) for c in cols])
+        np.save(os.path.join(out_dir, fname), arr)
+        meta["blocks"].append({"file": fname, "dtype": dtype, "columns": cols})
+    for i, col in enumerate(categorical):
+        s = df[col]
+        np.save(os.path.join(out_dir, f"{name}.cat{i}.codes.npy"), s.cat.codes.to_numpy())
+        np.save(os.path.join(out_dir, f"{name}.cat{i}.categories.npy"),
+                s.cat.categories.to_numpy(dtype=object).astype(str))
+        meta["categorical"].append({"file": f"{name}.cat{i}", "column": col,
+                                    "ordered": bool(s.cat.ordered)})
+    for i, col in enumerate(text):
+        s    = df[col]
+        mask = s.isna().to_numpy()
+        vals = np.where(mask, "", s.to_numpy(dtype=object)).astype(str)
+        np.save(os.path.join(out_dir, f"{name}.text{i}.npy"), vals)
+        np.save(os.path.join(out_dir, f"{name}.text{i}.mask.npy"), mask)
+        meta["text"].append({"file": f"{name}.text{i}", "column": col})
+    np.save(os.path.join(out_dir, f"{name}.index.npy"), df.index.to_numpy(dtype=np.int64))
+    return meta
+
+
+def _read_table(snap_dir, name, meta):
+    index = pd.Index(np.load(os.path.join(snap_dir, f"{name}.index.npy")))
+    parts = [
+        pd.DataFrame(np.load(os.path.join(snap_dir, block["file"]), mmap_mode="r").T,
+                     index=index, columns=block["columns"], copy=False)
+        for block in meta["blocks"]
+    ]
+    df = pd.concat(parts, axis=1) if parts else pd.DataFrame(index=index)
+    for cat in meta["categorical"]:
+        codes = np.load(os.path.join(snap_dir, cat["file"] + ".codes.npy"), mmap_mode="r")
+        categories = np.load(os.path.join(snap_dir, cat["file"] + ".categories.npy"))
+        df[cat["column"]] = pd.Categorical.from_codes(
+            codes, pd.Index(categories.astype(object)).astype(str), ordered=cat["ordered"])
+    for text in meta["text"]:
+        vals = np.load(os.path.join(snap_dir, text["file"] + ".npy")).astype(object)
+        mask = np.load(os.path.join(snap_dir, text["file"] + ".mask.npy"))
+        vals[mask] = np.nan
+        df[text["column"]] = pd.Series(vals, index=df.index)
+    return df[meta["columns"]]
+
+
+def write_snapshot(profile_df, uni_df, snap_dir, source_hash):
+    """Write normalised sheets to ``snap_dir``, replacing it atomically."""
+    tmp_dir = snap_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    meta = {"format": FORMAT_VERSION, "source_sha256": source_hash, "tables": {}}
+    for name, df in zip(TABLES, (profile_df, uni_df)):
+        meta["tables"][name] = _write_table(df, tmp_dir, name)
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as fh:
+        json.dump(meta, fh, indent=1)
+    shutil.rmtree(snap_dir, ignore_errors=True)
+    os.replace(tmp_dir, snap_dir)
+
+
+def read_snapshot(snap_dir, source_hash):
+    """Return ``(profile_df, uni_df)`` from ``snap_dir``, or ``None`` if it is
+    missing, from another format version, or built from a different workbook."""
+    try:
+        with open(os.path.join(snap_dir, "meta.json")) as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != FORMAT_VERSION or meta.get("source_sha256") != source_hash:
+        return None
+    return tuple(_read_table(snap_dir, name, meta["tables"][name]) for name in TABLES)
+
+
+def main(argv=None):
+    from .data import EXCEL_PATH, file_hash, read_workbook
+
+    argv = sys.argv[1:] if argv is None else argv
+    xlsx = argv[0] if argv else EXCEL_PATH
+    out  = argv[1] if len(argv) > 1 else snapshot_path(xlsx)
+    profile_df, uni_df = read_workbook(xlsx)
+    write_snapshot(profile_df, uni_df, out, file_hash(xlsx))
+    print(f"Wrote snapshot of {xlsx!r} to {out!r} "
+          f"({len(profile_df)} countries, {len(uni_df)} universities)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Static markup for the Streamlit page: brand colours, the adaptive CSS block,
+hero, quick guide, board instructions and the counselling call-to-action.
+
+None of it depends on user input, so it is built once per process, when this
+module is first imported, instead of being re-formatted on every rerun.
+"""
+
+# ─────────────────────────────────────────────
+# Brand colours
+# ─────────────────────────────────────────────
+ORANGE = "#FF6B00"
+RED    = "#E53935"
+BLUE   = "#1E88E5"
+GREEN  = "#43A047"
+
+# ─────────────────────────────────────────────
+# ONE adaptive CSS block (light + dark)
+# ─────────────────────────────────────────────
+ADAPTIVE_CSS = f"""
+<style>
+#MainMenu, footer {{visibility:hidden;}}
+
+/* ─── Base (light) ─── */
+body            {{background:#f5f6f7;color:#212121;font-family:'Segoe UI',sans-serif;}}
+.hero-title     {{font-size:2.4rem;font-weight:800;color:{ORANGE};margin:0;}}
+.hero-sub       {{font-size:1.4rem;font-weight:600;margin-top:.3rem;}}
+.hero-divider   {{height:2px;background:{ORANGE};margin:1.6rem 0 2.4rem;}}
+.card           {{background:#fff;border-radius:14px;max-width:900px;margin:0 auto;
+                 padding:2.1rem 2.6rem;box-shadow:0 4px 16px rgba(0,0,0,.06);color:#212121;}}
+.card h3        {{font-size:1.65rem;margin-bottom:.9rem;}}
+.step           {{display:flex;margin:.65rem 0;}}
+.step-num       {{min-width:30px;height:30px;border-radius:50%;background:{ORANGE}33;
+                 color:#000;font-weight:700;font-size:.85rem;display:flex;align-items:center;
+                 justify-content:center;margin-right:.6rem;}}
+.step-text      {{line-height:1.45rem;}}
+.uni-card       {{background:#fff;border-radius:12px;box-shadow:0 2px 8px rgba(0,0,0,.04);
+                 padding:1rem 1.2rem;margin-bottom:1.2rem;color:#212121;}}
+.uni-card h4    {{margin:0 0 .3rem 0;font-size:1rem;font-weight:700;}}
+.uni-grid       {{display:grid;grid-template-columns:repeat(3,minmax(0,1fr));column-gap:1rem;}}
+
+/* ─── Dark-mode overrides ─── */
+@media (prefers-color-scheme: dark) {{
+  body          {{background:#121212 !important;color:#E7E7E7 !important;}}
+  .card         {{background:#1E1E1E !important;color:#E7E7E7 !important;}}
+  .hero-divider {{background:{ORANGE}AA !important;}}
+  .step-num     {{background:#FFFFFF !important;color:#000 !important;}}
+  .uni-card     {{background:#1E1E1E !important;color:#E7E7E7 !important;}}
+  .uni-card h4  {{color:#FFFFFF !important;}}
+  .uni-card div {{color:#CCCCCC !important;}}
+}}
+
+/* ─── Mobile tweaks ─── */
+@media (max-width:480px) {{
+  .card       {{padding:1.5rem 1.2rem;}}
+  .hero-title {{font-size:2rem;}}
+  .hero-sub   {{font-size:1.2rem;}}
+  .uni-grid   {{grid-template-columns:1fr;}}
+}}
+</style>
+"""
+
+# ─────────────────────────────────────────────
+# Hero + quick guide
+# ─────────────────────────────────────────────
+HERO_HTML = """
+<div style='text-align:center'>
+  <div class='hero-title'>YOCKET STUDY-ABROAD 🎓</div>
+  <div class='hero-sub'>University Readiness Assessment Test</div>
+</div>
+<div class='hero-divider'></div>
+"""
+
+GUIDE_STEPS = (
+    "Choose one or more <strong>countries</strong>.",
+    "Enter <strong>academic scores</strong> (Class 9-12 + SAT/ACT).",
+    "Add <strong>AP</strong> test data (optional).",
+    "Add <strong>activities</strong>, internships & extras.",
+    "Select number of <strong>LORs</strong>.",
+    "Click <strong>Find My Universities</strong> for Ambitious-Target-Safe lists.",
+)
+GUIDE_HTML = (
+    "<div class='card'><h3>How to use this Finder</h3>" +
+    "".join(f"<div class='step'><div class='step-num'>{i}</div><div class='step-text'>{t}</div></div>"
+            for i, t in enumerate(GUIDE_STEPS, 1)) +
+    "</div>"
+)
+
+# ─────────────────────────────────────────────
+# Instructions for all boards
+# ─────────────────────────────────────────────
+BOARD_INSTRUCTIONS_MD = """
+### 📘 Instructions for Different Boards:
+
+1. **CBSE / ICSE / State Board**: Enter your percentage score directly from your final board exam results for Class 9-12.
+
+2. **IB (International Baccalaureate)**:
+   - Multiply your final grade (out of 7) by 7 and divide by the maximum possible grade (42) to convert to percentage.
+   - Example: If you scored 30 out of 42, your percentage = (30 * 7) / 42 = 50%.
+
+3. **IGSC (International General Certificate of Secondary Education)**:
+   - Use your final percentage score as given in your board exam results.
+   - If a percentage isn’t available, use the following formula: \(\text{{IB Score}} \times 2.5\) to get an estimated percentage.
+
+4. **AP (Advanced Placement)**: Enter the average of your AP test scores in percentage form. Divide the total score by 5 (maximum score per AP exam is 5).
+
+You can then enter your percentage score in the corresponding fields for Class 9-12. 
+"""
+
+# ─────────────────────────────────────────────
+# Next steps + counselling call-to-action (after results)
+# ─────────────────────────────────────────────
+NEXT_STEPS_MD = """
+    ### 📞 Next Steps:
+    Connect with our Senior Counsellor to receive a detailed assessment report, including an explanation and analysis to determine the best path toward these universities, along with a FREE roadmap for studying a bachelor's abroad.
+    """
+
+COUNSELLING_HTML = """
+        <style>
+        .left-align-button {
+            text-align: left;
+            margin-top: 20px;
+            margin-left: 0;
+        }
+
+        .professional-btn {
+            background: linear-gradient(90deg, #1E88E5, #1565C0);
+            color: white !important;
+            padding: 14px 28px;
+            font-size: 16px;
+            font-weight: 600;
+            border-radius: 10px;
+            border: none;
+            text-decoration: none !important;
+            display: inline-block;
+            transition: background 0.3s ease, transform 0.2s ease;
+            box-shadow: 0 4px 12px rgba(30, 136, 229, 0.3);
+        }
+
+        .professional-btn:hover {
+            background: linear-gradient(90deg, #1565C0, #0D47A1);
+            transform: translateY(-2px);
+            box-shadow: 0 6px 18px rgba(13, 71, 161, 0.4);
+            text-decoration: none !important;
+        }
+
+        a.professional-btn:link,
+        a.professional-btn:visited,
+        a.professional-btn:hover,
+        a.professional-btn:active {
+            text-decoration: none !important;
+            color: white !important;
+        }
+        </style>
+
+        <div class="left-align-button">
+            <a href="https://calendly.com/ugadmissions-yocket/university-readiness-counselling-booking" target="_blank" class="professional-btn">
+                📞 Book Your FREE 1-1 Counselling Call
+            </a>
+        </div>
+    """
@@ -0,0 +1,328 @@
+"""What-if sweeps: Ambitious/Target/Safe for every point of an input grid.
+
+For planning dashboards: which regions of, say, (Class 12 %, SAT, LORs,
+extra-curriculars) put each university in which bucket.  Every grid point is
+one student whose other inputs are fixed at ``base``; the sweep scores it with
+the same ``weighted_totals`` + ``round1`` arithmetic as ``CountryWeights.scores``
+and buckets it with the same anchor rule as ``engine.bucket_universities``, so
+each point's buckets are exactly those ``engine.predict`` would return.
+
+Points are processed in blocks with no per-point Python: a block's gaps form a
+``(points, universities)`` array, the anchor comes from a row-wise min/max,
+and each row's gap view from one integer sort (gap descending, then workbook
+row, blank required scores last; the key also carries the column, so no
+argsort is needed).  Blocks are spread over a process pool; each worker
+writes its block straight into the output, a ``.npy`` file opened as a memory
+map, so results never travel back through the pool.
+
+Output: ``slots`` of shape ``grid + (SLOTS,)``, int32 ``uni_df`` row positions
+(``-1`` where the bucket has fewer rows).  Slot ``BUCKET_SLOTS[bucket]`` hold
+that bucket's rows in gap-view order.  A JSON sidecar (``<out>.json``) records
+the axes, base inputs, countries and dataset hash; ``open_sweep`` reads both.
+
+Usage::
+
+    python -m college_predictor sweep out.npy [--axis class12=0:100:1 --axis sat=400:1600:10
+        --axis n_lor=0:3:1 --axis ec=0:3:1] [--base class9=85 ...] [--countries UK;USA]
+        [--workers 4] [--block 4096] [--summary summary.csv]
+
+Axes and ``--base`` use ``engine.build_user_profile``'s argument names
+(``ap_scores`` as ``;``-separated scores in ``--base`` only).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from .data import EXCEL_PATH, load_dataset, map_country
+from .engine import ALL, build_user_profile, selection_mask
+from .index import BUCKET_OFFSETS
+from .scoring import FEATURE_KEYS, round1, weighted_totals
+
+# build_user_profile argument -> the feature it sets
+AXES = {
+    "class9": "Class 9", "class10": "Class 10", "class11": "Class 11", "class12": "Class 12",
+    "sat": "SAT", "cc": "CC", "ec": "EC", "internships": "Internship",
+    "community": "Community", "research": "Research", "n_lor": "LOR",
+}
+# The form's starting values
+DEFAULT_BASE = dict(class9=0, class10=0, class11=0, class12=0, sat=400, ap_scores=(),
+                    cc=0, ec=0, internships=0, community=False, research=False, n_lor=0)
+DEFAULT_AXES = {"class12": (0, 100, 1), "sat": (400, 1600, 10), "n_lor": (0, 3, 1),
+                "ec": (0, 3, 1)}
+BLOCK = 4096
+_LIMIT = 10**7   # bound on |gap| in tenths; keys stay far inside int64
+
+_BEFORE = -min(o.start for o in BUCKET_OFFSETS.values())    # rows above the anchor
+_AFTER  = max(o.stop for o in BUCKET_OFFSETS.values())      # anchor + rows below
+SLOTS   = _BEFORE + _AFTER
+BUCKET_SLOTS = {b: slice(o.start + _BEFORE, o.stop + _BEFORE) for b, o in BUCKET_OFFSETS.items()}
+
+
+@dataclass(frozen=True)
+class _Plan:
+    """Everything a worker needs, as plain arrays."""
+    shape: tuple             # grid shape
+    base: np.ndarray         # (n_features,) normalised base profile
+    columns: tuple           # feature column set by each axis
+    values: tuple            # normalised values of each axis
+    matrix: np.ndarray       # weights of the selected College_Finder rows
+    country: np.ndarray      # per university in view: its row of ``matrix``
+    required: np.ndarray     # per university in view
+    rows: np.ndarray         # per university in view: uni_df position
+
+
+def axis_values(start, stop, step):
+    """Inclusive ``start..stop`` in ``step``\\ s."""
+    return np.arange(start, stop + step / 2, step).tolist()
+
+
+def _plan(dataset, axes, base, sel):
+    base = {**DEFAULT_BASE, **base}
+    vector = np.array([build_user_profile(**base)[k] for k in FEATURE_KEYS])
+    columns, values = [], []
+    for name, raw in axes.items():
+        if name not in AXES:
+            raise ValueError(f"cannot sweep {name!r}; choose from {', '.join(AXES)}")
+        # The form's own normalisation, value by value
+        values.append(np.array([build_user_profile(**{**base, name: v})[AXES[name]]
+                                for v in raw], dtype=np.float64))
+        columns.append(FEATURE_KEYS.index(AXES[name]))
+
+    # Universities of the selected countries, in workbook order (as in
+    # gap_analysis, a duplicated country scores with its last row)
+    prof = np.flatnonzero(selection_mask(dataset, sel))
+    last = {c: i for i, c in enumerate(dataset.weights.countries[prof])}
+    country = map_country(dataset.uni_df["Country"], last)
+    rows = np.flatnonzero(~np.isnan(country))
+    return _Plan(
+        shape=tuple(len(v) for v in values), base=vector, columns=tuple(columns),
+        values=tuple(values), matrix=dataset.weights.matrix[prof],
+        country=country[rows].astype(np.int64),
+        required=dataset.uni_df["Required Profile Score"].to_numpy(dtype=np.float64)[rows],
+        rows=rows,
+    )
+
+
+def sweep_block(plan, start, stop):
+    """``(stop - start, SLOTS)`` uni_df rows for flat grid points ``start..stop``."""
+    n, m = stop - start, len(plan.rows)
+    if not m:
+        return np.full((n, SLOTS), -1, dtype=np.int32)
+    users = np.tile(plan.base, (n, 1))
+    for col, values, at in zip(plan.columns, plan.values,
+                               np.unravel_index(np.arange(start, stop), plan.shape)):
+        users[:, col] = values[at]
+    scores = round1(weighted_totals(users, plan.matrix) * 100)[:, plan.country]
+    # Gap in tenths as an exact integer: np.round(gap, 1) is rint(gap * 10) / 10
+    tenths = plan.required - scores
+    tenths *= 10
+    np.rint(tenths, out=tenths)
+    blank = np.isnan(tenths)
+    tenths[blank] = 0
+    tenths = tenths.astype(np.int64)
+    # Anchor: the smallest positive gap, else the largest gap
+    pos = ~blank & (tenths > 0)
+    anchor = np.where(pos.any(axis=1), np.where(pos, tenths, _LIMIT).min(axis=1),
+                      np.where(blank, -_LIMIT, tenths).max(axis=1))
+    above = ~blank & (tenths > anchor[:, None])
+
+    # Gap-view order as one integer per university, which also encodes its
+    # column: gap descending, blank required scores last, ties by workbook row
+    key  = (np.where(blank, _LIMIT, -tenths) + _LIMIT) * m + np.arange(m)
+    view = np.sort(key, axis=1)
+    # The anchor sits right after the rows above it; gather the slots around it
+    at = above.sum(axis=1)[:, None] + np.arange(-_BEFORE, _AFTER)
+    cols = np.take_along_axis(view, np.clip(at, 0, m - 1), axis=1) % m
+    out = np.where((at >= 0) & (at < m), plan.rows[cols], -1).astype(np.int32)
+    out[blank.all(axis=1)] = -1          # no university has a gap: no buckets
+    return out
+
+
+# ─────────────────────────────────────────────
+# Driver
+# ─────────────────────────────────────────────
+_worker = None   # (plan, output memmap) in each pool process
+
+
+def _init_worker(plan, out):
+    global _worker
+    _worker = None if plan is None else (plan, np.load(out, mmap_mode="r+"))
+
+
+def _run_block(start, stop):
+    plan, slots = _worker
+    flat = slots.reshape(-1, SLOTS)
+    flat[start:stop] = sweep_block(plan, start, stop)
+    return stop - start
+
+
+def _sidecar(path):
+    return f"{path}.json"
+
+
+def sweep(out, axes=None, base=None, sel=(ALL,), dataset=None, workers=None, block=BLOCK,
+          progress=None):
+    """Bucket every point of the grid ``axes`` (``{argument: values}``, default
+    ``DEFAULT_AXES``) into the ``.npy`` file ``out``.
+
+    ``workers`` processes (default: one per CPU; 0 or 1 runs in-process) each
+    take ``block`` points at a time.  ``progress(done, total)`` is called as
+    blocks finish.  Returns timing stats.
+    """
+    dataset = dataset or load_dataset(EXCEL_PATH)
+    if axes is None:
+        axes = {name: axis_values(*r) for name, r in DEFAULT_AXES.items()}
+    axes = {name: list(values) for name, values in axes.items()}
+    base = dict(base or {})
+    plan = _plan(dataset, axes, base, sel)
+    total = int(np.prod(plan.shape))
+    slots = open_memmap(out, "w+", np.int32, plan.shape + (SLOTS,))
+    del slots   # sized on disk; the workers fill it block by block
+
+    t0 = time.perf_counter()
+    workers = os.cpu_count() if workers is None else workers
+    spans = [(s, min(s + block, total)) for s in range(0, total, block)]
+    done = 0
+    if workers <= 1:
+        _init_worker(plan, out)
+        try:
+            for span in spans:
+                done += _run_block(*span)
+                if progress:
+                    progress(done, total)
+        finally:
+            _init_worker(None, out)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(plan, out)) as pool:
+            for future in as_completed([pool.submit(_run_block, *span) for span in spans]):
+                done += future.result()
+                if progress:
+                    progress(done, total)
+    elapsed = time.perf_counter() - t0
+
+    unis = dataset.uni_df
+    with open(_sidecar(out), "w") as fh:
+        json.dump({
+            "axes": axes,
+            "base": {k: list(v) if isinstance(v, tuple) else v for k, v in base.items()},
+            "countries": list(sel),
+            "dataset": {"path": dataset.path, "content_hash": dataset.content_hash},
+            "buckets": {b: [s.start, s.stop] for b, s in BUCKET_SLOTS.items()},
+            "universities": [[int(r), str(unis["University"].iat[r]), str(unis["Country"].iat[r])]
+                             for r in plan.rows],
+        }, fh)
+    return {"points": total, "universities": len(plan.rows), "workers": max(workers, 1),
+            "block": block, "seconds": elapsed, "points_per_second": total / elapsed}
+
+
+# ─────────────────────────────────────────────
+# Reading a sweep
+# ─────────────────────────────────────────────
+class Sweep:
+    """A finished sweep: ``slots`` (memory-mapped) plus its sidecar metadata."""
+
+    def __init__(self, path):
+        with open(_sidecar(path)) as fh:
+            meta = json.load(fh)
+        self.slots     = np.load(path, mmap_mode="r")
+        self.axes      = meta["axes"]
+        self.base      = meta["base"]
+        self.countries = meta["countries"]
+        self.dataset   = meta["dataset"]
+        self.buckets   = {b: slice(*s) for b, s in meta["buckets"].items()}
+        self.universities = pd.DataFrame(meta["universities"],
+                                         columns=["Row", "University", "Country"]).set_index("Row")
+
+    def _rows(self, university, country=None):
+        unis = self.universities
+        hit = unis["University"] == university
+        if country is not None:
+            hit &= unis["Country"] == country
+        return unis.index[hit].to_numpy()
+
+    def region(self, university, bucket, country=None):
+        """Boolean grid: the points where ``university`` lands in ``bucket``."""
+        rows = self._rows(university, country)
+        return np.isin(self.slots[..., self.buckets[bucket]], rows).any(axis=-1)
+
+    def summary(self, chunk=1 << 16):
+        """Points per university and bucket, one row per university in view."""
+        flat = self.slots.reshape(-1, self.slots.shape[-1])
+        size = int(self.universities.index.to_numpy().max(initial=-1)) + 2   # -1 -> bin 0
+        counts = {b: np.zeros(size, dtype=np.int64) for b in self.buckets}
+        for start in range(0, len(flat), chunk):
+            part = flat[start:start + chunk]
+            for b, cols in self.buckets.items():
+                counts[b] += np.bincount(part[:, cols].ravel() + 1, minlength=size)
+        out = self.universities.copy()
+        for b, c in counts.items():
+            out[b] = c[out.index.to_numpy() + 1]
+        return out.reset_index()
+
+
+def open_sweep(path):
+    """The sweep written to ``path`` by ``sweep``."""
+    return Sweep(path)
+
+
+# ─────────────────────────────────────────────
+# Command line
+# ─────────────────────────────────────────────
+def _parse_axis(text):
+    name, _, spec = text.partition("=")
+    try:
+        start, stop, step = (float(x) for x in spec.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected name=start:stop:step, got {text!r}")
+    return name, axis_values(start, stop, step)
+
+
+def _parse_base(text):
+    name, _, value = text.partition("=")
+    if name == "ap_scores":
+        return name, tuple(float(x) for x in value.split(";") if x)
+    if name in ("community", "research"):
+        return name, value.lower() in ("1", "true", "yes")
+    return name, float(value)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="python -m college_predictor sweep",
+        description="Ambitious/Target/Safe buckets over a grid of student inputs.")
+    ap.add_argument("out", help="output .npy file (a <out>.json sidecar is written next to it)")
+    ap.add_argument("--axis", type=_parse_axis, action="append",
+                    help="swept input as name=start:stop:step (repeatable; default "
+                         + " ".join(f"{n}={a}:{b}:{c}" for n, (a, b, c) in DEFAULT_AXES.items())
+                         + ")")
+    ap.add_argument("--base", type=_parse_base, action="append", default=[],
+                    help="fixed input as name=value (repeatable)")
+    ap.add_argument("--countries", default=ALL, help="';'-separated countries (default: All)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    ap.add_argument("--block", type=int, default=BLOCK, help="points per task")
+    ap.add_argument("--summary", help="optional CSV of points per university and bucket")
+    ap.add_argument("--workbook", default=EXCEL_PATH,
+                    help="xlsx workbook or ingest store directory")
+    args = ap.parse_args(argv)
+
+    stats = sweep(args.out, axes=dict(args.axis) if args.axis else None, base=dict(args.base),
+                  sel=tuple(args.countries.split(";")), dataset=load_dataset(args.workbook),
+                  workers=args.workers, block=args.block)
+    if args.summary:
+        open_sweep(args.out).summary().to_csv(args.summary, index=False)
+    print(f"Swept {stats['points']:,} points x {stats['universities']} universities in "
+          f"{stats['seconds']:.1f}s ({stats['points_per_second']:,.0f} points/s, "
+          f"{stats['workers']} workers) -> {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
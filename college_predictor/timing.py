@@ -0,0 +1,193 @@
+"""Per-stage latency (and optional memory) instrumentation.
+
+Code marks its stages with ``with stage("name"):``.  Instrumentation is off
+unless ``enable()`` is called or ``COLLEGE_PREDICTOR_PROFILE`` is set in the
+environment (``1`` for timings, ``memory`` to also trace allocations); while
+off, ``stage`` returns a shared no-op context manager, so a marked stage costs
+a function call and an empty ``with`` (a few hundred nanoseconds).
+
+With memory tracing on, ``tracemalloc`` runs for the whole process and stages
+opened with ``memory=True`` also record how much their allocations grew the
+traced total and the peak reached inside them.  The tracer is process-wide,
+so stages running concurrently in other threads show up in each other's
+numbers.  Tracing slows Python allocation noticeably, so it is meant for
+profiling sessions only.
+
+Results are kept per stage (count, total, max, last), per session (number of
+reruns and stage counts) and as a bounded list of raw events, and can be
+exported as Prometheus text or JSONL.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import nullcontext
+
+ENV_VAR = "COLLEGE_PREDICTOR_PROFILE"
+METRIC_PREFIX = "college_predictor"
+
+_NULL = nullcontext()
+_recorder = None
+_local = threading.local()
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "max", "last", "mem_count", "mem_total", "mem_peak")
+
+    def __init__(self):
+        self.count = self.mem_count = 0
+        self.total = self.max = self.last = 0.0
+        self.mem_total = self.mem_peak = 0
+
+
+class Recorder:
+    """Thread-safe store of stage timings, session counts and raw events."""
+
+    def __init__(self, memory=False, max_events=10_000):
+        self.memory  = memory
+        self._lock   = threading.Lock()
+        self._stages = defaultdict(_StageStats)
+        self._sessions = defaultdict(lambda: defaultdict(int))   # session -> name -> count
+        self._events = deque(maxlen=max_events)
+
+    def record(self, name, seconds, mem_delta=None, mem_peak=None):
+        session = getattr(_local, "session", None)
+        event = {"ts": time.time(), "stage": name, "seconds": seconds, "session": session}
+        with self._lock:
+            st = self._stages[name]
+            st.count += 1
+            st.total += seconds
+            st.max    = max(st.max, seconds)
+            st.last   = seconds
+            if mem_delta is not None:
+                st.mem_count += 1
+                st.mem_total += mem_delta
+                st.mem_peak   = max(st.mem_peak, mem_peak)
+                event.update(mem_delta=mem_delta, mem_peak=mem_peak)
+            if session is not None:
+                self._sessions[session][name] += 1
+            self._events.append(event)
+
+    def begin_rerun(self, session):
+        """Attribute this thread's following stages to ``session``."""
+        _local.session = session
+        with self._lock:
+            self._sessions[session]["reruns"] += 1
+
+    def stage_stats(self):
+        """One dict per stage, in first-seen order."""
+        with self._lock:
+            return [{"stage": name, "count": s.count, "total_s": s.total,
+                     "mean_ms": s.total / s.count * 1000, "max_ms": s.max * 1000,
+                     "last_ms": s.last * 1000,
+                     "mem_delta_mean_kib": (s.mem_total / s.mem_count / 1024
+                                            if s.mem_count else None),
+                     "mem_peak_kib": s.mem_peak / 1024 if s.mem_count else None}
+                    for name, s in self._stages.items()]
+
+    def session_stats(self):
+        with self._lock:
+            return {session: dict(counts) for session, counts in self._sessions.items()}
+
+    def prometheus(self):
+        """Prometheus text exposition of the stage and session metrics."""
+        p = METRIC_PREFIX
+        lines = [f"# TYPE {p}_stage_seconds summary",
+                 f"# TYPE {p}_stage_seconds_max gauge",
+                 f"# TYPE {p}_stage_memory_delta_bytes summary",
+                 f"# TYPE {p}_stage_memory_peak_bytes gauge"]
+        with self._lock:
+            for name, s in self._stages.items():
+                label = '{stage="%s"}' % name.replace("\\", "\\\\").replace('"', '\\"')
+                lines += [f"{p}_stage_seconds_count{label} {s.count}",
+                          f"{p}_stage_seconds_sum{label} {s.total!r}",
+                          f"{p}_stage_seconds_max{label} {s.max!r}"]
+                if s.mem_count:
+                    lines += [f"{p}_stage_memory_delta_bytes_count{label} {s.mem_count}",
+                              f"{p}_stage_memory_delta_bytes_sum{label} {s.mem_total}",
+                              f"{p}_stage_memory_peak_bytes{label} {s.mem_peak}"]
+            reruns = sum(c.get("reruns", 0) for c in self._sessions.values())
+            lines += [f"# TYPE {p}_sessions gauge", f"{p}_sessions {len(self._sessions)}",
+                      f"# TYPE {p}_reruns_total counter", f"{p}_reruns_total {reruns}"]
+        return "\n".join(lines) + "\n"
+
+    def jsonl(self):
+        """The retained raw events, one JSON object per line."""
+        with self._lock:
+            events = list(self._events)
+        return "".join(json.dumps(e) + "\n" for e in events)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._sessions.clear()
+            self._events.clear()
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "memory", "t0", "mem0")
+
+    def __init__(self, recorder, name, memory):
+        self.recorder = recorder
+        self.name     = name
+        self.memory   = memory and recorder.memory and tracemalloc.is_tracing()
+
+    def __enter__(self):
+        if self.memory:
+            # Nested memory stages share the tracer's single peak counter
+            self.mem0 = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.recorder.record(self.name, seconds, current - self.mem0, peak - self.mem0)
+        else:
+            self.recorder.record(self.name, seconds)
+        return False
+
+
+def stage(name, memory=False):
+    """Context manager timing ``name``; a no-op while instrumentation is off."""
+    if _recorder is None:
+        return _NULL
+    return _Stage(_recorder, name, memory)
+
+
+def begin_rerun(session):
+    """Count a rerun of ``session`` and attribute this thread's stages to it."""
+    if _recorder is not None:
+        _recorder.begin_rerun(session)
+
+
+def enable(memory=False, max_events=10_000):
+    """Turn instrumentation on (idempotent) and return the recorder."""
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder(memory, max_events)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _recorder.memory = _recorder.memory or memory
+    return _recorder
+
+
+def disable():
+    global _recorder
+    _recorder = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def recorder():
+    """The active ``Recorder``, or ``None`` while instrumentation is off."""
+    return _recorder
+
+
+_mode = os.environ.get(ENV_VAR, "").strip().lower()
+if _mode and _mode not in ("0", "false", "no", "off"):
+    enable(memory=_mode == "memory")
@@ -0,0 +1,137 @@
+"""What-if sensitivity: how each form input moves each country score.
+
+A country's Total Profile % is linear in the normalised profile,
+``100 * sum(weight[country, k] * raw[k] / scale[k])``, so the marginal effect
+of one unit of a raw input on every country is just the weight matrix scaled
+column-wise; no rescoring is needed.  From the same matrix, the change to a
+single input that closes a university's gap is ``gap / gradient``, computed
+for every university and input in one broadcast, then confirmed one step
+either side by rescoring exactly (a loop over the inputs, not universities), so
+``round1`` boundaries never leave a change one step off.
+
+Changes are reported in the input's own units (percentage points, SAT points,
+AP average, counts), rounded up to the smallest change the form allows and
+left blank when the input cannot close the gap within its range.  The gap counts as closed once
+the rounded score reaches the requirement, as in the gap view.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .data import map_country
+from .engine import ALL, gap_analysis, score_countries
+from .index import GAP_COLS
+from .scoring import FEATURE_KEYS, round1, user_vector, weighted_totals
+
+
+@dataclass(frozen=True)
+class Input:
+    label: str     # column heading
+    arg: str       # build_user_profile argument
+    feature: str   # FEATURE_KEYS entry it feeds
+    scale: float   # raw units per 1.0 of the normalised feature
+    lo: float
+    hi: float
+    step: float    # smallest change the form allows (see input_steps)
+
+
+INPUTS = (
+    Input("Class 9 %",   "class9",      "Class 9",    100,  0,   100,  1),
+    Input("Class 10 %",  "class10",     "Class 10",   100,  0,   100,  1),
+    Input("Class 11 %",  "class11",     "Class 11",   100,  0,   100,  1),
+    Input("Class 12 %",  "class12",     "Class 12",   100,  0,   100,  1),
+    Input("SAT",         "sat",         "SAT",        1600, 400, 1600, 1),
+    Input("AP average",  "ap_average",  "AP",         5,    0,   5,    0.1),
+    Input("CC",          "cc",          "CC",         3,    0,   3,    1),
+    Input("EC",          "ec",          "EC",         3,    0,   3,    1),
+    Input("Internships", "internships", "Internship", 2,    0,   2,    1),
+    Input("Community",   "community",   "Community",  1,    0,   1,    1),
+    Input("Research",    "research",    "Research",   1,    0,   1,    1),
+    Input("LORs",        "n_lor",       "LOR",        3,    0,   3,    1),
+)
+
+_COLUMNS = [FEATURE_KEYS.index(i.feature) for i in INPUTS]
+_SCALES  = np.array([i.scale for i in INPUTS], dtype=np.float64)
+_HIGHS   = np.array([i.hi for i in INPUTS], dtype=np.float64)
+
+
+def current_values(inputs):
+    """Raw values of ``INPUTS`` from ``build_user_profile`` keyword arguments."""
+    ap = inputs.get("ap_scores") or ()
+    values = dict(inputs, ap_average=sum(ap) / len(ap) if ap else 0.0)
+    return np.array([float(values.get(i.arg, 0) or 0) for i in INPUTS])
+
+
+def input_steps(inputs):
+    """Smallest change of each of ``INPUTS`` the form allows.
+
+    AP scores move in steps of 0.1, so their average moves in 0.1 / (number of
+    APs).
+    """
+    n_ap = len(inputs.get("ap_scores") or ())
+    return np.array([i.step / n_ap if i.arg == "ap_average" and n_ap else i.step
+                     for i in INPUTS], dtype=np.float64)
+
+
+def gradients(dataset, sel=(ALL,)):
+    """Total Profile % points gained per unit of each input, per selected country."""
+    matrix = dataset.weights.matrix[:, _COLUMNS] * 100 / _SCALES
+    frame = pd.DataFrame(matrix, columns=[i.label for i in INPUTS],
+                         index=dataset.weights.index)
+    country = dataset.profile_df["Country"]
+    mask = np.ones(len(frame), dtype=bool) if ALL in sel else country.isin(sel).to_numpy()
+    frame.insert(0, "Country", country)
+    return frame[mask].reset_index(drop=True)
+
+
+def gap_closers(dataset, user_profile, inputs, sel=(ALL,)):
+    """Gap view plus, per input, the change that alone closes each positive gap.
+
+    ``user_profile`` is the normalised profile the scores come from, ``inputs``
+    the raw ``build_user_profile`` arguments it was built from.
+    """
+    country_scores = score_countries(dataset, user_profile, sel)
+    view = gap_analysis(dataset.uni_df, country_scores)
+    weights = dataset.weights
+    # Row of each university's country in the weight matrix (last duplicate wins,
+    # as in the score map)
+    code = {c: i for i, c in enumerate(weights.countries)}
+    rows = map_country(view["Country"], code).astype(np.int64)
+    grad = weights.matrix[rows][:, _COLUMNS] * 100 / _SCALES          # (n_uni, n_inputs)
+    # Unrounded scores: the gap closes once the *rounded* score reaches the
+    # requirement, i.e. a little before the rounded gap suggests.
+    vector = user_vector(user_profile)
+    score = (weighted_totals(vector, weights.matrix) * 100)[rows][:, None]
+    req   = view["Required Profile Score"].to_numpy(dtype=np.float64)[:, None]
+    gap   = view["Gap %"].to_numpy(dtype=np.float64)[:, None]
+    open_ = (gap > 0) & (grad > 0)
+    raw   = current_values(inputs)
+    steps = input_steps(inputs)
+    w_uni = weights.matrix[rows]
+
+    def closes(delta):
+        # Exact rescoring (same accumulation order as CountryWeights.scores) of
+        # each university's country with one input changed by delta[:, j]
+        out = np.zeros(delta.shape, dtype=bool)
+        for j, col in enumerate(_COLUMNS):
+            users = np.repeat(vector[None, :], len(rows), axis=0)
+            users[:, col] = (raw[j] + np.nan_to_num(delta[:, j])) / _SCALES[j]
+            total = users[:, 0] * w_uni[:, 0]
+            for f in range(1, users.shape[1]):
+                total += users[:, f] * w_uni[:, f]
+            out[:, j] = round1(total * 100) >= req[:, 0]
+        return out
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        needed = np.ceil(np.round((req - 0.05 - score) / grad / steps, 9)) * steps
+        needed = np.where(open_, np.maximum(needed, steps), np.nan)
+        # One step either way settles rounding at the .x5 boundary
+        lower  = needed - steps
+        needed = np.where(open_ & (lower > 0) & closes(lower), lower, needed)
+        needed = np.where(open_ & ~closes(needed), needed + steps, needed)
+    room   = _HIGHS - raw
+    needed = np.where(needed > room + 1e-9, np.nan, needed)
+    needed = np.where(gap <= 0, 0.0, needed)
+    closers = pd.DataFrame(needed, columns=[f"+{i.label}" for i in INPUTS])
+    return pd.concat([view[GAP_COLS], closers], axis=1)
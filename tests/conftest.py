@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from college_predictor.data import EXCEL_PATH, load_dataset  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """The shipped workbook."""
+    return load_dataset(os.path.join(ROOT, EXCEL_PATH))
@@ -0,0 +1,132 @@
+"""``IncrementalPredictor`` must give exactly what ``engine.predict`` gives."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from college_predictor.engine import ALL, build_user_profile, predict
+from college_predictor.incremental import IncrementalPredictor
+
+BASE = dict(class9=85, class10=70, class11=80, class12=90, sat=1400, ap_scores=[4.5, 5.0],
+            cc=1, ec=2, internships=1, community=True, research=False, n_lor=2)
+EDITS = [
+    ("class9", 86), ("class10", 40), ("class11", 100), ("class12", 0), ("sat", 1401),
+    ("sat", 400), ("ap_scores", [4.5, 4.9]), ("ap_scores", []), ("cc", 3), ("ec", 0),
+    ("internships", 2), ("community", False), ("research", True), ("n_lor", 0),
+]
+
+
+def assert_same(got, want):
+    pd.testing.assert_frame_equal(got.country_scores, want.country_scores)
+    for name in ("ambitious", "target", "safe"):
+        pd.testing.assert_frame_equal(getattr(got, name), getattr(want, name))
+    np.testing.assert_array_equal(got.code_scores, want.code_scores)
+    assert got.dataset_version == want.dataset_version
+
+
+def check(predictor, dataset, inputs, sel):
+    up = build_user_profile(**inputs)
+    assert_same(predictor.predict(up, sel), predict(up, sel, dataset))
+
+
+@pytest.mark.parametrize("sel", [(ALL,), ("UK", "USA"), ("Japan",)])
+def test_single_field_edits(dataset, sel):
+    predictor = IncrementalPredictor(dataset)
+    check(predictor, dataset, BASE, sel)
+    for field, value in EDITS:
+        check(predictor, dataset, dict(BASE, **{field: value}), sel)   # edit ...
+        check(predictor, dataset, BASE, sel)                           # ... and back
+
+
+def test_edits_accumulate(dataset):
+    predictor, inputs = IncrementalPredictor(dataset), dict(BASE)
+    for field, value in EDITS:
+        inputs[field] = value
+        check(predictor, dataset, inputs, (ALL,))
+
+
+def test_country_toggles(dataset):
+    predictor, sel = IncrementalPredictor(dataset), ["UK"]
+    check(predictor, dataset, BASE, tuple(sel))
+    for country in ("USA", "Canada", "Germany"):
+        sel.append(country)
+        check(predictor, dataset, BASE, tuple(sel))
+    for country in ("UK", "Canada"):
+        sel.remove(country)
+        check(predictor, dataset, BASE, tuple(sel))
+    check(predictor, dataset, BASE, tuple(sel) + (ALL,))
+    check(predictor, dataset, BASE, ())
+
+
+def test_noop_rerun_recomputes_nothing(dataset):
+    predictor = IncrementalPredictor(dataset)
+    up = build_user_profile(**BASE)
+    first = predictor.predict(up, ("UK", "USA"))
+    before = dict(predictor.stats)
+    again = predictor.predict(dict(up), ["UK", "USA"])   # equal values, new objects
+    assert dict(predictor.stats) == before
+    assert_same(again, first)
+
+
+def test_form_change_with_the_same_profile_recomputes_nothing(dataset):
+    # Reordered AP scores: a different form, the same normalised profile
+    predictor = IncrementalPredictor(dataset)
+    check(predictor, dataset, BASE, ("UK",))
+    before = dict(predictor.stats)
+    check(predictor, dataset, dict(BASE, ap_scores=[5.0, 4.5]), ("UK",))
+    assert dict(predictor.stats) == before
+
+
+def test_selection_change_does_not_rescore(dataset):
+    predictor = IncrementalPredictor(dataset)
+    check(predictor, dataset, BASE, ("UK",))
+    scores = predictor.stats["scores"]
+    check(predictor, dataset, BASE, ("UK", "USA"))
+    check(predictor, dataset, BASE, (ALL,))
+    assert predictor.stats["scores"] == scores
+
+
+@pytest.mark.parametrize("sel", [("UAE",), ("UAE", "UK"), ("Atlantis",), ("Atlantis", "UK")])
+def test_countries_without_universities(dataset, sel):
+    # UAE has weights but no universities; Atlantis is not in the workbook
+    assert "UAE" in set(dataset.profile_df["Country"])
+    assert "UAE" not in set(dataset.uni_df["Country"].astype(str))
+    predictor = IncrementalPredictor(dataset)
+    check(predictor, dataset, BASE, sel)
+    check(predictor, dataset, dict(BASE, sat=1500), sel)
+    check(predictor, dataset, BASE, (ALL,))
+    check(predictor, dataset, BASE, sel)
+
+
+def test_random_sessions(dataset):
+    rng = np.random.default_rng(0)
+    countries = sorted(set(dataset.profile_df["Country"])) + ["Atlantis"]
+    predictor, inputs, sel = IncrementalPredictor(dataset), dict(BASE), [ALL]
+    for _ in range(300):
+        if rng.random() < 0.3:
+            country = str(rng.choice(countries))
+            sel = [c for c in sel if c != country] if country in sel else sel + [country]
+        else:
+            field, value = EDITS[rng.integers(len(EDITS))]
+            inputs[field] = value if rng.random() < 0.5 else BASE[field]
+        check(predictor, dataset, inputs, tuple(sel))
+
+
+def test_single_field_edits_are_rank1_updates(dataset):
+    predictor = IncrementalPredictor(dataset)
+    check(predictor, dataset, BASE, (ALL,))
+    for field, value in EDITS:
+        check(predictor, dataset, dict(BASE, **{field: value}), (ALL,))
+    assert predictor.stats["full_rescores"] == 1
+    assert predictor.stats["rank1_updates"] == len(EDITS)
+
+
+def test_long_rank1_sessions_stay_exact(dataset):
+    # Many updates without an exact rescore, across every SAT value
+    predictor = IncrementalPredictor(dataset, exact_every=10 ** 6)
+    weights = dataset.weights
+    for sat in list(range(400, 1601)) + list(range(1600, 399, -7)):
+        up = build_user_profile(**dict(BASE, sat=sat))
+        predictor.predict(up)
+        np.testing.assert_array_equal(predictor._totals.value[1], weights.scores(up))
+    assert predictor.stats["full_rescores"] == 1
+    assert predictor.stats["boundary_rows"] > 0
@@ -0,0 +1,74 @@
+"""PDF reports: the background renderer's caching and bulk report file names."""
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from college_predictor import report
+from college_predictor.engine import build_user_profile, predict
+from college_predictor.report import ReportRenderer
+
+INPUTS = dict(class9=85, class10=70, class11=80, class12=90, sat=1400)
+
+
+@pytest.fixture
+def renderer():
+    renderer = ReportRenderer(ThreadPoolExecutor(1))
+    yield renderer
+    renderer.shutdown()
+
+
+def test_a_failed_render_is_not_repeated(renderer):
+    calls = []
+
+    def render():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    first = renderer.submit("key", render)
+    assert isinstance(first.exception(timeout=10), RuntimeError)
+    renderer.shutdown()   # _finish has run once the executor is idle
+    again = renderer.submit("key", render)
+    assert again.done() and isinstance(again.exception(), RuntimeError)
+    assert calls == [1]
+    assert renderer.stats()["failed"] == 1
+
+
+def test_a_rendered_pdf_is_cached(renderer):
+    assert renderer.submit("key", lambda: b"%PDF").result(timeout=10) == b"%PDF"
+    renderer.shutdown()
+    assert renderer.submit("key", lambda: b"other").result() == b"%PDF"
+
+
+def test_submit_report_builds_the_gap_view_in_the_worker(dataset, monkeypatch):
+    gate = threading.Event()
+    renderer = ReportRenderer(ThreadPoolExecutor(1))
+    renderer.submit("blocker", gate.wait)   # keeps the pool busy
+    monkeypatch.setattr(report, "_renderer", renderer)
+    user_profile = build_user_profile(**INPUTS)
+    prediction = predict(user_profile, dataset=dataset)
+    future = report.submit_report(prediction, user_profile, ["UK"])
+    assert "gap_view" not in prediction.__dict__
+    gate.set()
+    assert future.result(timeout=60).startswith(b"%PDF")
+    assert "gap_view" in prediction.__dict__
+    renderer.shutdown()
+
+
+@pytest.mark.parametrize("out", ["reports", "reports.zip"])
+def test_student_ids_that_sanitise_alike_get_their_own_report(tmp_path, dataset, out):
+    students = tmp_path / "students.csv"
+    pd.DataFrame({"Student ID": ["a/b", "a_b", "a b", "c"], "Class 12": 90,
+                  "SAT": [1000, 1100, 1200, 1300]}).to_csv(students, index=False)
+    out = str(tmp_path / out)
+    stats = report.render_cohort(str(students), out, workers=1, dataset=dataset)
+    names = (set(zipfile.ZipFile(out).namelist()) if out.endswith(".zip")
+             else set(os.listdir(out)))
+    assert stats.rendered == 4
+    assert names == {"a_b.pdf", "a_b-2.pdf", "a_b-3.pdf", "c.pdf"}
+    # A resumed run maps every student to the name it had
+    stats = report.render_cohort(str(students), out, workers=1, dataset=dataset)
+    assert (stats.rendered, stats.skipped) == (0, 4)
@@ -0,0 +1,41 @@
+"""Predictions made by the service's worker processes must reach the result log."""
+import json
+import os
+
+import pytest
+
+from college_predictor import results
+from college_predictor.data import EXCEL_PATH
+from college_predictor.service import PredictionService, handle_predict
+
+from conftest import ROOT
+
+BODY = {"class9": 85, "class10": 70, "class11": 80, "class12": 90, "sat": 1400}
+
+
+@pytest.fixture
+def result_log(tmp_path, monkeypatch):
+    """Logging on in this process, as ``COLLEGE_PREDICTOR_RESULTS`` does at import."""
+    monkeypatch.setattr(results, "_log", None)
+    db = str(tmp_path / "results.sqlite")
+    result_log = results.enable(db)
+    yield db
+    result_log.close()
+
+
+def test_service_workers_write_to_the_log(result_log):
+    service = PredictionService(workers=2, path=os.path.join(ROOT, EXCEL_PATH))
+    service.start()
+    try:
+        futures = [service._pool.submit(handle_predict, json.dumps(dict(BODY, sat=1000 + i)))
+                   for i in range(20)]
+        assert [f.result()[0] for f in futures] == [200] * 20
+    finally:
+        service.stop()   # workers flush their log on the way out
+    store = results.ResultStore(result_log)
+    try:
+        counts = store.counts()
+    finally:
+        store.close()
+    assert counts["predictions"] == 20
+    assert counts["bucket_rows"] > 0